@@ -0,0 +1,99 @@
+"""
+Import-time benchmark with a regression budget.
+
+Imports each module in a fresh interpreter with `python -X importtime` and reports
+its cumulative import time (the median of several runs), together with the heavy
+third-party packages it pulled in. Exits with status 1 if a module exceeds its budget
+or loads any of HEAVY_PACKAGES at import time.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --runs 5 --json import_times.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Budgets in milliseconds of cumulative import time. The tools have to define their
+# langchain_core tool objects at import time, which costs most of their budget
+DEFAULT_BUDGETS_MS = {
+    "notebookbot.scripts.notebookbot_run": 150,
+    "notebookbot.authentication.authentication_setup": 300,
+    "notebookbot.llm_tools.query_documents": 1500,
+    "notebookbot.llm_tools.arxiv_search": 1500,
+}
+
+HEAVY_PACKAGES = (
+    "chromadb", "langgraph", "langchain_anthropic", "langchain_community",
+    "langchain_openai", "anthropic", "openai", "fitz", "numpy", "httpx",
+)
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_time(module: str) -> tuple:
+    """
+    Import module in a fresh interpreter.
+    Returns:
+        tuple: (cumulative import time in ms, heavy packages imported).
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    cumulative_us, loaded = None, set()
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(match.group(2))
+    if cumulative_us is None:
+        raise RuntimeError(f"No import time reported for {module}")
+    return cumulative_us / 1000, sorted(loaded.intersection(HEAVY_PACKAGES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=list(DEFAULT_BUDGETS_MS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="Multiply all budgets, e.g. 2 on slow CI machines")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results, failed = {}, []
+    print(f"{'module':<50} {'median ms':>10} {'budget ms':>10}  heavy imports")
+    for module in args.modules:
+        times, heavy = [], []
+        for _ in range(args.runs):
+            elapsed, heavy = import_time(module)
+            times.append(elapsed)
+        median = statistics.median(times)
+        budget = DEFAULT_BUDGETS_MS.get(module)
+        budget = budget * args.budget_scale if budget is not None else None
+        over = budget is not None and median > budget
+        if over or (budget is not None and heavy):
+            failed.append(module)
+        results[module] = {"median_ms": median, "runs_ms": times, "budget_ms": budget, "heavy_imports": heavy}
+        budget_text = f"{budget:.0f}" if budget is not None else "-"
+        print(f"{module:<50} {median:>10.1f} {budget_text:>10}  {', '.join(heavy) or '-'}{'  OVER BUDGET' if over else ''}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        print(f"\nImport-time budget exceeded or heavy packages imported: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
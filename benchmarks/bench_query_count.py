@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: cost of re-reading the collection count on every query.
+
+Times ChromaDBManager.query_documents on persistent collections of several sizes,
+once with the count re-read from storage per query (count_refresh_interval=0, the
+behaviour before the tracked count) and once with the tracked count
+(count_refresh_interval=None, the default). The collection is filled with random
+vectors and queries are embedded offline (see fakes.py); the query cache is
+disabled so every query searches the collection.
+
+    python benchmarks/bench_query_count.py --sizes 10000 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import numpy as np  # noqa: E402
+
+from fakes import HashEmbeddingFunction, canned_queries, offline_chromadb_manager  # noqa: E402
+
+
+def build_manager(path: str, size: int, dim: int, seed: int = 0):
+    manager = offline_chromadb_manager(path, embedding_function=HashEmbeddingFunction(dim),
+                                       query_cache_size=0, cache_query_embeddings=False)
+    rng = np.random.default_rng(seed)
+    batch = min(manager.client.get_max_batch_size(), 5000)
+    for start in range(0, size, batch):
+        n = min(batch, size - start)
+        manager.collection.add(
+            ids=[f"doc_{i}" for i in range(start, start + n)],
+            embeddings=rng.random((n, dim), dtype=np.float32),
+            documents=[f"document {i}" for i in range(start, start + n)],
+        )
+    manager.document_count(refresh=True)
+    return manager
+
+
+def time_queries(manager, queries, n_results: int) -> list:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        manager.query_documents(query, n_results, collapse_chunks=False, mode="vector")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--n-results", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'docs':>8} {'count per query p50 ms':>24} {'tracked count p50 ms':>22} {'saved p50 ms':>14}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as path:
+            manager = build_manager(path, size, args.dim)
+            queries = canned_queries(args.queries + 10, seed=size)
+
+            manager.count_refresh_interval = None
+            time_queries(manager, queries[:10], args.n_results)  # warm up
+            manager.count_refresh_interval = 0.0
+            before = statistics.median(time_queries(manager, queries[10:], args.n_results))
+            manager.count_refresh_interval = None
+            after = statistics.median(time_queries(manager, queries[10:], args.n_results))
+            print(f"{size:>8} {before:>24.3f} {after:>22.3f} {before - after:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Load test of the multi-session server with a scripted (stubbed) model and tool.
+
+Runs increasing numbers of concurrent simulated users against one SessionServer.
+Each user sends --turns messages, with a think time in between. Each turn makes one
+model call that requests a tool, one tool call, and a final model call that streams its
+answer. Model latency and tool time are simulated, so the result measures the serving
+overhead (graph, checkpointer, queues, event loop) and not an API.
+
+Reports per level: p50/p99 turn latency (from submit to answer), turns per second,
+CPU cores used (process CPU time / wall time) and sessions per core. Sessions per core
+is also reported for the largest level that meets the p99 target.
+
+    python benchmarks/bench_session_server.py
+    python benchmarks/bench_session_server.py --sessions 50 200 800 --json server.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langchain_core.tools import tool  # noqa: E402
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+
+from fakes import ScriptedChatModel, tool_call  # noqa: E402
+
+from notebookbot.agent.agent_graph import TerminalPrinter, build_agent_graph  # noqa: E402
+from notebookbot.agent.session_server import SessionServer, ServerBusy  # noqa: E402
+from notebookbot.agent.tool_executor import ToolExecutor  # noqa: E402
+
+
+class _NullStream:
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+def make_tool(seconds: float):
+    @tool
+    def query_documents(query: str) -> str:
+        """Search the saved documents."""
+        time.sleep(seconds)
+        return f"Title: Results for {query}\nContent: " + "lorem ipsum " * 40
+
+    return query_documents
+
+
+def lookup_then_answer(messages):
+    if isinstance(messages[-1], HumanMessage):
+        return AIMessage(content="", tool_calls=[tool_call("query_documents", {"query": messages[-1].content},
+                                                           f"call_{len(messages)}")])
+    return AIMessage(content="Here is what the saved documents say about it, in a few short sentences.")
+
+
+async def simulate_user(server: SessionServer, user: int, turns: int, think_time: float, rejected: list):
+    rng = random.Random(user)
+    session_id = f"user-{user}"
+    for turn in range(turns):
+        await asyncio.sleep(rng.uniform(0, 2 * think_time))
+        try:
+            await server.submit(session_id, f"question {turn} of user {user}", TerminalPrinter(_NullStream()))
+        except ServerBusy:
+            rejected.append(user)
+
+
+async def run_level(args, sessions: int) -> dict:
+    model = ScriptedChatModel(script=lookup_then_answer, latency=args.model_latency, token_delay=args.token_delay)
+    tools = [make_tool(args.tool_seconds)]
+    executor = ToolExecutor(tools, max_workers=args.tool_workers)
+    app = build_agent_graph(model, tools, checkpointer=MemorySaver(), tool_executor=executor)
+    server = SessionServer(app, max_concurrent_turns=args.max_concurrent_turns, max_sessions=sessions)
+    rejected = []
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(simulate_user(server, user, args.turns, args.think_time, rejected)
+                           for user in range(sessions)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    executor.close()
+
+    stats = server.stats()
+    cores = cpu / wall if wall else 0.0
+    return {
+        "sessions": sessions,
+        "turns": stats["completed_turns"],
+        "failed": stats["failed_turns"],
+        "rejected": len(rejected),
+        "p50_ms": stats["p50_turn_ms"],
+        "p99_ms": stats["p99_turn_ms"],
+        "turns_per_s": stats["completed_turns"] / wall if wall else 0.0,
+        "cpu_ms_per_turn": cpu * 1000 / stats["completed_turns"] if stats["completed_turns"] else 0.0,
+        "cores_used": cores,
+        "sessions_per_core": sessions / cores if cores else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--turns", type=int, default=5, help="Messages per simulated user")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean seconds between a user's messages")
+    parser.add_argument("--model-latency", type=float, default=0.2, help="Simulated seconds to first token")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Simulated seconds between tokens")
+    parser.add_argument("--tool-seconds", type=float, default=0.05, help="Simulated tool run time")
+    parser.add_argument("--tool-workers", type=int, default=32)
+    parser.add_argument("--max-concurrent-turns", type=int, default=64)
+    parser.add_argument("--p99-target-ms", type=float, default=2000.0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'sessions':>8} {'turns':>6} {'p50 ms':>8} {'p99 ms':>8} {'turns/s':>8} "
+          f"{'cpu ms/turn':>12} {'cores':>6} {'sess/core':>10}")
+    for sessions in args.sessions:
+        result = asyncio.run(run_level(args, sessions))
+        results.append(result)
+        print(f"{sessions:>8} {result['turns']:>6} {result['p50_ms']:>8.0f} {result['p99_ms']:>8.0f} "
+              f"{result['turns_per_s']:>8.1f} {result['cpu_ms_per_turn']:>12.1f} {result['cores_used']:>6.2f} "
+              f"{result['sessions_per_core']:>10.0f}")
+        if result["failed"] or result["rejected"]:
+            print(f"         {result['failed']} turns failed, {result['rejected']} requests rejected")
+
+    within_target = [result for result in results if result["p99_ms"] <= args.p99_target_ms]
+    best = max(within_target, key=lambda result: result["sessions"]) if within_target else None
+    if best:
+        print(f"\n{best['sessions_per_core']:.0f} sessions per core at p99 {best['p99_ms']:.0f} ms "
+              f"({best['sessions']} sessions)")
+    else:
+        print(f"\nNo level met the p99 target of {args.p99_target_ms:.0f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "levels": results,
+                       "sessions_per_core": best["sessions_per_core"] if best else None}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
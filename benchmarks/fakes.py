@@ -0,0 +1,183 @@
+"""
+Deterministic offline stand-ins for the paid services, for the benchmarks.
+
+- HashEmbeddingFunction: feature-hashed bag-of-words vectors instead of OpenAI
+  embeddings; texts sharing words get similar vectors, so retrieval behaves sensibly.
+- canned_arxiv_documents / canned_arxiv_transport: arXiv-like papers, as Documents or
+  served as an Atom feed and PDFs by an httpx transport that ArxivFetcher can use.
+- lookup_then_answer: a script for ScriptedChatModel that searches the saved
+  documents once per question and then answers, like a typical NotebookBot turn.
+
+The same seed always produces the same corpus, queries and answers.
+"""
+import hashlib
+import os
+import random
+import re
+import sys
+from typing import List, Optional
+
+# The package, and the repository root for the scripted chat model of the tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings  # noqa: E402
+from langchain.docstore.document import Document  # noqa: E402
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+from notebookbot.chromadb.chromadb_manager import ChromaDBManager  # noqa: E402
+from notebookbot.data_help.document_ids import arxiv_document_id  # noqa: E402
+from tests.notebookbot.agent.scripted_model import ScriptedChatModel, tool_call  # noqa: E402
+
+DEFAULT_DIM = 256
+
+_TOKEN = re.compile(r"\w+")
+
+TOPICS = [
+    "attention", "transformer", "retrieval", "embedding", "language", "model", "graph",
+    "neural", "network", "optimization", "gradient", "reinforcement", "learning", "policy",
+    "diffusion", "generative", "contrastive", "representation", "benchmark", "dataset",
+    "quantization", "sparse", "inference", "latency", "memory", "cache", "index", "search",
+    "vector", "token", "decoder", "encoder", "alignment", "reasoning", "agent", "tool",
+    "compression", "distillation", "scaling", "robustness", "privacy", "federated",
+]
+FILLER = ["the", "of", "and", "we", "a", "to", "in", "is", "that", "for", "with", "our", "this", "on"]
+AUTHORS = ["Ada Lovelace", "Alan Turing", "Grace Hopper", "Claude Shannon", "Barbara Liskov",
+           "Donald Knuth", "Edsger Dijkstra", "Frances Allen", "John McCarthy", "Radia Perlman"]
+CATEGORIES = ["cs.CL", "cs.LG", "cs.IR", "cs.AI", "stat.ML"]
+
+
+class HashEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic, offline embeddings: L2-normalized feature hashes of the lower-cased words."""
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+        self.texts_embedded = 0
+
+    def _bucket(self, token: str) -> int:
+        return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little") % self.dim
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors = np.zeros((len(input), self.dim), dtype=np.float32)
+        for row, text in enumerate(input):
+            for token in _TOKEN.findall(text.lower()):
+                vectors[row, self._bucket(token)] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1.0, norms)
+        self.texts_embedded += len(input)
+        return list(vectors)
+
+
+def _sentence(rng: random.Random, topics: List[str], words: int) -> str:
+    return " ".join(rng.choice(topics) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(words))
+
+
+def canned_arxiv_documents(count: int, words: int = 600, seed: int = 0) -> List[Document]:
+    """
+    arXiv-like papers with the metadata ArxivFetcher produces and stable arxiv ids.
+    Args:
+        count (int): Number of papers.
+        words (int): Words of body text per paper.
+        seed (int): The same seed gives the same papers.
+    """
+    rng = random.Random(seed)
+    documents = []
+    for n in range(count):
+        topics = rng.sample(TOPICS, 5)
+        arxiv_id = f"24{n // 100000 % 100:02d}.{n % 100000:05d}"
+        documents.append(Document(
+            page_content=_sentence(rng, topics, words),
+            metadata={
+                "id": arxiv_document_id(arxiv_id, 1),
+                "source": "arXiv",
+                "Published": f"{2015 + n % 10}-{1 + n % 12:02d}-{1 + n % 28:02d}",
+                "Title": " ".join(word.capitalize() for word in topics[:3]) + f" {n}",
+                "Authors": ", ".join(rng.sample(AUTHORS, 2)),
+                "Summary": _sentence(rng, topics, 60),
+                "primary_category": rng.choice(CATEGORIES),
+            },
+        ))
+    return documents
+
+
+def canned_queries(count: int, seed: int = 1) -> List[str]:
+    """Distinct search queries over the canned topics (distinct, so the query caches miss)"""
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(TOPICS, 3)) + f" {i}" for i in range(count)]
+
+
+_FEED = ('<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom" '
+         'xmlns:arxiv="http://arxiv.org/schemas/atom">{entries}</feed>')
+_ENTRY = ('<entry><id>http://arxiv.org/abs/{arxiv_id}v1</id><updated>{published}T00:00:00Z</updated>'
+          '<published>{published}T00:00:00Z</published><title>{title}</title><summary>{summary}</summary>'
+          '{authors}<arxiv:primary_category term="{category}"/><category term="{category}"/>'
+          '<link href="https://arxiv.org/pdf/{arxiv_id}v1" title="pdf" type="application/pdf"/></entry>')
+
+
+def canned_arxiv_transport(documents: List[Document]) -> httpx.MockTransport:
+    """
+    An httpx transport that answers arXiv API searches with all of documents (up to
+    max_results) and serves each paper's text as a PDF. Use it as
+    ArxivFetcher(client=httpx.Client(transport=canned_arxiv_transport(docs)),
+                 min_interval=0, pdf_min_interval=0).
+    """
+    import fitz
+
+    def make_pdf(text: str) -> bytes:
+        pdf = fitz.open()
+        page = pdf.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=9)
+        data = pdf.tobytes()
+        pdf.close()
+        return data
+
+    papers = {doc.metadata["id"].split(":", 1)[1]: doc for doc in documents}
+    pdfs = {}
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path.startswith("/pdf/"):
+            versioned_id = request.url.path[len("/pdf/"):]
+            if versioned_id not in papers:
+                return httpx.Response(404)
+            if versioned_id not in pdfs:
+                pdfs[versioned_id] = make_pdf(papers[versioned_id].page_content)
+            return httpx.Response(200, content=pdfs[versioned_id], headers={"Content-Type": "application/pdf"})
+        max_results = int(request.url.params.get("max_results", 10))
+        entries = "".join(_ENTRY.format(
+            arxiv_id=doc.metadata["id"].split(":", 1)[1][:-2],
+            published=doc.metadata["Published"],
+            title=doc.metadata["Title"],
+            summary=doc.metadata["Summary"],
+            authors="".join(f"<author><name>{name}</name></author>" for name in doc.metadata["Authors"].split(", ")),
+            category=doc.metadata["primary_category"],
+        ) for doc in documents[:max_results])
+        return httpx.Response(200, text=_FEED.format(entries=entries),
+                              headers={"Content-Type": "application/atom+xml"})
+
+    return httpx.MockTransport(handle)
+
+
+def offline_chromadb_manager(db_path: str, embedding_function: Optional[EmbeddingFunction] = None,
+                             **kwargs) -> ChromaDBManager:
+    """
+    A fresh ChromaDBManager on db_path with offline embeddings (default: HashEmbeddingFunction).
+    ChromaDBManager is a process-wide singleton, which the tools share; this replaces it.
+    """
+    ChromaDBManager._instance = None
+    return ChromaDBManager(db_path=db_path, embedding_function=embedding_function or HashEmbeddingFunction(),
+                           **kwargs)
+
+
+def lookup_then_answer(messages) -> AIMessage:
+    """Script of a NotebookBot turn: search the saved documents for the question, then answer"""
+    if isinstance(messages[-1], HumanMessage):
+        return AIMessage(content="", tool_calls=[tool_call(
+            "query_documents", {"query": messages[-1].content, "n_results": 5, "return_fields": "content"},
+            f"call_{len(messages)}")])
+    return AIMessage(content="According to the saved papers, the approaches differ mainly in how they "
+                             "trade retrieval quality against latency and memory.")
+
+
+def scripted_chat_model(latency: float = 0.0, token_delay: float = 0.0) -> ScriptedChatModel:
+    return ScriptedChatModel(script=lookup_then_answer, latency=latency, token_delay=token_delay)
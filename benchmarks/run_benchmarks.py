@@ -0,0 +1,208 @@
+"""
+Offline benchmark suite: no OpenAI, Anthropic or arXiv calls (see fakes.py).
+
+Measures
+  ingestion   documents and chunks per second through ChromaDBManager.sync_documents
+  query       p50/p99 latency of vector, lexical and hybrid queries at several corpus sizes
+  arxiv       papers per second through ArxivFetcher (canned feed and PDFs, empty document store)
+  startup     import time of the chat entry point and of the full stack, and the time to
+              open an existing ChromaDBManager
+  turn        end-to-end latency of a chat turn (scripted model, real query_documents tool,
+              SQLite checkpointer), i.e. the overhead NotebookBot adds around the model
+
+and writes the results as JSON. With --compare, the results are compared with an
+earlier run and the exit status is 1 if a metric regressed by more than --threshold.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --quick --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import httpx  # noqa: E402
+
+from bench_import_time import import_time  # noqa: E402
+from fakes import (  # noqa: E402
+    canned_arxiv_documents,
+    canned_arxiv_transport,
+    canned_queries,
+    offline_chromadb_manager,
+    scripted_chat_model,
+)
+
+from notebookbot.agent.agent_graph import build_agent_graph, run_turn  # noqa: E402
+from notebookbot.agent.session_server import percentile  # noqa: E402
+from notebookbot.agent.sqlite_checkpointer import SqliteCheckpointer  # noqa: E402
+from notebookbot.llm_tools.arxiv_fetcher import ArxivFetcher  # noqa: E402
+
+QUERY_MODES = ("vector", "lexical", "hybrid")
+
+
+def metric(value: float, unit: str, better: str) -> dict:
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def timed_ms(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_ingestion(workdir: str, size: int, words: int) -> dict:
+    documents = canned_arxiv_documents(size, words=words)
+    manager = offline_chromadb_manager(os.path.join(workdir, "ingestion"))
+    start = time.perf_counter()
+    stats = manager.sync_documents(documents, scope="arxiv")
+    seconds = time.perf_counter() - start
+    chunks = manager.document_count(refresh=True)
+    return {
+        f"ingestion.docs_per_s@{size}": metric(stats.added / seconds, "docs/s", "higher"),
+        f"ingestion.chunks_per_s@{size}": metric(chunks / seconds, "chunks/s", "higher"),
+    }
+
+
+def bench_query(workdir: str, sizes, words: int, queries: int) -> dict:
+    results = {}
+    for size in sizes:
+        manager = offline_chromadb_manager(os.path.join(workdir, f"query_{size}"))
+        manager.sync_documents(canned_arxiv_documents(size, words=words), scope="arxiv")
+        for mode in QUERY_MODES:
+            # Distinct queries per mode, so neither the result nor the embedding cache hits
+            texts = canned_queries(queries + 5, seed=size * len(QUERY_MODES) + QUERY_MODES.index(mode))
+            for text in texts[:5]:  # warm up
+                manager.query_documents(text, n_results=5, mode=mode)
+            latencies = [timed_ms(manager.query_documents, text, n_results=5, mode=mode) for text in texts[5:]]
+            results[f"query.{mode}.p50_ms@{size}"] = metric(percentile(latencies, 50), "ms", "lower")
+            results[f"query.{mode}.p99_ms@{size}"] = metric(percentile(latencies, 99), "ms", "lower")
+    return results
+
+
+def bench_arxiv(workdir: str, papers: int) -> dict:
+    documents = canned_arxiv_documents(papers, words=300, seed=7)
+    fetcher = ArxivFetcher(store_path=os.path.join(workdir, "documents.jsonl"), min_interval=0.0, pdf_min_interval=0.0,
+                           client=httpx.Client(transport=canned_arxiv_transport(documents)))
+    start = time.perf_counter()
+    fetched = fetcher.load("retrieval", max_results=papers)
+    seconds = time.perf_counter() - start
+    cached_ms = timed_ms(fetcher.load, "retrieval", max_results=papers)
+    return {
+        "arxiv.papers_per_s": metric(len(fetched) / seconds, "papers/s", "higher"),
+        "arxiv.cached_search_ms": metric(cached_ms, "ms", "lower"),
+    }
+
+
+def bench_startup(workdir: str, runs: int) -> dict:
+    run_ms = statistics.median(import_time("notebookbot.scripts.notebookbot_run")[0] for _ in range(runs))
+    stack_ms = statistics.median(import_time("notebookbot.chromadb.chromadb_manager")[0] for _ in range(runs))
+    db_path = os.path.join(workdir, "startup")
+    offline_chromadb_manager(db_path).sync_documents(canned_arxiv_documents(200), scope="arxiv")
+    open_ms = statistics.median(timed_ms(offline_chromadb_manager, db_path) for _ in range(runs))
+    return {
+        "startup.import_chat_ms": metric(run_ms, "ms", "lower"),
+        "startup.import_chromadb_manager_ms": metric(stack_ms, "ms", "lower"),
+        "startup.open_chromadb_manager_ms": metric(open_ms, "ms", "lower"),
+    }
+
+
+def bench_turn(workdir: str, size: int, turns: int) -> dict:
+    # The tool uses the ChromaDBManager singleton, as in the chat
+    from notebookbot.llm_tools.query_documents import query_documents
+
+    offline_chromadb_manager(os.path.join(workdir, "turn")).sync_documents(
+        canned_arxiv_documents(size), scope="arxiv")
+    questions = canned_queries(turns, seed=3)
+    with SqliteCheckpointer(os.path.join(workdir, "history.db")) as checkpointer:
+        app = build_agent_graph(scripted_chat_model(), [query_documents], checkpointer=checkpointer)
+
+        async def conversation():
+            latencies = []
+            for question in questions:
+                start = time.perf_counter()
+                await run_turn(app, question, thread_id="bench")
+                latencies.append((time.perf_counter() - start) * 1000)
+            return latencies
+
+        latencies = asyncio.run(conversation())
+    return {
+        f"turn.p50_ms@{size}": metric(percentile(latencies, 50), "ms", "lower"),
+        f"turn.p99_ms@{size}": metric(percentile(latencies, 99), "ms", "lower"),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print the change of every metric and return the names of the regressed ones"""
+    regressions = []
+    print(f"\n{'metric':<42} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None or not before["value"]:
+            print(f"{name:<42} {'-':>12} {current['value']:>12.2f} {'new':>8}")
+            continue
+        change = (current["value"] - before["value"]) / before["value"]
+        worse = change > threshold if current["better"] == "lower" else change < -threshold
+        if worse:
+            regressions.append(name)
+        print(f"{name:<42} {before['value']:>12.2f} {current['value']:>12.2f} {change:>+7.0%}"
+              f"{' REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Small corpora and few repetitions")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Corpus sizes (documents) for the query benchmark")
+    parser.add_argument("--only", nargs="+", choices=["ingestion", "query", "arxiv", "startup", "turn"],
+                        help="Run only these benchmarks")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative change counted as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    sizes = args.sizes or ([100, 500] if args.quick else [1000, 5000, 20000])
+    queries = 20 if args.quick else 200
+    words = 300 if args.quick else 600
+    selected = set(args.only or ["ingestion", "query", "arxiv", "startup", "turn"])
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        if "ingestion" in selected:
+            results.update(bench_ingestion(workdir, sizes[-1], words))
+        if "query" in selected:
+            results.update(bench_query(workdir, sizes, words, queries))
+        if "arxiv" in selected:
+            results.update(bench_arxiv(workdir, 5 if args.quick else 20))
+        if "startup" in selected:
+            results.update(bench_startup(workdir, 1 if args.quick else 5))
+        if "turn" in selected:
+            results.update(bench_turn(workdir, sizes[0], 10 if args.quick else 50))
+
+    for name, result in results.items():
+        print(f"{name:<42} {result['value']:>12.2f} {result['unit']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                                "cpus": os.cpu_count()},
+                "config": {"quick": args.quick, "sizes": sizes, "queries": queries, "words": words},
+                "results": results,
+            }, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
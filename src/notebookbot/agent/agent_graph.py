@@ -0,0 +1,127 @@
+import sys
+import time
+from typing import Any, Callable, Dict, Literal, Optional, Sequence, TextIO
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import END, MessagesState, START, StateGraph
+
+from notebookbot.agent.tool_executor import ToolExecutor
+
+
+def should_continue(state: MessagesState) -> Literal["tools", "__end__"]:
+    """Route to the tools while the model keeps requesting tool calls"""
+    last_message = state['messages'][-1]
+    if last_message.tool_calls:
+        return "tools"
+    return END
+
+
+def build_agent_graph(model, tools: Sequence, checkpointer=None, tool_executor: Optional[ToolExecutor] = None,
+                      compactor: Optional[Callable[[Sequence[BaseMessage]], Sequence[BaseMessage]]] = None):
+    """
+    Compile the agent/tools loop of the chat.
+    Both nodes are async: the model is called with ainvoke (so its tokens can be
+    streamed), and the ToolExecutor runs all tool calls of one model turn concurrently
+    on its thread pool instead of one after another.
+    Args:
+        model: A chat model with the tools bound.
+        tools (Sequence): The tools the model may call.
+        checkpointer: Persists the conversation state between turns.
+        tool_executor (ToolExecutor): Runs the tool calls (default: a ToolExecutor of tools).
+        compactor: Builds the prompt from the stored messages, e.g. a HistoryCompactor
+            that keeps it within a token budget (default: send all messages).
+    Returns:
+        The compiled graph.
+    """
+    async def call_model(state: MessagesState):
+        messages = state['messages']
+        response = await model.ainvoke(compactor(messages) if compactor else messages)
+        return {"messages": [response]}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("agent", call_model)
+    workflow.add_node("tools", (tool_executor or ToolExecutor(tools)).node)
+    workflow.add_edge(START, "agent")
+    workflow.add_conditional_edges("agent", should_continue)
+    workflow.add_edge("tools", "agent")
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def message_text(message: BaseMessage) -> str:
+    """The text of a message or chunk; Anthropic content can be a list of typed blocks"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content
+                   if isinstance(block, dict) and block.get("type") in ("text", "text_delta"))
+
+
+def thread_config(thread_id: Any) -> Dict[str, dict]:
+    return {"configurable": {"thread_id": str(thread_id)}}
+
+
+async def run_turn(app, user_input: str, thread_id: Any) -> AIMessage:
+    """Run one turn to completion and return the final model message"""
+    result = await app.ainvoke({"messages": [HumanMessage(content=user_input)]}, config=thread_config(thread_id))
+    return result["messages"][-1]
+
+
+class TerminalPrinter:
+    """Writes streamed tokens and tool progress of a turn to a text stream."""
+    def __init__(self, out: TextIO = sys.stdout):
+        self.out = out
+        self._tool_starts: Dict[str, float] = {}
+
+    def token(self, text: str):
+        self.out.write(text)
+        self.out.flush()
+
+    def tool_start(self, run_id: str, name: str, args: Any):
+        self._tool_starts[run_id] = time.perf_counter()
+        self.out.write(f"\n[{name}] running with {args}\n")
+        self.out.flush()
+
+    def tool_end(self, run_id: str, name: str):
+        elapsed = time.perf_counter() - self._tool_starts.pop(run_id, time.perf_counter())
+        self.out.write(f"[{name}] done in {elapsed:.1f}s\n")
+        self.out.flush()
+
+
+async def stream_turn(app, user_input: str, thread_id: Any, printer: Optional[TerminalPrinter] = None,
+                      on_event: Optional[Callable[[dict], None]] = None) -> AIMessage:
+    """
+    Run one turn and report model tokens and tool progress as they happen.
+    Args:
+        app: The compiled graph (see build_agent_graph).
+        user_input (str): The user's message.
+        thread_id: The conversation to continue.
+        printer (TerminalPrinter): Receives tokens and tool events (default: stdout).
+        on_event: Optionally called with every raw astream_events event.
+    Returns:
+        AIMessage: The final model message of the turn.
+    """
+    printer = printer or TerminalPrinter()
+    config = thread_config(thread_id)
+    streamed_runs = set()
+    async for event in app.astream_events({"messages": [HumanMessage(content=user_input)]},
+                                          config=config, version="v2"):
+        if on_event is not None:
+            on_event(event)
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            text = message_text(event["data"]["chunk"])
+            if text:
+                streamed_runs.add(event["run_id"])
+                printer.token(text)
+        elif kind == "on_chat_model_end" and event["run_id"] not in streamed_runs:
+            # Models that do not stream deliver their text in one piece
+            output = event["data"].get("output")
+            text = message_text(output) if isinstance(output, BaseMessage) else ""
+            if text:
+                printer.token(text)
+        elif kind == "on_tool_start":
+            printer.tool_start(event["run_id"], event["name"], event["data"].get("input"))
+        elif kind == "on_tool_end":
+            printer.tool_end(event["run_id"], event["name"])
+    state = await app.aget_state(config)
+    return state.values["messages"][-1]
@@ -0,0 +1,119 @@
+import json
+import logging
+from typing import Callable, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from notebookbot.agent.agent_graph import message_text
+
+DEFAULT_MAX_PROMPT_TOKENS = 8000
+DEFAULT_TOOL_EXCERPT_CHARS = 300
+# A rough but cheap estimate for English text and JSON; the budget is a soft limit
+CHARS_PER_TOKEN = 4
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Approximate prompt tokens of messages, including the arguments of tool calls"""
+    chars = 0
+    for message in messages:
+        chars += len(message_text(message))
+        if isinstance(message, AIMessage) and message.tool_calls:
+            chars += len(json.dumps([[call["name"], call["args"]] for call in message.tool_calls], default=str))
+    return chars // CHARS_PER_TOKEN + TOKENS_PER_MESSAGE * len(messages)
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> tuple:
+    """
+    Split a conversation into its leading system messages and its turns.
+    Returns:
+        tuple: (system messages, turns), where each turn is a list of messages that
+            starts with a HumanMessage and holds the model and tool messages answering it.
+    """
+    messages = list(messages)
+    start = 0
+    while start < len(messages) and isinstance(messages[start], SystemMessage):
+        start += 1
+    turns: List[List[BaseMessage]] = []
+    for message in messages[start:]:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return messages[:start], turns
+
+
+def default_summary(turns: Sequence[Sequence[BaseMessage]]) -> str:
+    """A summary of dropped turns that needs no model call: the questions that were asked"""
+    questions = [message_text(turn[0])[:200] for turn in turns if isinstance(turn[0], HumanMessage)]
+    return "Earlier in this conversation the user asked: " + "; ".join(questions)
+
+
+class HistoryCompactor:
+    """
+    Shrinks the conversation sent to the model to a prompt token budget, so long chats
+    stop re-sending every earlier tool output (e.g. the document excerpts of
+    query_documents) on every model call.
+    The stored history is not changed, only the prompt built from it. While the
+    estimate is over budget:
+    1. tool outputs of earlier turns are truncated to short excerpts, oldest first;
+    2. the oldest turns are dropped entirely and replaced by one summary message.
+    Whole turns are dropped so every tool call keeps its tool result. The current turn
+    (from the latest user message on) and leading system messages are always kept.
+    """
+    def __init__(self,
+                 max_tokens: int = DEFAULT_MAX_PROMPT_TOKENS,
+                 tool_excerpt_chars: int = DEFAULT_TOOL_EXCERPT_CHARS,
+                 summarize: Optional[Callable[[List[List[BaseMessage]]], str]] = None):
+        """
+        Args:
+            max_tokens (int): The prompt token budget.
+            tool_excerpt_chars (int): Characters kept of a truncated tool output.
+            summarize: Turns -> summary text for dropped turns (default: default_summary).
+        """
+        self.max_tokens = max_tokens
+        self.tool_excerpt_chars = tool_excerpt_chars
+        self.summarize = summarize or default_summary
+
+    def _truncate(self, message: ToolMessage) -> ToolMessage:
+        text = message_text(message)
+        if len(text) <= self.tool_excerpt_chars:
+            return message
+        omitted = len(text) - self.tool_excerpt_chars
+        return message.model_copy(update={
+            "content": f"{text[:self.tool_excerpt_chars]}\n[... {omitted} characters of this earlier tool output omitted]"
+        })
+
+    def __call__(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """
+        Args:
+            messages (Sequence[BaseMessage]): The full conversation.
+        Returns:
+            List[BaseMessage]: The conversation to send, within budget where possible.
+        """
+        before = estimate_tokens(messages)
+        if before <= self.max_tokens:
+            return list(messages)
+        system, turns = split_turns(messages)
+        earlier, current = turns[:-1], turns[-1:]
+        total = before
+        for turn in earlier:
+            for i, message in enumerate(turn):
+                if total <= self.max_tokens:
+                    break
+                if isinstance(message, ToolMessage):
+                    turn[i] = self._truncate(message)
+                    total -= estimate_tokens([message]) - estimate_tokens([turn[i]])
+
+        dropped = []
+        while earlier and total > self.max_tokens:
+            turn = earlier.pop(0)
+            dropped.append(turn)
+            total -= estimate_tokens(turn)
+        compacted = system + [message for turn in earlier + current for message in turn]
+        if dropped:
+            summary = HumanMessage(content=self.summarize(dropped))
+            compacted.insert(len(system), summary)
+
+        logging.info(f"Compacted the prompt from ~{before} to ~{estimate_tokens(compacted)} tokens "
+                     f"({len(dropped)} earlier turns summarized)")
+        return compacted
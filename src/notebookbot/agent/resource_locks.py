@@ -0,0 +1,73 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable
+
+
+class ReadWriteLock:
+    """
+    A lock with shared (read) and exclusive (write) holders.
+    Writers are preferred: once a writer waits, new readers wait too, so a steady
+    stream of queries cannot starve a write. Not reentrant.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class ResourceLocks:
+    """
+    Named exclusive locks for resources that tools must not use concurrently.
+    Locks are created on first use and always acquired in name order, so tools that
+    hold several resources cannot deadlock each other.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: Dict[str, threading.RLock] = {}
+
+    def get(self, name: str) -> threading.RLock:
+        with self._lock:
+            return self._locks.setdefault(name, threading.RLock())
+
+    @contextmanager
+    def hold(self, names: Iterable[str]):
+        locks = [self.get(name) for name in sorted(set(names))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
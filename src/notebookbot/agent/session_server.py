@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Optional, Sequence
+
+from langchain_core.messages import AIMessage
+
+from notebookbot.agent.agent_graph import TerminalPrinter, run_turn, stream_turn
+
+DEFAULT_MAX_CONCURRENT_TURNS = 16
+DEFAULT_MAX_QUEUED_PER_SESSION = 2
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_IDLE_TIMEOUT = 1800.0
+LATENCY_WINDOW = 10000
+
+
+class ServerBusy(RuntimeError):
+    """Raised when a request is refused to protect the server: too many sessions, or a full session queue."""
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """The q-th percentile (nearest rank) of values, 0.0 if there are none"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+@dataclass
+class _Request:
+    text: str
+    future: asyncio.Future
+    printer: Optional[TerminalPrinter]
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class ChatSession:
+    """One user's conversation: its graph thread and its queue of pending messages."""
+    session_id: str
+    thread_id: str
+    queue: asyncio.Queue
+    worker: Optional[asyncio.Task] = None
+    last_active: float = field(default_factory=time.monotonic)
+
+    @property
+    def busy(self) -> bool:
+        return self.worker is not None or not self.queue.empty()
+
+
+class _QueueWriter:
+    """A text stream that hands everything written to it to an asyncio.Queue"""
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+
+    def write(self, text: str):
+        self.queue.put_nowait(text)
+
+    def flush(self):
+        pass
+
+
+class SessionServer:
+    """
+    Serves many concurrent chat sessions from one process and one event loop.
+    All sessions share one compiled agent graph, and with it the model and its pooled
+    HTTP client, the ToolExecutor thread pool and the ChromaDBManager behind the tools;
+    each session only adds its own thread id and a small queue.
+    Messages of one session are answered in order, one turn at a time (turns of the same
+    thread must not interleave). Across sessions at most `max_concurrent_turns` turns run
+    at once, the rest wait for a slot. Backpressure is explicit: a session holds at most
+    `max_queued_per_session` waiting messages, and the server at most `max_sessions`
+    sessions; beyond that requests fail fast with ServerBusy instead of queueing without
+    bound. Sessions idle for `idle_timeout` seconds are dropped (their history stays in
+    the graph's checkpointer).
+    Must be used from a single event loop.
+    """
+    def __init__(self, app,
+                 max_concurrent_turns: int = DEFAULT_MAX_CONCURRENT_TURNS,
+                 max_queued_per_session: int = DEFAULT_MAX_QUEUED_PER_SESSION,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """
+        Args:
+            app: The compiled graph (see build_agent_graph), with a checkpointer.
+            max_concurrent_turns (int): Turns running at once over all sessions.
+            max_queued_per_session (int): Messages a session may have waiting.
+            max_sessions (int): Open sessions at once.
+            idle_timeout (float): Seconds after which an idle session is dropped.
+        """
+        self.app = app
+        self.max_concurrent_turns = max_concurrent_turns
+        self.max_queued_per_session = max_queued_per_session
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[str, ChatSession] = {}
+        self._turn_slots: Optional[asyncio.Semaphore] = None
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Created on first use, inside the event loop that serves the sessions
+        if self._turn_slots is None:
+            self._turn_slots = asyncio.Semaphore(self.max_concurrent_turns)
+        return self._turn_slots
+
+    def _expire_idle(self):
+        now = time.monotonic()
+        for session_id, session in list(self.sessions.items()):
+            if not session.busy and now - session.last_active > self.idle_timeout:
+                del self.sessions[session_id]
+
+    def open_session(self, session_id: Optional[str] = None, thread_id: Optional[str] = None) -> ChatSession:
+        """
+        Get a session, creating it on first use.
+        Args:
+            session_id (str): The session (default: a new random id).
+            thread_id (str): The conversation of a new session (default: the session id).
+        Returns:
+            ChatSession: The session.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        session = self.sessions.get(session_id)
+        if session is None:
+            if len(self.sessions) >= self.max_sessions:
+                self._expire_idle()
+            if len(self.sessions) >= self.max_sessions:
+                self._rejected += 1
+                raise ServerBusy(f"The server is at its limit of {self.max_sessions} sessions, try again later.")
+            session = ChatSession(session_id, str(thread_id or session_id),
+                                  asyncio.Queue(maxsize=self.max_queued_per_session))
+            self.sessions[session_id] = session
+        session.last_active = time.monotonic()
+        return session
+
+    def close_session(self, session_id: str):
+        """Forget a session; its running and queued turns still finish"""
+        self.sessions.pop(session_id, None)
+
+    def submit(self, session_id: str, text: str, printer: Optional[TerminalPrinter] = None) -> asyncio.Future:
+        """
+        Queue a message without waiting for the answer.
+        Args:
+            session_id (str): The session (opened if needed).
+            text (str): The user's message.
+            printer (TerminalPrinter): Receives the streamed tokens and tool progress.
+        Returns:
+            asyncio.Future: Resolves to the final AIMessage of the turn.
+        Raises:
+            ServerBusy: If the session already has max_queued_per_session waiting messages.
+        """
+        session = self.open_session(session_id)
+        request = _Request(text, asyncio.get_running_loop().create_future(), printer)
+        try:
+            session.queue.put_nowait(request)
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise ServerBusy("Still answering your previous messages, please wait for them.") from None
+        if session.worker is None:
+            session.worker = asyncio.create_task(self._work(session))
+        return request.future
+
+    async def ask(self, session_id: str, text: str) -> AIMessage:
+        """Send a message and wait for the final answer"""
+        return await self.submit(session_id, text)
+
+    async def stream(self, session_id: str, text: str) -> AsyncIterator[str]:
+        """Send a message and yield the answer's tokens and tool progress as they arrive"""
+        chunks: asyncio.Queue = asyncio.Queue()
+        future = self.submit(session_id, text, TerminalPrinter(_QueueWriter(chunks)))
+        future.add_done_callback(lambda _: chunks.put_nowait(None))
+        while (chunk := await chunks.get()) is not None:
+            yield chunk
+        future.result()
+
+    async def _work(self, session: ChatSession):
+        """Answer the session's queued messages in order, then exit"""
+        while not session.queue.empty():
+            request = session.queue.get_nowait()
+            if request.future.cancelled():
+                continue
+            try:
+                async with self._slots():
+                    self._running += 1
+                    try:
+                        if request.printer is None:
+                            message = await run_turn(self.app, request.text, session.thread_id)
+                        else:
+                            message = await stream_turn(self.app, request.text, session.thread_id, request.printer)
+                    finally:
+                        self._running -= 1
+            except Exception as e:
+                logging.error(f"Turn of session {session.session_id} failed: {e}")
+                self._failed += 1
+                if not request.future.done():
+                    request.future.set_exception(e)
+            else:
+                self._completed += 1
+                self._latencies.append(time.perf_counter() - request.enqueued)
+                if not request.future.done():
+                    request.future.set_result(message)
+            session.last_active = time.monotonic()
+        # No await since the empty() check, so no message can have slipped in unseen
+        session.worker = None
+
+    def stats(self) -> dict:
+        """Session counts, turn counts and turn latency (from queueing to answer) in ms"""
+        latencies = list(self._latencies)
+        return {
+            "sessions": len(self.sessions),
+            "running_turns": self._running,
+            "queued_turns": sum(session.queue.qsize() for session in self.sessions.values()),
+            "completed_turns": self._completed,
+            "failed_turns": self._failed,
+            "rejected_requests": self._rejected,
+            "p50_turn_ms": percentile(latencies, 50) * 1000,
+            "p99_turn_ms": percentile(latencies, 99) * 1000,
+        }
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Mapping, Optional, Sequence
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+
+from notebookbot.agent.resource_locks import ResourceLocks
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class ToolExecutor:
+    """
+    Runs the tool calls of one model turn in parallel, as the "tools" node of the graph.
+    Every call runs on a bounded thread pool, so a turn takes about as long as its
+    slowest tool instead of the sum of all of them. Identical calls in the same turn
+    (same tool and arguments) run once and share the result. Tools that must not run
+    concurrently with each other declare the resources they use exclusively; shared
+    state inside the tools (ChromaDBManager, DocumentStore, the arXiv rate limit) is
+    thread-safe on its own and needs no declaration.
+    A failing tool call becomes an error ToolMessage for the model instead of failing
+    the whole turn.
+    """
+    def __init__(self,
+                 tools: Sequence[BaseTool],
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 exclusive_resources: Optional[Mapping[str, Sequence[str]]] = None,
+                 locks: Optional[ResourceLocks] = None):
+        """
+        Args:
+            tools (Sequence[BaseTool]): The tools the model may call.
+            max_workers (int): Maximum tool calls running at once.
+            exclusive_resources: Tool name -> names of resources it holds while running.
+            locks (ResourceLocks): Lock registry (share one between executors that
+                use the same resources).
+        """
+        self.tools_by_name: Dict[str, BaseTool] = {tool.name: tool for tool in tools}
+        self.exclusive_resources = dict(exclusive_resources or {})
+        self.locks = locks or ResourceLocks()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def _run_one(self, call: dict, config: Optional[RunnableConfig]) -> ToolMessage:
+        tool = self.tools_by_name.get(call["name"])
+        if tool is None:
+            return ToolMessage(content=f"Error: {call['name']} is not a valid tool, try one of "
+                                       f"{sorted(self.tools_by_name)}.",
+                               name=call["name"], tool_call_id=call["id"], status="error")
+        start = time.perf_counter()
+        try:
+            with self.locks.hold(self.exclusive_resources.get(tool.name, ())):
+                # Invoked with the whole tool call, the tool returns a ToolMessage
+                message = tool.invoke({**call, "type": "tool_call"}, config)
+        except Exception as e:
+            logging.error(f"Tool {call['name']} failed: {e}")
+            return ToolMessage(content=f"Error: {e!r}\n Please fix your mistakes.",
+                               name=call["name"], tool_call_id=call["id"], status="error")
+        logging.info(f"Tool {call['name']} finished in {time.perf_counter() - start:.2f}s")
+        return message
+
+    @staticmethod
+    def _call_key(call: dict) -> str:
+        return json.dumps([call["name"], call["args"]], sort_keys=True, default=str)
+
+    def _unique_calls(self, tool_calls: List[dict]) -> Dict[str, dict]:
+        """The first call of each distinct (tool, arguments) pair, by key"""
+        unique = {}
+        for call in tool_calls:
+            unique.setdefault(self._call_key(call), call)
+        return unique
+
+    def _answers(self, tool_calls: List[dict], unique: Dict[str, dict], messages) -> List[ToolMessage]:
+        """One ToolMessage per call, in call order; repeated calls get a copy of the shared result"""
+        by_key = dict(zip(unique, messages))
+        answers = []
+        for call in tool_calls:
+            message = by_key[self._call_key(call)]
+            if message.tool_call_id != call["id"]:
+                message = message.model_copy(update={"tool_call_id": call["id"], "id": None})
+            answers.append(message)
+        return answers
+
+    async def arun(self, tool_calls: List[dict], config: Optional[RunnableConfig] = None) -> List[ToolMessage]:
+        """Run tool calls concurrently and return their ToolMessages in call order"""
+        loop = asyncio.get_running_loop()
+        unique = self._unique_calls(tool_calls)
+        messages = await asyncio.gather(*(
+            loop.run_in_executor(self._pool, self._run_one, call, config) for call in unique.values()
+        ))
+        return self._answers(tool_calls, unique, messages)
+
+    def run(self, tool_calls: List[dict], config: Optional[RunnableConfig] = None) -> List[ToolMessage]:
+        """Synchronous arun, for graphs invoked without an event loop"""
+        unique = self._unique_calls(tool_calls)
+        messages = list(self._pool.map(lambda call: self._run_one(call, config), unique.values()))
+        return self._answers(tool_calls, unique, messages)
+
+    async def node(self, state: dict, config: RunnableConfig) -> dict:
+        """The graph node: answer the tool calls of the last message"""
+        message = state["messages"][-1]
+        tool_calls = message.tool_calls if isinstance(message, AIMessage) else []
+        return {"messages": await self.arun(tool_calls, config)}
+
+    def close(self):
+        self._pool.shutdown(wait=False)
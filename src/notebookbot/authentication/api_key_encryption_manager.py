@@ -1,42 +1,36 @@
-from cryptography.fernet import Fernet
 import os
-import base64
-import hashlib
+from cryptography.fernet import Fernet
+from typing import Optional
 from dotenv import load_dotenv
 
+from .key_store import open_key_store
+from .session_keyring import SessionKeyring, derive_key
+
 class APIKeyEncryptionManager:
     """
     A class to securely manage API keys using encryption.
-    This class handles encrypting, storing, and retrieving API keys from a .env file.
-    The encryption key is derived from a user password and a stored salt.
+    This class handles encrypting, storing, and retrieving API keys from the key store
+    of a .env file (see KeyStore). The encryption key is derived from a user password
+    and the stored salt, once per session: the SessionKeyring caches it along with the
+    decrypted keys.
     """
-    def __init__(self, password: str, env_file_path: str):
-        self.password = password
+    def __init__(self, password: str, env_file_path: str, keyring: Optional[SessionKeyring] = None):
         self.env_file_path = env_file_path
+        self.scope = os.path.abspath(env_file_path)
+        self.keyring = keyring or SessionKeyring()
+        self.store = open_key_store(env_file_path)
         self.salt = self._get_or_generate_salt()
-        self.fernet = Fernet(self._derive_key(password, self.salt))
+        self.keyring.unlock(self.scope, password, self.salt)
         load_dotenv(self.env_file_path)
 
-    def _get_or_generate_salt(self) -> bytes:
-        """Retrieves the salt from the .env file or generates a new one if not present."""
-        try:
-            with open(self.env_file_path, 'r') as f:
-                for line in f:
-                    if line.startswith('SALT='):
-                        # Add padding back before decoding
-                        salt_b64 = line.split('=')[1].strip()
-                        padding = '=' * ((4 - len(salt_b64) % 4) % 4)
-                        salt_b64 += padding
-                        return base64.urlsafe_b64decode(salt_b64)
-        except FileNotFoundError:
-            pass
+    @property
+    def fernet(self):
+        """The session's Fernet for this key store; raises once the keyring is locked"""
+        return self.keyring.fernet(self.scope)
 
-        # Generate new salt
-        salt = os.urandom(16)
-        salt_b64 = base64.urlsafe_b64encode(salt).decode().rstrip('=')
-        with open(self.env_file_path, 'a') as f:
-            f.write(f"SALT={salt_b64}\n")
-        return salt
+    def _get_or_generate_salt(self) -> bytes:
+        """Retrieves the salt of the key store (generated when the store was created)."""
+        return self.store.salt
 
     def _derive_key(self, password: str, salt: bytes) -> bytes:
         """
@@ -47,58 +41,63 @@ class APIKeyEncryptionManager:
         Returns:
             bytes: The derived encryption key.
         """
-        key = hashlib.pbkdf2_hmac(
-            'sha256',  # The hash digest algorithm
-            password.encode(),  # Convert the password to bytes
-            salt,  # Provide the salt
-            100000  # Iterations of the hash function
-        )
-        return base64.urlsafe_b64encode(key)
+        return derive_key(password, salt)
 
     def encrypt_and_store_key(self, key_name: str, api_key: str):
         """
-        Encrypts and stores the given API key in the .env file.
+        Encrypts and stores the given API key, replacing its previous value.
         Args:
             key_name (str): The name of the API key variable (e.g., OPENAI_API_KEY).
             api_key (str): The actual API key to store.
         """
         encrypted_key = self.fernet.encrypt(api_key.encode()).decode()
-        with open(self.env_file_path, 'a') as f:
-            f.write(f"{key_name}_ENCRYPTED={encrypted_key}\n")
+        self.store.set(key_name, encrypted_key)
         print(f"API key for {key_name} encrypted and stored successfully.")
-        # Reload environment variables after writing
-        load_dotenv(self.env_file_path, override=True)
+        self.keyring.put(self.scope, key_name, api_key)
 
     def decrypt_key(self, key_name: str) -> str:
         """
         Decrypts and returns the API key for the given key name.
+        Keys decrypted earlier in the session are returned from the keyring.
         Args:
             key_name (str): The name of the API key variable (e.g., OPENAI_API_KEY).
         Returns:
             str: The decrypted API key.
         """
-        # Reload environment variables before reading
-        load_dotenv(self.env_file_path, override=True)
-        encrypted_key = os.getenv(f"{key_name}_ENCRYPTED")
+        cached = self.keyring.get(self.scope, key_name)
+        if cached is not None:
+            return cached
+        encrypted_key = self.store.get(key_name)
         if not encrypted_key:
             raise ValueError(f"Encrypted key for {key_name} not found.")
+        fernet = self.fernet
         try:
-            return self.fernet.decrypt(encrypted_key.encode()).decode()
+            api_key = fernet.decrypt(encrypted_key.encode()).decode()
         except Exception:
             print("Decryption failed. Incorrect password or corrupted data.")
             return None
+        self.keyring.put(self.scope, key_name, api_key)
+        return api_key
 
     def list_keys(self) -> set:
         """List all available encrypted API keys."""
-        keys = set()
-        try:
-            with open(self.env_file_path, 'r') as f:
-                for line in f:
-                    if '_ENCRYPTED=' in line:
-                        # Extract just the key name without the _ENCRYPTED suffix
-                        key_name = line.split('_ENCRYPTED=')[0].strip()
-                        keys.add(key_name)
-        except FileNotFoundError:
-            return set()
-        
-        return keys
+        return self.store.names()
+
+    def change_password(self, new_password: str) -> int:
+        """
+        Re-encrypt all stored keys under a new password and a fresh salt, in one atomic
+        rewrite of the key store.
+        Returns:
+            int: The number of keys re-encrypted.
+        """
+        old_fernet = self.fernet
+        new_salt = os.urandom(16)
+        new_fernet = Fernet(derive_key(new_password, new_salt))
+        count = self.store.rotate(
+            lambda value: new_fernet.encrypt(old_fernet.decrypt(value.encode())).decode(),
+            salt=new_salt,
+        )
+        self.salt = new_salt
+        self.keyring.lock(self.scope)
+        self.keyring.unlock(self.scope, new_password, new_salt)
+        return count
@@ -1,7 +1,7 @@
 import os
 import getpass
 from dotenv import load_dotenv
-from typing import Union
+from typing import Optional, Union
 
 from .api_key_encryption_manager import APIKeyEncryptionManager
 from .api_key_interface import APIKeyInterface
@@ -10,12 +10,20 @@ class AuthenticationManager:
     """
     A manager class to handle initial password setup, authentication, and interface creation.
     """
-    def __init__(self, env_file_path: str, min_length: int = 16, required_symbols: str = "!@#$%^&*()_+-="):
+    def __init__(self, env_file_path: str, min_length: int = 16, required_symbols: str = "!@#$%^&*()_+-=",
+                 password: Optional[str] = None):
+        """
+        Args:
+            password (str): Authenticate with this password instead of prompting (headless mode).
+                It is used for a single attempt and not kept afterwards.
+        """
         self.env_file_path = env_file_path
         self.min_length = min_length
         self.required_symbols = required_symbols
         self.is_authenticated = False
         self.api_interface = None
+        self.headless = password is not None
+        self._password = password
 
     def setup_or_authenticate(self):
         """
@@ -30,7 +38,19 @@ class AuthenticationManager:
         else:
             print('Authentication failed, must be longer than 16 and contain "!@#$%^&*()_+-=".')
 
+    def lock(self):
+        """Forget the session's derived key and decrypted API keys; the next read authenticates again."""
+        if self.api_interface is not None:
+            encryption_manager = self.api_interface.encryption_manager
+            encryption_manager.keyring.lock(encryption_manager.scope)
+        self.api_interface = None
+        self.is_authenticated = False
+
     def _get_password(self):
+        if self.headless:
+            # Without a TTY there is nobody to prompt; a used password fails validation
+            password, self._password = self._password or "", None
+            return password
         return getpass.getpass("Enter your password: ")
 
     def _validate_password(self, password: str) -> bool:
@@ -3,7 +3,6 @@ import sys
 import getpass
 from dataclasses import dataclass
 from typing import Optional
-import base64
 
 # Add the project root to the Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -11,6 +10,8 @@ sys.path.insert(0, project_root)
 
 from dotenv import load_dotenv
 from notebookbot.authentication.authentication_manager import AuthenticationManager
+from notebookbot.authentication.key_agent import KeyAgentClient, headless_password, key_agent_path
+from notebookbot.authentication.key_store import open_key_store
 
 
 @dataclass
@@ -19,6 +20,9 @@ class APIKeys:
     openai: str
     anthropic: str
 
+REQUIRED_KEYS = ("OPENAI_API_KEY", "ANTHROPIC_API_KEY")
+
+
 class AuthenticationSetup:
     _instance = None
     _api_keys = None  # Class variable to store API keys
@@ -34,19 +38,15 @@ class AuthenticationSetup:
         if not getattr(self, '_initialized', False):
             self.env_file_path = env_file_path
             self.auth_manager = None
-            self._setup_env_file()
+            self.key_agent = None
+            if not key_agent_path():
+                self._setup_env_file()
             self._initialized = True
         
     def _setup_env_file(self):
-        """Ensure .env file exists and has required structure."""
+        """Ensure the key store of the .env file exists and has a salt (migrating old .env entries)."""
         try:
-            with open(self.env_file_path, 'a+') as f:
-                f.seek(0)
-                content = f.read()
-                if 'SALT=' not in content:
-                    # Generate 16 bytes of random data and ensure proper base64 padding
-                    salt = base64.urlsafe_b64encode(os.urandom(16)).decode().rstrip('=')
-                    f.write(f"SALT={salt}\n")
+            open_key_store(self.env_file_path)
         except Exception as e:
             raise ValueError(f"Could not access {self.env_file_path}: {e}")
 
@@ -58,6 +58,13 @@ class AuthenticationSetup:
         if AuthenticationSetup._is_authenticated:
             return True
 
+        # Headless mode: workers get their keys from a key agent, or unlock with a supplied password
+        if key_agent_path():
+            return self._authenticate_with_agent(key_agent_path())
+        password = headless_password()
+        if password is not None:
+            return self._authenticate_headless(password)
+
         # Check if keys already exist
         if self._keys_exist():
             print("Keys already exist. Skipping password setup.")
@@ -90,6 +97,40 @@ class AuthenticationSetup:
         
         return False
 
+    def _authenticate_with_agent(self, socket_path: str) -> bool:
+        """Use the keys served by a running key agent; no password or .env access needed."""
+        self.key_agent = KeyAgentClient(socket_path)
+        try:
+            keys = self.key_agent.get_keys(REQUIRED_KEYS)
+        except (ConnectionError, PermissionError) as e:
+            print(e)
+            return False
+        missing = [name for name in REQUIRED_KEYS if not keys.get(name)]
+        if missing:
+            print(f"The key agent has no {', '.join(missing)}.")
+            return False
+        AuthenticationSetup._api_keys = APIKeys(openai=keys["OPENAI_API_KEY"], anthropic=keys["ANTHROPIC_API_KEY"])
+        AuthenticationSetup._is_authenticated = True
+        return True
+
+    def _authenticate_headless(self, password: str) -> bool:
+        """Unlock with a password supplied by the environment, in a single attempt without prompts."""
+        if not self._keys_exist():
+            print(f"No API keys stored in {self.env_file_path}. Run the interactive setup once first.")
+            return False
+        self.auth_manager = AuthenticationManager(self.env_file_path, password=password)
+        if not self._try_authenticate(self.auth_manager, max_attempts=1):
+            return False
+        AuthenticationSetup._is_authenticated = True
+        return True
+
+    def lock(self):
+        """End the authenticated session; API keys have to be unlocked with the password again."""
+        if self.auth_manager is not None:
+            self.auth_manager.lock()
+        AuthenticationSetup._api_keys = None
+        AuthenticationSetup._is_authenticated = False
+
     def _show_available_keys(self):
         """Display available API keys."""
         encryption_manager = self.auth_manager.api_interface.encryption_manager
@@ -103,6 +144,8 @@ class AuthenticationSetup:
 
     def get_api_keys(self) -> APIKeys:
         """Get decrypted API keys."""
+        if self.key_agent is not None and AuthenticationSetup._api_keys is not None:
+            return AuthenticationSetup._api_keys
         if not self.auth_manager or not self.auth_manager.is_authenticated:
             raise ValueError("Must authenticate first")
             
@@ -167,12 +210,7 @@ class AuthenticationSetup:
 
     def _keys_exist(self) -> bool:
         """Check if API keys are already stored."""
-        try:
-            with open(self.env_file_path, 'r') as f:
-                content = f.read()
-                return 'OPENAI_API_KEY_ENCRYPTED=' in content and 'ANTHROPIC_API_KEY_ENCRYPTED=' in content
-        except FileNotFoundError:
-            return False
+        return set(REQUIRED_KEYS) <= open_key_store(self.env_file_path).names()
 
     def _try_authenticate(self, auth_manager, max_attempts=3):
         """Try to authenticate with multiple attempts."""
@@ -3,7 +3,7 @@ from .api_key_encryption_manager import APIKeyEncryptionManager
 class DecryptedAPIKey:
     """
     A class representing a decrypted API key, with lazy evaluation.
-    Decrypts the key only when called.
+    Decrypts the key only when called; later calls are served from the session keyring.
     """
     def __init__(self, key_name: str, encryption_manager: APIKeyEncryptionManager):
         self.key_name = key_name
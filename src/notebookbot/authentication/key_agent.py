@@ -0,0 +1,202 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+# Headless mode: the password is read from a file descriptor or an environment variable,
+# or decrypted keys are fetched from a running key agent and no password is needed at all
+PASSWORD_ENV = "NOTEBOOKBOT_PASSWORD"
+PASSWORD_FD_ENV = "NOTEBOOKBOT_PASSWORD_FD"
+KEY_AGENT_ENV = "NOTEBOOKBOT_KEY_AGENT"
+
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+def read_password_from_fd(fd: int) -> str:
+    """Read the password from the first line of a file descriptor (e.g. a pipe), then close it"""
+    with os.fdopen(fd, 'r', encoding='utf-8', closefd=True) as f:
+        return f.readline().rstrip("\r\n")
+
+
+def headless_password() -> Optional[str]:
+    """
+    The password supplied for non-interactive use, or None if there is none.
+    NOTEBOOKBOT_PASSWORD_FD names a file descriptor to read it from (which keeps it out
+    of the environment of child processes); NOTEBOOKBOT_PASSWORD holds it directly.
+    A descriptor can only be read once, so call this once per process.
+    """
+    fd = os.environ.pop(PASSWORD_FD_ENV, None)
+    if fd:
+        return read_password_from_fd(int(fd))
+    return os.environ.get(PASSWORD_ENV) or None
+
+
+def key_agent_path() -> Optional[str]:
+    """The socket of the key agent to use, if NOTEBOOKBOT_KEY_AGENT is set"""
+    return os.environ.get(KEY_AGENT_ENV) or None
+
+
+def default_socket_path() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"notebookbot-{os.getuid()}")
+    return os.path.join(runtime_dir, "notebookbot-agent.sock")
+
+
+def _peer_uid(conn: socket.socket) -> Optional[int]:
+    """uid of the process on the other end of a unix socket (Linux only)"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]
+
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        agent = self.server.agent
+        uid = _peer_uid(self.connection)
+        for line in iter(lambda: self.rfile.readline(MAX_REQUEST_BYTES), b""):
+            if uid is not None and uid != os.getuid():
+                response = {"error": "Permission denied"}
+            else:
+                try:
+                    response = {"keys": agent.lookup(json.loads(line)["keys"])}
+                except (ValueError, KeyError, TypeError) as e:
+                    response = {"error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+class _AgentServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class KeyAgent:
+    """
+    Serves decrypted API keys to local worker processes over a unix socket.
+    One process authenticates (and pays for the PBKDF2 derivation) once; workers started
+    with NOTEBOOKBOT_KEY_AGENT pointing at the socket fetch their keys from it instead of
+    prompting. The socket is only accessible to the owner, and connections from other
+    users are refused where the peer can be identified.
+    Requests and responses are JSON lines: {"keys": [names]} -> {"keys": {name: key}}.
+    """
+    def __init__(self, socket_path: str, get_key: Callable[[str], Optional[str]], allowed_keys: Optional[Iterable[str]] = None):
+        """
+        Args:
+            socket_path (str): Path of the unix socket to listen on.
+            get_key: Returns the decrypted key of a name, e.g. APIKeyEncryptionManager.decrypt_key.
+            allowed_keys: Names that may be requested (default: any name get_key knows).
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("The key agent requires unix domain sockets.")
+        self.socket_path = socket_path
+        self.get_key = get_key
+        self.allowed_keys = set(allowed_keys) if allowed_keys is not None else None
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), mode=0o700, exist_ok=True)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _AgentServer(socket_path, _AgentHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.agent = self
+        self._thread = None
+
+    def lookup(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        keys = {}
+        for name in names:
+            if self.allowed_keys is not None and name not in self.allowed_keys:
+                keys[name] = None
+                continue
+            try:
+                keys[name] = self.get_key(name)
+            except ValueError:
+                keys[name] = None
+        return keys
+
+    def start(self) -> "KeyAgent":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="key-agent", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def close(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+class KeyAgentClient:
+    """Fetches decrypted API keys from a KeyAgent."""
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def get_keys(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Fetch several keys in one round trip.
+        Returns:
+            dict: The decrypted key of each name, or None if the agent does not have it.
+        """
+        request = (json.dumps({"keys": list(names)}) + "\n").encode("utf-8")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(self.timeout)
+            try:
+                conn.connect(self.socket_path)
+            except OSError as e:
+                raise ConnectionError(f"Could not reach the key agent at {self.socket_path}: {e}")
+            conn.sendall(request)
+            with conn.makefile('rb') as f:
+                line = f.readline()
+        if not line:
+            raise ConnectionError("The key agent closed the connection.")
+        response = json.loads(line)
+        if "error" in response:
+            raise PermissionError(f"Key agent refused the request: {response['error']}")
+        return response["keys"]
+
+    def get_key(self, name: str) -> Optional[str]:
+        return self.get_keys([name])[name]
+
+
+def main(argv=None) -> int:
+    """Authenticate once (interactively or headless) and serve the API keys to worker processes."""
+    from notebookbot.authentication.authentication_setup import AuthenticationSetup
+
+    parser = argparse.ArgumentParser(description="Serve decrypted notebookbot API keys to local workers.")
+    parser.add_argument("--socket", default=default_socket_path(), help="Path of the unix socket")
+    parser.add_argument("--env-file", default=".env", help="The encrypted key store")
+    args = parser.parse_args(argv)
+
+    setup = AuthenticationSetup(args.env_file)
+    if not setup.authenticate():
+        return 1
+    encryption_manager = setup.auth_manager.api_interface.encryption_manager
+    agent = KeyAgent(args.socket, encryption_manager.decrypt_key, allowed_keys=encryption_manager.list_keys())
+    logging.info(f"Key agent listening on {args.socket}")
+    print(f"Key agent listening on {args.socket}; start workers with {KEY_AGENT_ENV}={args.socket}")
+    try:
+        agent.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
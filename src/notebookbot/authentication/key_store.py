@@ -0,0 +1,165 @@
+import base64
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from dotenv import dotenv_values
+
+from notebookbot.data_help.atomic_writer import fsync_directory, write_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+KEY_STORE_VERSION = 1
+ENCRYPTED_SUFFIX = "_ENCRYPTED"
+
+
+def key_store_path(env_file_path: str) -> str:
+    """The key store that belongs to an env file, e.g. .env -> .env.keys.json"""
+    return f"{env_file_path}.keys.json"
+
+
+def _encode_salt(salt: bytes) -> str:
+    return base64.urlsafe_b64encode(salt).decode().rstrip('=')
+
+
+def _decode_salt(salt_b64: str) -> bytes:
+    # Add padding back before decoding
+    return base64.urlsafe_b64decode(salt_b64 + '=' * ((4 - len(salt_b64) % 4) % 4))
+
+
+class KeyStore:
+    """
+    A JSON vault of encrypted API keys: {"version", "salt", "keys": {name: {"value", "updated_at"}}}.
+    The file is parsed once into an in-memory index and only read again when another
+    writer has replaced it (its inode, size or mtime changed). Every key has exactly one
+    entry, so updating a key replaces it instead of appending another line.
+    Writers hold an exclusive flock on "<path>.lock", re-read the latest version, and
+    replace the file atomically, so concurrent processes never lose each other's updates
+    and readers never see a partial file.
+    A store created next to an old .env file imports its SALT and *_ENCRYPTED values.
+    """
+    def __init__(self, path: str, legacy_env_path: Optional[str] = None):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.legacy_env_path = legacy_env_path
+        self._lock = threading.RLock()
+        self._data = {"version": KEY_STORE_VERSION, "salt": None, "keys": {}}
+        self._stat = None
+        if not self.path.exists():
+            with self._write() as data:
+                if data["salt"] is None:
+                    self._migrate(data)
+        self.refresh()
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def refresh(self):
+        """Re-read the store if another writer has replaced it since it was last read"""
+        with self._lock:
+            stat = self._file_stat()
+            if stat is not None and stat != self._stat:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+                self._stat = stat
+
+    @contextmanager
+    def _write(self):
+        """Yield the latest data under the inter-process lock and atomically write it back"""
+        with self._lock:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    self._stat = None
+                    self.refresh()
+                    data = json.loads(json.dumps(self._data))
+                    yield data
+                    # Owner-only, like the .env file python-dotenv creates
+                    write_atomic(self.path, json.dumps(data, indent=2, sort_keys=True).encode("utf-8"), mode=0o600)
+                    fsync_directory(self.path.parent)
+                    self._data = data
+                    self._stat = self._file_stat()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _migrate(self, data: dict):
+        """Import the salt and latest encrypted keys of the legacy .env file, or create a salt"""
+        values = {}
+        if self.legacy_env_path and os.path.exists(self.legacy_env_path):
+            values = dotenv_values(self.legacy_env_path)
+        data["salt"] = values.get("SALT") or _encode_salt(os.urandom(16))
+        now = time.time()
+        for name, value in values.items():
+            # dotenv keeps the last of repeated entries, i.e. the latest rotation
+            if name.endswith(ENCRYPTED_SUFFIX) and value:
+                data["keys"][name[:-len(ENCRYPTED_SUFFIX)]] = {"value": value, "updated_at": now}
+
+    @property
+    def salt(self) -> bytes:
+        self.refresh()
+        return _decode_salt(self._data["salt"])
+
+    def get(self, key_name: str) -> Optional[str]:
+        """The encrypted value of a key, or None if it is not stored"""
+        self.refresh()
+        entry = self._data["keys"].get(key_name)
+        return entry["value"] if entry else None
+
+    def names(self) -> set:
+        self.refresh()
+        return set(self._data["keys"])
+
+    def set(self, key_name: str, encrypted_value: str):
+        """Add a key or replace its value in place"""
+        with self._write() as data:
+            data["keys"][key_name] = {"value": encrypted_value, "updated_at": time.time()}
+
+    def delete(self, key_name: str) -> bool:
+        with self._write() as data:
+            return data["keys"].pop(key_name, None) is not None
+
+    def rotate(self, reencrypt: Callable[[str], str], salt: Optional[bytes] = None) -> int:
+        """
+        Re-encrypt every key (e.g. under a new password) and optionally change the salt,
+        as one atomic replacement of the store.
+        Args:
+            reencrypt: Maps an old encrypted value to the new one.
+            salt (bytes): The new salt, if the key derivation changes.
+        Returns:
+            int: The number of keys re-encrypted.
+        """
+        with self._write() as data:
+            now = time.time()
+            for entry in data["keys"].values():
+                entry.update(value=reencrypt(entry["value"]), updated_at=now)
+            if salt is not None:
+                data["salt"] = _encode_salt(salt)
+            return len(data["keys"])
+
+
+_stores: Dict[str, KeyStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_key_store(env_file_path: str) -> KeyStore:
+    """The process-wide KeyStore of an env file, created (or migrated from it) on first use"""
+    path = os.path.abspath(key_store_path(env_file_path))
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = KeyStore(path, legacy_env_path=env_file_path)
+        return store
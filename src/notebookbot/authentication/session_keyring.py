@@ -0,0 +1,143 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from cryptography.fernet import Fernet
+
+PBKDF2_ITERATIONS = 100000
+# Decrypted API keys are kept in memory for this long (seconds); None keeps them until lock()
+DEFAULT_SESSION_TTL = 900.0
+
+
+def derive_key(password: str, salt: bytes) -> bytes:
+    """
+    Derives an encryption key from the user's password and salt using PBKDF2.
+    Args:
+        password (str): The user's password.
+        salt (bytes): The salt value for key derivation.
+    Returns:
+        bytes: The derived encryption key.
+    """
+    key = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS)
+    return base64.urlsafe_b64encode(key)
+
+
+class SessionKeyring:
+    """
+    Process-wide cache of unlocked key stores for the current session.
+    The PBKDF2 key of a store is derived once per password and reused by every
+    APIKeyEncryptionManager opened on it afterwards; the password itself is not kept,
+    only a keyed fingerprint to recognize it. Decrypted API keys are held in memory
+    for `ttl` seconds, so repeated reads neither touch the disk nor decrypt again.
+    lock() forgets everything; managers then have to be re-created with the password.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, ttl: Optional[float] = DEFAULT_SESSION_TTL, clock=time.monotonic):
+        if not getattr(self, '_initialized', False):
+            self.ttl = ttl
+            self._clock = clock
+            self._lock = threading.Lock()
+            self._secret = os.urandom(32)
+            # scope -> (password fingerprint, salt, Fernet)
+            self._unlocked: Dict[str, Tuple[bytes, bytes, Fernet]] = {}
+            # (scope, key name) -> (decrypted key, expiry)
+            self._values: Dict[Tuple[str, str], Tuple[str, Optional[float]]] = {}
+            self._initialized = True
+        elif ttl != DEFAULT_SESSION_TTL:
+            self.ttl = ttl
+
+    def _fingerprint(self, password: str, salt: bytes) -> bytes:
+        return hmac.new(self._secret, salt + password.encode(), hashlib.sha256).digest()
+
+    def unlock(self, scope: str, password: str, salt: bytes) -> Fernet:
+        """
+        Return the Fernet of a key store, deriving its key only if this password and salt
+        have not been unlocked yet in this session.
+        Args:
+            scope (str): Identifies the key store, e.g. the path of its file.
+            password (str): The user's password.
+            salt (bytes): The salt of the key store.
+        """
+        fingerprint = self._fingerprint(password, salt)
+        with self._lock:
+            cached = self._unlocked.get(scope)
+            if cached is not None and cached[1] == salt and hmac.compare_digest(cached[0], fingerprint):
+                return cached[2]
+        # Derive outside the lock so other scopes are not blocked for the duration
+        fernet = Fernet(derive_key(password, salt))
+        with self._lock:
+            if scope in self._unlocked:
+                # A different password or salt: values decrypted under the old one are stale
+                self._forget_values(scope)
+            self._unlocked[scope] = (fingerprint, salt, fernet)
+        return fernet
+
+    def fernet(self, scope: str) -> Fernet:
+        """The Fernet of an unlocked key store; raises if the session has been locked"""
+        with self._lock:
+            cached = self._unlocked.get(scope)
+        if cached is None:
+            raise PermissionError(f"Key store {scope} is locked. Please authenticate again.")
+        return cached[2]
+
+    def is_unlocked(self, scope: str) -> bool:
+        with self._lock:
+            return scope in self._unlocked
+
+    def get(self, scope: str, key_name: str) -> Optional[str]:
+        """A cached decrypted key, or None if it was never cached or has expired"""
+        with self._lock:
+            cached = self._values.get((scope, key_name))
+            if cached is None:
+                return None
+            value, expires = cached
+            if expires is not None and self._clock() >= expires:
+                del self._values[(scope, key_name)]
+                return None
+            return value
+
+    def put(self, scope: str, key_name: str, value: str):
+        """Cache a decrypted key for the session TTL"""
+        with self._lock:
+            if scope not in self._unlocked:
+                return
+            expires = None if self.ttl is None else self._clock() + self.ttl
+            self._values[(scope, key_name)] = (value, expires)
+
+    def _forget_values(self, scope: str):
+        for entry in [entry for entry in self._values if entry[0] == scope]:
+            del self._values[entry]
+
+    def clear(self, scope: Optional[str] = None, key_name: Optional[str] = None):
+        """
+        Drop cached decrypted keys (all, of one store, or a single key); the stores stay
+        unlocked, so the keys are decrypted again on their next read.
+        """
+        with self._lock:
+            if scope is None:
+                self._values.clear()
+            elif key_name is None:
+                self._forget_values(scope)
+            else:
+                self._values.pop((scope, key_name), None)
+
+    def lock(self, scope: Optional[str] = None):
+        """Forget the derived keys and decrypted values (of all stores, or of one)"""
+        with self._lock:
+            if scope is None:
+                self._unlocked.clear()
+                self._values.clear()
+            else:
+                self._unlocked.pop(scope, None)
+                self._forget_values(scope)
@@ -0,0 +1,195 @@
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.metadata_filters import normalize_metadata
+
+# OpenAI accepts up to 2048 inputs and ~300k tokens per embeddings request;
+# the defaults stay well below both so a single batch never gets rejected.
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_BATCH_TOKENS = 100_000
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 5
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for budgeting (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class IngestionStats:
+    """Counters collected while ingesting documents into a collection."""
+    documents: int = 0
+    new_documents: int = 0
+    tokens: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.documents / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def tokens_per_sec(self) -> float:
+        return self.tokens / self.seconds if self.seconds > 0 else 0.0
+
+
+def batch_documents(documents: Iterable[Document],
+                    batch_size: int = DEFAULT_BATCH_SIZE,
+                    max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS) -> Iterator[List[Document]]:
+    """
+    Group documents into batches bounded by document count and estimated tokens.
+    A single document larger than max_batch_tokens is emitted as its own batch.
+    Args:
+        documents (Iterable[Document]): Documents to group, consumed lazily.
+        batch_size (int): Maximum number of documents per batch.
+        max_batch_tokens (int): Maximum estimated tokens per batch.
+    Yields:
+        List[Document]: The next batch of documents.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    batch = []
+    batch_tokens = 0
+    for doc in documents:
+        tokens = estimate_tokens(doc.page_content)
+        if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_batch_tokens):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(doc)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True if the error is an HTTP 429 / rate-limit error from the embedding backend."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code == 429 or "RateLimit" in type(error).__name__
+
+
+def embed_with_backoff(embedding_function: Callable[[List[str]], list],
+                       texts: List[str],
+                       max_retries: int = DEFAULT_MAX_RETRIES,
+                       initial_delay: float = 1.0,
+                       max_delay: float = 60.0,
+                       sleep: Callable[[float], None] = time.sleep) -> Tuple[list, int]:
+    """
+    Embed texts, retrying with exponential backoff and jitter on rate-limit errors.
+    Args:
+        embedding_function: Callable mapping a list of texts to a list of embeddings.
+        texts (List[str]): The texts to embed in a single request.
+        max_retries (int): Retries allowed after the first attempt.
+        initial_delay (float): Delay in seconds before the first retry.
+        max_delay (float): Upper bound for a single delay.
+        sleep: Sleep function, injectable for tests.
+    Returns:
+        Tuple[list, int]: The embeddings and the number of retries used.
+    """
+    retries = 0
+    delay = initial_delay
+    while True:
+        try:
+            return embedding_function(texts), retries
+        except Exception as e:
+            if not is_rate_limit_error(e) or retries >= max_retries:
+                raise
+            retries += 1
+            wait_for = min(delay, max_delay) * (1 + random.random() * 0.25)
+            logging.warning(f"Rate limited while embedding {len(texts)} texts, retry {retries}/{max_retries} in {wait_for:.1f}s")
+            sleep(wait_for)
+            delay *= 2
+
+
+def ingest_documents(collection,
+                     embedding_function: Callable[[List[str]], list],
+                     documents: Iterable[Document],
+                     batch_size: int = DEFAULT_BATCH_SIZE,
+                     max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+                     max_workers: int = DEFAULT_MAX_WORKERS,
+                     upsert: bool = False,
+                     max_retries: int = DEFAULT_MAX_RETRIES,
+                     on_batch_written: Optional[Callable[[List[str], List[str], List[dict]], None]] = None) -> IngestionStats:
+    """
+    Embed documents in concurrent batches and write each batch with a single collection call.
+    Embedding requests run on a bounded worker pool; writes happen on the calling thread
+    as batches complete, so at most max_workers batches are held in memory at once.
+    Before each write the batch ids are looked up so new_documents counts the ids
+    that did not exist yet, and metadata is normalized for filtering (see normalize_metadata).
+    Args:
+        collection: The Chroma collection to write to.
+        embedding_function: Callable mapping a list of texts to a list of embeddings.
+        documents (Iterable[Document]): Documents to ingest, consumed lazily.
+        batch_size (int): Maximum number of documents per batch.
+        max_batch_tokens (int): Maximum estimated tokens per batch.
+        max_workers (int): Number of concurrent embedding requests.
+        upsert (bool): Use collection.upsert instead of collection.add.
+        max_retries (int): Rate-limit retries allowed per batch.
+        on_batch_written: Called with (ids, texts, metadatas) after each batch is written.
+    Returns:
+        IngestionStats: Counts and throughput of the ingestion run.
+    """
+    stats = IngestionStats()
+    write = collection.upsert if upsert else collection.add
+    start = time.perf_counter()
+
+    def embed(texts):
+        return embed_with_backoff(embedding_function, texts, max_retries=max_retries)
+
+    def write_batch(batch, ids, texts, embeddings):
+        existing = collection.get(ids=ids, include=[])["ids"]
+        metadatas = [normalize_metadata(doc.metadata) for doc in batch]
+        write(
+            ids=ids,
+            documents=texts,
+            metadatas=metadatas,
+            embeddings=embeddings
+        )
+        if on_batch_written is not None:
+            on_batch_written(ids, texts, metadatas)
+        stats.documents += len(batch)
+        stats.new_documents += len(set(ids)) - len(existing)
+        stats.tokens += sum(estimate_tokens(text) for text in texts)
+        stats.batches += 1
+        logging.info(f"Wrote batch of {len(batch)} documents, {stats.documents} total")
+
+    offset = 0
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for batch in batch_documents(documents, batch_size, max_batch_tokens):
+                ids = [doc.metadata.get("id", f"doc_{offset + i}") for i, doc in enumerate(batch)]
+                texts = [doc.page_content for doc in batch]
+                offset += len(batch)
+                pending[executor.submit(embed, texts)] = (batch, ids, texts)
+                while len(pending) >= max_workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        embeddings, retries = future.result()
+                        stats.retries += retries
+                        write_batch(*pending.pop(future), embeddings)
+            for future in list(pending):
+                embeddings, retries = future.result()
+                stats.retries += retries
+                write_batch(*pending.pop(future), embeddings)
+        except Exception:
+            for future in pending:
+                future.cancel()
+            raise
+
+    stats.seconds = time.perf_counter() - start
+    logging.info(
+        f"Ingested {stats.documents} documents ({stats.tokens} tokens) in {stats.batches} batches "
+        f"in {stats.seconds:.2f}s: {stats.docs_per_sec:.1f} docs/sec, {stats.tokens_per_sec:.1f} tokens/sec"
+    )
+    return stats
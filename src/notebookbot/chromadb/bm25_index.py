@@ -0,0 +1,121 @@
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Collection, Iterable, List, Optional, Tuple
+
+# Keeps arXiv ids (2101.00001v2), model names (ada-002) and plain words intact
+_TOKEN = re.compile(r"\w+(?:[.\-]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into index terms"""
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    A persistent BM25 inverted index stored in SQLite.
+    Used for exact-term (lexical) retrieval alongside the vector collection:
+    arXiv ids, author names and equation names that embeddings tend to blur.
+    """
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (doc_id TEXT PRIMARY KEY, length INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL, doc_id TEXT NOT NULL, tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc_id ON postings (doc_id);
+        """)
+        self._reload_stats()
+
+    def _reload_stats(self):
+        self._n_docs, self._total_length = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs"
+        ).fetchone()
+
+    def __len__(self) -> int:
+        return self._n_docs
+
+    def _delete(self, doc_ids: List[str]):
+        for doc_id in doc_ids:
+            row = self._conn.execute("SELECT length FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row is not None:
+                self._n_docs -= 1
+                self._total_length -= row[0]
+                self._conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+                self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+
+    def upsert(self, documents: Iterable[Tuple[str, str]]):
+        """Index (doc_id, text) pairs in one transaction, replacing existing entries"""
+        documents = list(dict(documents).items())
+        with self._lock:
+            try:
+                with self._conn:
+                    self._delete([doc_id for doc_id, _ in documents])
+                    for doc_id, text in documents:
+                        terms = Counter(tokenize(text))
+                        length = sum(terms.values())
+                        self._conn.execute("INSERT INTO docs VALUES (?, ?)", (doc_id, length))
+                        self._conn.executemany(
+                            "INSERT INTO postings VALUES (?, ?, ?)",
+                            ((term, doc_id, tf) for term, tf in terms.items())
+                        )
+                        self._n_docs += 1
+                        self._total_length += length
+            except Exception:
+                self._reload_stats()
+                raise
+
+    def delete(self, doc_ids: List[str]):
+        with self._lock, self._conn:
+            self._delete(doc_ids)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM docs")
+            self._conn.execute("DELETE FROM postings")
+            self._n_docs = 0
+            self._total_length = 0
+
+    def search(self, query: str, n_results: int = 5,
+               doc_ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank indexed documents against the query with BM25.
+        Args:
+            query (str): The query text.
+            n_results (int): Maximum number of hits.
+            doc_ids: Only rank these documents (e.g. the ids matching a metadata filter).
+        Returns:
+            List[Tuple[str, float]]: (doc_id, score) pairs, best first.
+        """
+        terms = set(tokenize(query))
+        scores = Counter()
+        with self._lock:
+            if not terms or not self._n_docs:
+                return []
+            avg_length = self._total_length / self._n_docs
+            for term in terms:
+                postings = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d USING (doc_id) WHERE p.term = ?",
+                    (term,)
+                ).fetchall()
+                if not postings:
+                    continue
+                idf = math.log(1 + (self._n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf, length in postings:
+                    if doc_ids is not None and doc_id not in doc_ids:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
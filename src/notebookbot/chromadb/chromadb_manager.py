@@ -1,24 +1,124 @@
 import chromadb
-from chromadb.utils import embedding_functions
-from typing import List, Optional
+import functools
+import threading
+from typing import Iterable, List, Optional, Sequence
 from langchain.docstore.document import Document
 import os
 from pathlib import Path
+from notebookbot.agent.resource_locks import ReadWriteLock
 from notebookbot.authentication.authentication_setup import AuthenticationSetup
+from notebookbot.data_help.document_store import DocumentStore
+from notebookbot.data_help.mapped_corpus import MappedDocument, iter_mapped_documents
+from notebookbot.data_help.load_documents import (
+    DEFAULT_MAX_WORKERS as DEFAULT_READ_WORKERS,
+    DEFAULT_PATTERNS,
+    iter_documents,
+)
+from notebookbot.chromadb.batch_ingestion import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_BATCH_TOKENS,
+    DEFAULT_MAX_WORKERS,
+    IngestionStats,
+    ingest_documents,
+)
+from notebookbot.chromadb.bm25_index import BM25Index
+from notebookbot.chromadb.document_chunker import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_TOKENS,
+    chunk_documents,
+    collapse_chunk_results,
+)
+from notebookbot.chromadb.embedding_cache import CachedEmbeddingFunction, EmbeddingCache
+from notebookbot.chromadb.openai_embedding import OpenAIEmbeddingFunction
+from notebookbot.chromadb.query_cache import TTLCache, normalize_query
+from notebookbot.chromadb.result_fusion import (
+    dedupe_across_queries,
+    empty_result,
+    reciprocal_rank_fusion,
+    split_query_results,
+)
+from notebookbot.chromadb.sync_manifest import SyncManifest, SyncStats, content_hash
+import json
 import logging
+import time
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+# Chunks fetched per requested result when collapsing chunk hits to parents
+CHUNK_OVERFETCH = 3
+# Leading characters (after normalising) compared to spot the same text stored twice
+DUPLICATE_PREFIX_CHARS = 500
+
+def _document_hash(doc) -> str:
+    """Content hash of a Document, or of a MappedDocument without decoding it"""
+    return doc.content_hash() if isinstance(doc, MappedDocument) else content_hash(doc.page_content)
+
+def _iter_chunks(documents, chunk_size: int, chunk_overlap: int) -> Iterable[Document]:
+    """Chunk Documents and MappedDocuments (which decode one chunk at a time)"""
+    for doc in documents:
+        if isinstance(doc, MappedDocument):
+            yield from doc.iter_chunks(chunk_size, chunk_overlap)
+        else:
+            yield from chunk_documents([doc], chunk_size, chunk_overlap)
+
+def _duplicate_keys(metadata: dict, first_chunk: str, fingerprint: tuple) -> List[tuple]:
+    """
+    Keys under which a stored document is recognised as a copy of another: its arXiv
+    entry id, its title and date, and the start of its text. These also match a legacy
+    copy stored as one text cut to 4000 characters against a chunked full text.
+    """
+    keys = []
+    if metadata.get("entry_id"):
+        keys.append(("entry_id", str(metadata["entry_id"])))
+    if metadata.get("Title") and metadata.get("Published"):
+        keys.append(("title", " ".join(str(metadata["Title"]).lower().split()), str(metadata["Published"])[:10]))
+    prefix = " ".join(first_chunk.lower().split())[:DUPLICATE_PREFIX_CHARS]
+    # Short texts are only duplicates if they are equal chunk for chunk
+    keys.append(("text", prefix) if len(prefix) == DUPLICATE_PREFIX_CHARS else ("chunks", fingerprint))
+    return keys
+
+def _serialized_write(method):
+    """
+    Run a method that modifies the collection, manifest or lexical index under the
+    manager's write lock, so concurrent tool calls never interleave their writes.
+    Queries do not take this lock and keep running during long ingestions.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class ChromaDBManager:
     _instance = None
     _api_keys = None
     _auth = None
+    # Guards creation of the singleton, which may be first used by parallel tool calls
+    _init_lock = threading.RLock()
 
     def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+        with cls._init_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self,
+                 db_path="./chroma_db",
+                 reset_db: bool = False,
+                 embedding_cache_size: int = 100_000,
+                 query_cache_size: int = 256,
+                 query_cache_ttl: float = 300.0,
+                 cache_query_embeddings: bool = True,
+                 count_refresh_interval: Optional[float] = None,
+                 embedding_function=None):
+        with ChromaDBManager._init_lock:
+            self._initialize(db_path, reset_db, embedding_cache_size, query_cache_size,
+                             query_cache_ttl, cache_query_embeddings, count_refresh_interval,
+                             embedding_function)
 
-    def __init__(self, db_path="./chroma_db", reset_db: bool = False):
+    def _initialize(self, db_path, reset_db, embedding_cache_size, query_cache_size,
+                    query_cache_ttl, cache_query_embeddings, count_refresh_interval,
+                    embedding_function=None):
         # Setup logging
         log_dir = Path(db_path)
         log_dir.mkdir(exist_ok=True)
@@ -42,8 +142,9 @@ class ChromaDBManager:
                 import shutil
                 shutil.rmtree(db_path)
                 logging.info(f"Deleted existing database at {db_path}")
-        if not getattr(self, '_initialized', False):
-            # Initialize auth only if not already initialized
+        if not getattr(self, '_initialized', False) and embedding_function is None:
+            # Initialize auth only if not already initialized; a given embedding
+            # function (e.g. an offline one for benchmarks) needs no API keys
             if ChromaDBManager._auth is None:
                 ChromaDBManager._auth = AuthenticationSetup()
                 if not ChromaDBManager._auth.authenticate():
@@ -55,110 +156,510 @@ class ChromaDBManager:
                     ChromaDBManager._api_keys = ChromaDBManager._auth.get_api_keys()
                 except ValueError:
                     raise ValueError("Failed to get API keys. Please ensure you're authenticated.")
-            
+
+        if not getattr(self, '_initialized', False):
+            self.db_path = db_path
             self.client = chromadb.PersistentClient(path=db_path)
+            self.manifest = SyncManifest(os.path.join(db_path, "sync_manifest.json"))
+            self.bm25_index = BM25Index(os.path.join(db_path, "bm25_index.sqlite3"))
             
-            # Use OpenAI embeddings with the decrypted key
-            openai_ef = embedding_functions.OpenAIEmbeddingFunction(
-                api_key=ChromaDBManager._api_keys.openai,
-                model_name="text-embedding-ada-002"
+            # By default OpenAI embeddings with the decrypted key over the shared connection pool,
+            # behind a persistent cache so identical text is never sent to the API twice
+            if embedding_function is None:
+                embedding_function = OpenAIEmbeddingFunction(
+                    api_key=ChromaDBManager._api_keys.openai,
+                    model_name=EMBEDDING_MODEL
+                )
+                embedding_model = EMBEDDING_MODEL
+            else:
+                embedding_model = type(embedding_function).__name__
+            # One cache per model, vectors of different models must not mix
+            self.embedding_cache = EmbeddingCache(
+                os.path.join(db_path, "embedding_cache", embedding_model),
+                max_entries=embedding_cache_size
             )
+            self.embedding_function = CachedEmbeddingFunction(embedding_function, self.embedding_cache)
+
+            # Query results are cached per collection version, which every write bumps;
+            # query embeddings do not depend on the collection and are cached separately
+            self._collection_version = 0
+            self.query_cache = TTLCache(query_cache_size, query_cache_ttl)
+            self.query_embedding_cache = TTLCache(query_cache_size, query_cache_ttl) if cache_query_embeddings else None
             
             self.collection = self.client.get_or_create_collection(
                 name="user_collection",
-                embedding_function=openai_ef,
+                embedding_function=self.embedding_function,
                 metadata={"description": "User collection of documents"}
             )
+
+            # The document count is tracked through add/delete/reset so queries don't
+            # need a count() round trip; None means unknown and triggers a refresh
+            self._doc_count = None
+            self._count_refreshed_at = 0.0
+            self.count_refresh_interval = count_refresh_interval
+
+            # Writes are serialized; replacing the collection also waits for running queries
+            self._write_lock = threading.RLock()
+            self._collection_lock = ReadWriteLock()
             self._initialized = True
 
+    def document_count(self, refresh: bool = False) -> int:
+        """
+        Return the number of documents (chunks) in the collection.
+        The tracked count is re-read from storage only when unknown, when refresh=True,
+        or when count_refresh_interval seconds have passed (to pick up writes made by
+        other processes).
+        """
+        stale = (self.count_refresh_interval is not None and
+                 time.monotonic() - self._count_refreshed_at > self.count_refresh_interval)
+        if refresh or stale or self._doc_count is None:
+            self._doc_count = self.collection.count()
+            self._count_refreshed_at = time.monotonic()
+            logging.info(f"Total documents in collection: {self._doc_count}")
+        return self._doc_count
+
+    @_serialized_write
     def reset_collection(self):
         """Clear all documents from the collection"""
+        with self._collection_lock.write():
+            self._reset_collection()
+
+    def _reset_collection(self):
         try:
             self.client.delete_collection("user_collection")
             logging.info("Deleted existing collection")
             
-            # Recreate the collection
-            openai_ef = embedding_functions.OpenAIEmbeddingFunction(
-                api_key=ChromaDBManager._api_keys.openai,
-                model_name="text-embedding-ada-002"
-            )
-            
+            # Recreate the collection, reusing the cached embedding function
             self.collection = self.client.create_collection(
                 name="user_collection",
-                embedding_function=openai_ef,
+                embedding_function=self.embedding_function,
                 metadata={"description": "User collection of documents"}
             )
+            self._doc_count = 0
+            self.bm25_index.clear()
+            self.manifest.clear()
+            self.manifest.save()
             logging.info("Created new empty collection")
         except Exception as e:
+            self._doc_count = None
             logging.error(f"Error resetting collection: {e}")
+        finally:
+            self._invalidate_queries()
+
+    def _invalidate_queries(self):
+        """Bump the collection version so cached query results are no longer used"""
+        self._collection_version += 1
+        self.query_cache.clear()
+
     def load_txt_documents(self, txt_dir: str = "data/txt") -> List[Document]:
         """Load all .txt files from the specified directory"""
-        documents = []
-        txt_path = Path(txt_dir)
-        
-        if not txt_path.exists():
-            raise ValueError(f"Directory not found: {txt_dir}")
-        
-        # Print all txt files found
-        txt_files = list(txt_path.glob("*.txt"))
-        logging.info(f"Found {len(txt_files)} .txt files in {txt_dir}")
-        
-        for txt_file in txt_files:
-            try:
-                with open(txt_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    doc = Document(
-                        page_content=content,
-                        metadata={
-                            "source": str(txt_file),
-                            "filename": txt_file.name,
-                            "id": f"txt_{txt_file.stem}"
-                        }
-                    )
-                    documents.append(doc)
-                    logging.info(f"Successfully loaded: {txt_file.name}")
-            except Exception as e:
-                logging.error(f"Error loading {txt_file}: {e}")
-        
+        documents = list(iter_documents(txt_dir, patterns=("*.txt",)))
         logging.info(f"Loaded {len(documents)} documents from {txt_dir}")
         return documents
 
-    def add_documents(self, documents: List[Document]):
-        """Add new documents to ChromaDB"""
-        logging.info(f"Attempting to add {len(documents)} documents to ChromaDB")
-        for i, doc in enumerate(documents):
-            self.collection.add(
-                documents=[doc.page_content],
-                metadatas=[doc.metadata],
-                ids=[doc.metadata.get("id", f"doc_{i}")]
+    @_serialized_write
+    def add_documents(self,
+                      documents: Iterable[Document],
+                      batch_size: int = DEFAULT_BATCH_SIZE,
+                      max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+                      max_workers: int = DEFAULT_MAX_WORKERS,
+                      upsert: bool = True) -> IngestionStats:
+        """
+        Add documents to ChromaDB in batches.
+        Documents are grouped by count and estimated token budget, embedded concurrently
+        on a bounded worker pool and written with one collection call per batch.
+        Writes are upserts by default, so adding the same ids again is idempotent.
+        Args:
+            documents (Iterable[Document]): The documents to add.
+            batch_size (int): Maximum number of documents per embedding request.
+            max_batch_tokens (int): Maximum estimated tokens per embedding request.
+            max_workers (int): Number of concurrent embedding requests.
+            upsert (bool): Overwrite documents whose ids already exist (default); with
+                False, Chroma ignores ids that already exist.
+        Returns:
+            IngestionStats: Counts and throughput (docs/sec, tokens/sec) of the run.
+        """
+        logging.info("Attempting to add documents to ChromaDB")
+        try:
+            stats = ingest_documents(
+                self.collection,
+                self.embedding_function,
+                documents,
+                batch_size=batch_size,
+                max_batch_tokens=max_batch_tokens,
+                max_workers=max_workers,
+                upsert=upsert,
+                on_batch_written=lambda ids, texts, metadatas: self.bm25_index.upsert(zip(ids, texts))
             )
-            logging.info(f"Added document {i+1} with ID: {doc.metadata.get('id', f'doc_{i}')}")
-        logging.info(f"Added {len(documents)} documents to ChromaDB")
-
-    def load_and_embed_txt_documents(self, txt_dir: str = "../data/raw/txt")-> bool:
-        """Load and embed all .txt documents from the specified directory"""
-        documents = self.load_txt_documents(txt_dir)
-        if documents:
-            self.add_documents(documents)
-            return True
-        return False
-
-    def query_documents(self, query: str, n_results: int = 5):
-        """Query the vector database"""
+        except Exception:
+            # Some batches may have been written; re-read the count on next use
+            self._doc_count = None
+            self._invalidate_queries()
+            raise
+        if self._doc_count is not None:
+            self._doc_count += stats.new_documents
+        self.embedding_cache.flush()
+        if stats.documents:
+            self._invalidate_queries()
+        logging.info(f"Added {stats.documents} documents to ChromaDB")
+        logging.info(f"Embedding cache: {self.embedding_cache.stats()}")
+        return stats
+
+    def embedding_cache_stats(self) -> dict:
+        """Return hit/miss/eviction counters of the embedding cache"""
+        return self.embedding_cache.stats()
+
+    @_serialized_write
+    def rebuild_lexical_index(self, page_size: int = 1000):
+        """Rebuild the BM25 index from the documents stored in the collection"""
+        self.bm25_index.clear()
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            self.bm25_index.upsert(zip(page["ids"], page["documents"]))
+            offset += len(page["ids"])
+        logging.info(f"Rebuilt lexical index with {offset} documents")
+
+    @_serialized_write
+    def delete_documents(self, ids: List[str]):
+        """Delete documents from ChromaDB by id"""
+        if ids:
+            existing = self.collection.get(ids=ids, include=[])["ids"]
+            self.collection.delete(ids=ids)
+            self.bm25_index.delete(ids)
+            if self._doc_count is not None:
+                self._doc_count -= len(existing)
+            self._invalidate_queries()
+            logging.info(f"Deleted {len(ids)} documents from ChromaDB")
+
+    @_serialized_write
+    def remove_duplicate_documents(self, page_size: int = 1000) -> int:
+        """
+        Delete documents stored more than once under different ids.
+        Documents are the same if they share their arXiv entry id, their title and
+        publication date, or the first DUPLICATE_PREFIX_CHARS characters of their
+        normalised text (short documents: the text of all their chunks). The copy with a
+        stable arxiv: id is kept over random ids left by older versions of arxiv_search,
+        and manifest entries whose chunks were all deleted are dropped.
+        Returns:
+            int: The number of deleted collection entries.
+        """
+        parents = {}
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            for doc_id, text, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                metadata = metadata or {}
+                parent = parents.setdefault(metadata.get("parent_id", doc_id), {"chunks": [], "first": None})
+                chunk_index = metadata.get("chunk_index", 0)
+                parent["chunks"].append((chunk_index, content_hash(text), doc_id))
+                if parent["first"] is None or chunk_index < parent["first"][0]:
+                    parent["first"] = (chunk_index, text[:4 * DUPLICATE_PREFIX_CHARS], metadata)
+            offset += len(page["ids"])
+
+        seen_keys = set()
+        duplicate_ids = []
+        for parent_id in sorted(parents, key=lambda parent_id: (not parent_id.startswith("arxiv:"), parent_id)):
+            chunks = sorted(parents[parent_id]["chunks"])
+            _, first_chunk, metadata = parents[parent_id]["first"]
+            keys = _duplicate_keys(metadata, first_chunk, tuple(text_hash for _, text_hash, _ in chunks))
+            if seen_keys.intersection(keys):
+                duplicate_ids.extend(chunk_id for _, _, chunk_id in chunks)
+            else:
+                seen_keys.update(keys)
+
+        self.delete_documents(duplicate_ids)
+        deleted = set(duplicate_ids)
+        for doc_id, entry in list(self.manifest.entries.items()):
+            if entry["ids"] and all(chunk_id in deleted for chunk_id in entry["ids"]):
+                self.manifest.remove(doc_id)
+        self.manifest.save()
+        logging.info(f"Removed {len(duplicate_ids)} duplicate documents")
+        return len(duplicate_ids)
+
+    @_serialized_write
+    def sync_documents(self,
+                       documents: Iterable[Document],
+                       scope: str = "default",
+                       delete_stale: bool = True,
+                       chunk_size: Optional[int] = DEFAULT_CHUNK_TOKENS,
+                       chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+                       **ingest_kwargs) -> SyncStats:
+        """
+        Incrementally sync documents into ChromaDB using the content-hash manifest.
+        Documents whose text is unchanged since the last sync are skipped, new or changed
+        documents are chunked and upserted, and (optionally) documents previously synced
+        under the same scope but missing from this call are deleted.
+        Args:
+            documents (Iterable[Document]): Documents with an 'id' in their metadata.
+            scope (str): Name of the document set being synced, e.g. "arxiv" or "txt".
+            delete_stale (bool): Delete documents of this scope that were not seen.
+            chunk_size (int): Estimated tokens per chunk, or None to embed whole documents.
+            chunk_overlap (int): Estimated tokens shared by consecutive chunks.
+            **ingest_kwargs: Passed through to add_documents.
+        Returns:
+            SyncStats: Counts of added, updated, unchanged and deleted documents.
+        """
+        stats = SyncStats()
+        chunking = [chunk_size, chunk_overlap] if chunk_size else None
+        seen = set()
+        synced = []
+
+        def changed_documents():
+            for doc in documents:
+                doc_id = doc.metadata.get("id")
+                if not doc_id:
+                    raise ValueError("Document must have an 'id' field in its metadata to be synced.")
+                seen.add(doc_id)
+                text_hash = _document_hash(doc)
+                if self.manifest.is_current(doc_id, text_hash, chunking):
+                    stats.unchanged += 1
+                    continue
+                entry = self.manifest.get(doc_id)
+                if entry is None:
+                    stats.added += 1
+                else:
+                    stats.updated += 1
+                ids = []
+                synced.append((doc_id, text_hash, entry["scope"] if entry else scope, ids, entry["ids"] if entry else []))
+                if chunking:
+                    for chunk in _iter_chunks([doc], chunk_size, chunk_overlap):
+                        ids.append(chunk.metadata["id"])
+                        yield chunk
+                else:
+                    ids.append(doc_id)
+                    yield doc.to_document() if isinstance(doc, MappedDocument) else doc
+
+        stats.ingestion = self.add_documents(changed_documents(), upsert=True, **ingest_kwargs)
+        obsolete_ids = []
+        for doc_id, text_hash, doc_scope, ids, old_ids in synced:
+            self.manifest.update(doc_id, text_hash, doc_scope, ids, chunking)
+            obsolete_ids.extend(set(old_ids) - set(ids))
+
+        if delete_stale:
+            for doc_id in self.manifest.ids_in_scope(scope):
+                if doc_id not in seen:
+                    obsolete_ids.extend(self.manifest.remove(doc_id)["ids"])
+                    stats.deleted += 1
+        self.delete_documents(obsolete_ids)
+
+        self.manifest.save()
+        logging.info(
+            f"Synced scope '{scope}': {stats.added} added, {stats.updated} updated, "
+            f"{stats.unchanged} unchanged, {stats.deleted} deleted"
+        )
+        return stats
+
+    def load_and_embed_documents(self,
+                                 directory: str,
+                                 patterns: Sequence[str] = DEFAULT_PATTERNS,
+                                 scope: str = "files",
+                                 incremental: bool = True,
+                                 max_read_workers: int = DEFAULT_READ_WORKERS,
+                                 mapped: bool = False,
+                                 **ingest_kwargs) -> bool:
+        """
+        Stream, chunk and embed documents from a directory.
+        Files are read on a thread pool and flow straight into batched ingestion, so
+        reading, embedding and writing overlap and only a few batches are held in memory.
+        Args:
+            directory (str): Directory to read from.
+            patterns (Sequence[str]): Glob patterns, e.g. "**/*.txt" or "**/*.json".
+            scope (str): Sync scope of these documents (see sync_documents).
+            incremental (bool): Skip unchanged documents and delete removed ones.
+            max_read_workers (int): Number of file reader threads.
+            mapped (bool): Memory-map .txt files instead of reading them: unchanged files
+                are hashed without decoding, and text is decoded one chunk at a time.
+            **ingest_kwargs: Passed through to add_documents.
+        Returns:
+            bool: True if any documents were found.
+        """
+        if mapped:
+            documents = iter_mapped_documents(directory, patterns=patterns)
+        else:
+            documents = iter_documents(directory, patterns=patterns, max_workers=max_read_workers)
+        if incremental:
+            stats = self.sync_documents(documents, scope=scope, **ingest_kwargs)
+            found = stats.added + stats.updated + stats.unchanged
+        else:
+            found = self.add_documents(
+                _iter_chunks(documents, DEFAULT_CHUNK_TOKENS, DEFAULT_CHUNK_OVERLAP), **ingest_kwargs
+            ).documents
+        logging.info(f"Processed {found} documents from {directory}")
+        return found > 0
+
+    @_serialized_write
+    def rebuild_from_store(self,
+                           store: DocumentStore,
+                           scope: str = "arxiv",
+                           incremental: bool = True,
+                           **ingest_kwargs) -> SyncStats:
+        """
+        (Re)build the vector and lexical indexes from a DocumentStore, without re-fetching.
+        Documents are streamed from the store; with incremental=True documents that are
+        already embedded with the same text are skipped, otherwise the collection is reset
+        first. Embeddings of previously embedded text come from the embedding cache.
+        Args:
+            store (DocumentStore): The store to read documents from.
+            scope (str): Sync scope of the stored documents.
+            incremental (bool): Keep the collection and only embed what changed.
+            **ingest_kwargs: Passed through to sync_documents.
+        Returns:
+            SyncStats: Counts of added, updated and unchanged documents.
+        """
+        if not incremental:
+            self.reset_collection()
+        stats = self.sync_documents(store.iter_documents(), scope=scope, delete_stale=False, **ingest_kwargs)
+        logging.info(f"Rebuilt index from {store.path}: {stats.added} added, {stats.updated} updated")
+        return stats
+
+    def load_and_embed_txt_documents(self, txt_dir: str = "../data/raw/txt", incremental: bool = True)-> bool:
+        """
+        Load, chunk and embed all .txt documents from the specified directory.
+        With incremental=True only new or changed files are embedded and files that
+        were removed from the directory are deleted from the collection.
+        Files are memory-mapped, so re-indexing a large corpus only decodes what is embedded.
+        """
+        return self.load_and_embed_documents(txt_dir, patterns=("*.txt",), scope="txt",
+                                             incremental=incremental, mapped=True)
+
+    def _embed_queries(self, queries: List[str]) -> list:
+        """Embed queries in one request, reusing the in-memory query embedding cache when enabled"""
+        if self.query_embedding_cache is None:
+            return list(self.embedding_function(queries))
+        keys = [(EMBEDDING_MODEL, normalize_query(query)) for query in queries]
+        embeddings = [self.query_embedding_cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self.embedding_function([queries[i] for i in missing])
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+                self.query_embedding_cache.set(keys[i], embedding)
+        return embeddings
+
+    def _lexical_search(self, queries: List[str], n_results: int, where: Optional[dict] = None) -> List[dict]:
+        """BM25 search for each query, fetching all hit documents with one collection.get"""
+        # The metadata filter runs in Chroma first, so BM25 only ranks matching documents
+        allowed = set(self.collection.get(where=where, include=[])["ids"]) if where else None
+        hits = [self.bm25_index.search(query, n_results, doc_ids=allowed) for query in queries]
+        ids = list({doc_id for query_hits in hits for doc_id, _ in query_hits})
+        stored = self.collection.get(ids=ids, include=["documents", "metadatas"]) if ids else {"ids": []}
+        by_id = {doc_id: i for i, doc_id in enumerate(stored["ids"])}
+        results = []
+        for query_hits in hits:
+            query_hits = [(doc_id, score) for doc_id, score in query_hits if doc_id in by_id]
+            results.append({
+                "ids": [[doc_id for doc_id, _ in query_hits]],
+                "documents": [[stored["documents"][by_id[doc_id]] for doc_id, _ in query_hits]],
+                "metadatas": [[stored["metadatas"][by_id[doc_id]] for doc_id, _ in query_hits]],
+                "scores": [[score for _, score in query_hits]],
+            })
+        return results
+
+    def query_many(self,
+                   queries: List[str],
+                   n_results: int = 5,
+                   collapse_chunks: bool = True,
+                   dedupe: bool = False,
+                   fuse: bool = False,
+                   mode: str = "vector",
+                   where: Optional[dict] = None):
+        """
+        Run several queries with one embedding request and one collection.query call.
+        Queries already in the result cache are not searched again.
+        Args:
+            queries (List[str]): The query texts.
+            n_results (int): Number of results per query.
+            collapse_chunks (bool): Collapse chunk hits to one hit per parent document.
+            dedupe (bool): Keep each document only under the query where it ranked best.
+            fuse (bool): Merge all queries into one ranking with reciprocal rank fusion.
+            mode (str): "vector" for dense search, "lexical" for BM25 only (no embedding
+                call), or "hybrid" to fuse both rankings with reciprocal rank fusion.
+            where (dict): Chroma metadata filter, usually from metadata_filters.build_where.
+        Returns:
+            List[dict]: One Chroma-shaped result per query, or a single fused result
+            (with scores instead of distances) when fuse=True. Results may be shared
+            with the cache, so callers must not modify them.
+        """
         if not hasattr(self, 'collection') or self.collection is None:
             logging.error("Collection not initialized")
             raise ValueError("Collection not initialized. Ensure ChromaDBManager is properly initialized.")
-        
-        try:
-            total_docs = self.collection.count()
-            logging.info(f"Total documents in collection: {total_docs}")
-            
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=min(n_results, total_docs)  # Ensure we don't request more than available
-            )
-            logging.info(f"Query returned {len(results['documents'][0])} results")
-            return results
-        except Exception as e:
-            logging.error(f"Error during query: {str(e)}")
-            raise 
\ No newline at end of file
+        if mode not in ("vector", "lexical", "hybrid"):
+            raise ValueError(f"Unknown query mode: {mode}")
+
+        where_key = json.dumps(where, sort_keys=True) if where else None
+        keys = [(normalize_query(query), n_results, collapse_chunks, mode, where_key, self._collection_version)
+                for query in queries]
+        cached = {key: self.query_cache.get(key) for key in keys}
+        to_search = {key: query for key, query in zip(keys, queries) if cached[key] is None}
+        logging.info(f"{len(queries) - len(to_search)} of {len(queries)} queries served from cache")
+
+        if to_search and mode != "vector" and len(self.bm25_index) == 0 and self.document_count() > 0:
+            # Collections built before the lexical index existed
+            self.rebuild_lexical_index()
+
+        if to_search:
+            # Shared with other queries; only reset_collection waits for it
+            with self._collection_lock.read():
+                try:
+                    total_docs = self.document_count()
+                    if total_docs == 0:
+                        searched = [empty_result() for _ in to_search]
+                    else:
+                        # Ensure we don't request more than available
+                        fetch = min(n_results * CHUNK_OVERFETCH if collapse_chunks else n_results, total_docs)
+                        search_queries = list(to_search.values())
+                        if mode != "lexical":
+                            vector = split_query_results(self.collection.query(
+                                query_embeddings=self._embed_queries(search_queries),
+                                n_results=fetch,
+                                where=where
+                            ))
+                        if mode != "vector":
+                            lexical = self._lexical_search(search_queries, fetch, where)
+                        if mode == "hybrid":
+                            # Chunk level: the hits are collapsed to parents afterwards if requested
+                            searched = [reciprocal_rank_fusion(pair, fetch, by_parent=False)
+                                        for pair in zip(vector, lexical)]
+                        else:
+                            searched = vector if mode == "vector" else lexical
+                        if collapse_chunks:
+                            searched = [collapse_chunk_results(result, n_results) for result in searched]
+                    for key, result in zip(to_search, searched):
+                        logging.info(f"Query returned {len(result['ids'][0])} results")
+                        self.query_cache.set(key, result)
+                        cached[key] = result
+                except Exception as e:
+                    logging.error(f"Error during query: {str(e)}")
+                    raise
+
+        results = [cached[key] for key in keys]
+        # Each query's hits are already one per parent, but different queries can hit
+        # the same parent through different chunks
+        if fuse:
+            return reciprocal_rank_fusion(results, n_results, by_parent=collapse_chunks)
+        if dedupe:
+            return dedupe_across_queries(results, by_parent=collapse_chunks)
+        return results
+
+    def query_documents(self,
+                        query: str,
+                        n_results: int = 5,
+                        collapse_chunks: bool = True,
+                        mode: str = "vector",
+                        where: Optional[dict] = None):
+        """
+        Query the vector database.
+        mode selects dense ("vector"), BM25 ("lexical", no embedding call) or fused
+        ("hybrid") retrieval. where is a Chroma metadata filter evaluated before ranking,
+        e.g. build_where(published_after="2023", author="Vaswani").
+        With collapse_chunks=True, extra chunks are fetched and collapsed so that each
+        parent document appears at most once, represented by its best-matching chunk.
+        Results are cached for query_cache_ttl seconds until the collection changes;
+        cached results are shared, so callers must not modify them.
+        """
+        return self.query_many([query], n_results, collapse_chunks, mode=mode, where=where)[0]
@@ -0,0 +1,119 @@
+import re
+from collections import deque
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.result_fusion import RESULT_KEYS
+from notebookbot.data_help.document_ids import chunk_id
+
+# text-embedding-ada-002 accepts 8191 tokens per input; 512-token chunks keep
+# retrieval precise and leave plenty of headroom for the token estimate.
+DEFAULT_CHUNK_TOKENS = 512
+DEFAULT_CHUNK_OVERLAP = 64
+
+_WORD = re.compile(r"\S+\s*")
+_WORD_BYTES = re.compile(rb"\S+\s*")
+
+# Text or a UTF-8 buffer (bytes, mmap or memoryview), chunked without decoding
+Chunkable = Union[str, bytes, memoryview]
+
+
+def _word_spans(text: Chunkable, chunk_size: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield (start, end, tokens) for each word, hard-splitting words longer than a chunk."""
+    max_chars = chunk_size * 4
+    is_text = isinstance(text, str)
+    for match in (_WORD if is_text else _WORD_BYTES).finditer(text):
+        start, end = match.span()
+        while end - start > max_chars:
+            cut = start + max_chars
+            # Never split a UTF-8 sequence: back off over continuation bytes
+            while not is_text and cut > start + 1 and text[cut] & 0xC0 == 0x80:
+                cut -= 1
+            yield start, cut, chunk_size
+            start = cut
+        # Same estimate as estimate_tokens, without slicing a copy of the word
+        yield start, end, max(1, (end - start + 3) // 4)
+
+
+def iter_chunk_spans(text: Chunkable,
+                     chunk_size: int = DEFAULT_CHUNK_TOKENS,
+                     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) character offsets of overlapping chunks of text.
+    Chunks break on whitespace and hold at most chunk_size estimated tokens; consecutive
+    chunks share up to chunk_overlap tokens. Only offsets are kept in memory, never copies.
+    A UTF-8 buffer such as a memory-mapped file can be passed instead of a str; offsets
+    are then byte offsets and always fall on character boundaries.
+    Args:
+        text (Chunkable): The text or UTF-8 buffer to split.
+        chunk_size (int): Maximum estimated tokens per chunk.
+        chunk_overlap (int): Estimated tokens repeated at the start of the next chunk.
+    Yields:
+        Tuple[int, int]: Start and end offset of each chunk.
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
+    window = deque()
+    window_tokens = 0
+    emitted_end = 0
+    for start, end, tokens in _word_spans(text, chunk_size):
+        if window and window_tokens + tokens > chunk_size:
+            yield window[0][0], window[-1][1]
+            emitted_end = window[-1][1]
+            while window and window_tokens > chunk_overlap:
+                window_tokens -= window.popleft()[2]
+        window.append((start, end, tokens))
+        window_tokens += tokens
+    if window and window[-1][1] > emitted_end:
+        yield window[0][0], window[-1][1]
+
+
+def chunk_documents(documents: Iterable[Document],
+                    chunk_size: int = DEFAULT_CHUNK_TOKENS,
+                    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP) -> Iterator[Document]:
+    """
+    Split documents into overlapping chunks, lazily.
+    Each chunk gets the deterministic id "<parent id>#<chunk index>" plus the parent's
+    metadata and parent_id, chunk_index and chunk_offset fields.
+    Args:
+        documents (Iterable[Document]): Documents with an 'id' in their metadata.
+        chunk_size (int): Maximum estimated tokens per chunk.
+        chunk_overlap (int): Estimated tokens shared by consecutive chunks.
+    Yields:
+        Document: The next chunk.
+    """
+    for doc in documents:
+        parent_id = doc.metadata.get("id")
+        if not parent_id:
+            raise ValueError("Document must have an 'id' field in its metadata to be chunked.")
+        text = doc.page_content
+        for index, (start, end) in enumerate(iter_chunk_spans(text, chunk_size, chunk_overlap)):
+            metadata = dict(doc.metadata)
+            metadata.update(id=chunk_id(parent_id, index), parent_id=parent_id, chunk_index=index, chunk_offset=start)
+            yield Document(page_content=text[start:end], metadata=metadata)
+
+
+def collapse_chunk_results(results: dict, n_results: Optional[int] = None) -> dict:
+    """
+    Collapse single-query Chroma results so each parent document appears once.
+    Results are ranked best first, so the first chunk seen for a parent is kept.
+    Args:
+        results (dict): A Chroma query result for one query text.
+        n_results (int): Maximum number of parents to keep.
+    Returns:
+        dict: A result of the same shape with at most one hit per parent.
+    """
+    keys = [key for key in RESULT_KEYS if results.get(key) is not None]
+    collapsed = {key: [[]] for key in keys}
+    seen = set()
+    for i, (doc_id, metadata) in enumerate(zip(results["ids"][0], results["metadatas"][0])):
+        parent_id = (metadata or {}).get("parent_id", doc_id)
+        if parent_id in seen:
+            continue
+        seen.add(parent_id)
+        for key in keys:
+            collapsed[key][0].append(results[key][0][i])
+        if n_results is not None and len(seen) >= n_results:
+            break
+    return collapsed
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from notebookbot.data_help.atomic_writer import write_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+KEY_BYTES = 16
+_EMPTY_KEY = bytes(KEY_BYTES)
+INITIAL_CAPACITY = 1024
+
+
+def cache_key(text: str) -> bytes:
+    """Hash of the NFC-normalized, whitespace-collapsed text used as the cache key."""
+    normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).digest()[:KEY_BYTES]
+
+
+class EmbeddingCache:
+    """
+    A persistent, size-bounded LRU cache of embedding vectors for a single model.
+    Storage is three memory-mapped files in cache_dir:
+        vectors.f32  - float32 rows of embeddings
+        keys.bin     - 16-byte text hash per row (all zeros for a free row)
+        clock.u64    - last-use counter per row, used to restore LRU order
+    The in-memory index is rebuilt from keys.bin on load, and a row's key is
+    written after its vector, so the files never disagree after a crash.
+    Several processes may share a cache_dir: writes hold an exclusive lock on its lock
+    file, and every hit is checked against keys.bin, since another process may have
+    reused the row for another text (that is a miss).
+    """
+    def __init__(self, cache_dir: str, max_entries: int = 100_000):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[bytes, int]" = OrderedDict()
+        self._free_rows: List[int] = []
+        self._clock = 0
+        self._dim: Optional[int] = None
+        self._capacity = 0
+        self._meta_path = self.cache_dir / "meta.json"
+        self._lock_path = self.cache_dir / "lock"
+        if self._meta_path.exists():
+            with open(self._meta_path, 'r') as f:
+                meta = json.load(f)
+            self._dim = meta["dim"]
+            self._open(meta["capacity"])
+            self._rebuild_index()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _open(self, capacity: int):
+        """Map the storage files, growing them to hold capacity rows."""
+        for name, row_bytes in (("vectors.f32", self._dim * 4), ("keys.bin", KEY_BYTES), ("clock.u64", 8)):
+            path = self.cache_dir / name
+            with open(path, 'ab') as f:
+                if f.tell() < capacity * row_bytes:
+                    f.truncate(capacity * row_bytes)
+        self._vectors = np.memmap(self.cache_dir / "vectors.f32", dtype=np.float32, mode='r+', shape=(capacity, self._dim))
+        self._keys = np.memmap(self.cache_dir / "keys.bin", dtype=np.uint8, mode='r+', shape=(capacity, KEY_BYTES))
+        self._used = np.memmap(self.cache_dir / "clock.u64", dtype=np.uint64, mode='r+', shape=(capacity,))
+        self._free_rows.extend(range(capacity - 1, self._capacity - 1, -1))
+        self._capacity = capacity
+        write_atomic(self._meta_path, json.dumps({"dim": self._dim, "capacity": capacity}).encode())
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock across the processes sharing cache_dir"""
+        with open(self._lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _sync_capacity(self):
+        """Map the rows other processes added since this one last grew the files (under the file lock)"""
+        try:
+            with open(self._meta_path, 'r') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return
+        if self._dim is None:
+            self._dim = meta["dim"]
+        if meta["capacity"] > self._capacity:
+            self._open(meta["capacity"])
+
+    def _rebuild_index(self):
+        occupied = np.flatnonzero(self._keys.any(axis=1))
+        for row in occupied[np.argsort(self._used[occupied], kind="stable")]:
+            self._index[self._keys[row].tobytes()] = int(row)
+        occupied_set = set(int(row) for row in occupied)
+        self._free_rows = [row for row in self._free_rows if row not in occupied_set]
+        if len(occupied):
+            self._clock = int(self._used[occupied].max())
+
+    def _allocate_row(self) -> int:
+        """A row to write (under the file lock); rows other processes filled meanwhile are kept"""
+        while True:
+            while self._free_rows:
+                row = self._free_rows.pop()
+                key = self._keys[row].tobytes()
+                if key == _EMPTY_KEY or self._index.get(key, row) != row:
+                    return row
+                # Another process's entry: index it as least recently used
+                self._index[key] = row
+                self._index.move_to_end(key, last=False)
+            if self._capacity < self.max_entries:
+                self.flush()
+                self._open(min(self.max_entries, max(INITIAL_CAPACITY, self._capacity * 2)))
+            else:
+                if self._index:
+                    _, row = self._index.popitem(last=False)
+                else:
+                    # Every row holds another process's entry: evict the least recently used
+                    row = int(np.argmin(self._used))
+                self._keys[row] = 0
+                self.evictions += 1
+                return row
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Return the cached vector for each key, or None on a miss."""
+        results = []
+        with self._lock:
+            for key in keys:
+                row = self._index.get(key)
+                vector = None if row is None else np.array(self._vectors[row])
+                # The key is read after the vector: a writer clears it before reusing the row
+                if vector is not None and self._keys[row].tobytes() != key:
+                    del self._index[key]
+                    vector = None
+                if vector is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                self.hits += 1
+                self._index.move_to_end(key)
+                self._clock += 1
+                self._used[row] = self._clock
+                results.append(vector)
+        return results
+
+    def put_many(self, keys: List[bytes], vectors: List[np.ndarray]):
+        """Store vectors, evicting the least recently used entries when full."""
+        with self._lock, self._file_lock():
+            self._sync_capacity()
+            for key, vector in zip(keys, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                if self._dim is None:
+                    self._dim = len(vector)
+                    self._open(min(self.max_entries, INITIAL_CAPACITY))
+                if len(vector) != self._dim:
+                    raise ValueError(f"Expected embedding of dimension {self._dim}, got {len(vector)}")
+                row = self._index.get(key)
+                if row is None or self._keys[row].tobytes() != key:
+                    row = self._allocate_row()
+                    # Readers never pair the row's old key with the new vector
+                    self._keys[row] = 0
+                self._vectors[row] = vector
+                self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+                self._clock += 1
+                self._used[row] = self._clock
+                self._index[key] = row
+                self._index.move_to_end(key)
+
+    def flush(self):
+        """Flush the memory-mapped files to disk."""
+        if self._dim is not None:
+            self._vectors.flush()
+            self._keys.flush()
+            self._used.flush()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Wraps an embedding function with an EmbeddingCache.
+    Only texts missing from the cache are sent to the wrapped function, in one call.
+    """
+    def __init__(self, embedding_function: EmbeddingFunction, cache: EmbeddingCache):
+        self.embedding_function = embedding_function
+        self.cache = cache
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [cache_key(text) for text in input]
+        embeddings = self.cache.get_many(keys)
+        missing = {}
+        for i, (key, embedding) in enumerate(zip(keys, embeddings)):
+            if embedding is None:
+                missing.setdefault(key, []).append(i)
+        if missing:
+            texts = [input[positions[0]] for positions in missing.values()]
+            computed = self.embedding_function(texts)
+            self.cache.put_many(list(missing), computed)
+            for positions, embedding in zip(missing.values(), computed):
+                for i in positions:
+                    embeddings[i] = np.asarray(embedding, dtype=np.float32)
+            logging.info(f"Embedding cache: {len(input) - sum(map(len, missing.values()))} hits, {len(texts)} texts embedded")
+        return embeddings
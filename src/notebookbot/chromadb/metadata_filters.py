@@ -0,0 +1,160 @@
+import ast
+import re
+from datetime import date, datetime
+from typing import Optional, Union
+
+# Chroma metadata values must be primitives or non-empty lists of one primitive type
+_PRIMITIVES = (str, int, float, bool)
+_DATE = re.compile(r"^\s*(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?")
+
+DateLike = Union[str, int, date]
+
+
+def parse_date(value: DateLike, end_of_period: bool = False) -> Optional[int]:
+    """
+    Convert a date to a sortable YYYYMMDD integer.
+    Accepts date/datetime objects, YYYYMMDD integers and strings starting with
+    "YYYY", "YYYY-MM" or "YYYY-MM-DD" (e.g. arXiv's "2023-05-01" or an ISO timestamp).
+    Args:
+        value: The date to convert.
+        end_of_period (bool): Resolve partial dates to the last day ("2023" -> 20231231)
+            instead of the first ("2023" -> 20230101).
+    Returns:
+        Optional[int]: The date as YYYYMMDD, or None if it cannot be parsed.
+    """
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.year * 10000 + value.month * 100 + value.day
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if not isinstance(value, str):
+        return None
+    match = _DATE.match(value)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    month = int(month) if month else (12 if end_of_period else 1)
+    day = int(day) if day else (31 if end_of_period else 1)
+    return int(year) * 10000 + month * 100 + day
+
+
+def split_authors(authors: str) -> list:
+    """Split arXiv's comma-separated author string into lowercase names"""
+    return [name.strip().lower() for name in authors.split(",") if name.strip()]
+
+
+def parse_list(value) -> list:
+    """
+    Read a list-valued field back as a list of strings. Lists and tuples are kept as
+    they are; strings, as list fields come back from TXT headers (e.g.
+    "['cs.CL', 'cs.LG']"), are parsed as a list literal or split at commas.
+    """
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if not isinstance(value, str):
+        return []
+    text = value.strip()
+    if text.startswith("["):
+        try:
+            parsed = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            parsed = None
+        if isinstance(parsed, (list, tuple)):
+            return [str(item) for item in parsed]
+        text = text.strip("[]")
+    return [item.strip().strip("'\"") for item in text.split(",") if item.strip().strip("'\"")]
+
+
+def _clean_value(value):
+    if isinstance(value, _PRIMITIVES):
+        return value
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, str) for item in value):
+            return list(value)
+        return str(list(value)) if value else None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return None if value is None else str(value)
+
+
+def normalize_metadata(metadata: Optional[dict]) -> Optional[dict]:
+    """
+    Prepare document metadata for storage and filtering.
+    Adds filter fields derived from the arXiv metadata, leaving the originals for display:
+        - published_date: "Published" as a YYYYMMDD integer, for range filters
+        - authors / author_last_names: "Authors" split into lowercase lists, for $contains
+        - categories: arXiv categories including primary_category, for $contains
+    List fields read back from TXT headers as strings are parsed into lists again (see
+    parse_list). Values Chroma cannot store (None, empty lists, nested structures) are
+    dropped or converted to strings.
+    Args:
+        metadata (dict): The document metadata.
+    Returns:
+        Optional[dict]: The normalized metadata, or None if nothing is left.
+    """
+    if not metadata:
+        return None
+    normalized = dict(metadata)
+    if "Published" in metadata and "published_date" not in metadata:
+        normalized["published_date"] = parse_date(metadata["Published"])
+    if isinstance(normalized.get("published_date"), str) and normalized["published_date"].isdigit():
+        normalized["published_date"] = int(normalized["published_date"])
+    if isinstance(metadata.get("Authors"), str) and "authors" not in metadata:
+        authors = split_authors(metadata["Authors"])
+        normalized["authors"] = authors
+        normalized["author_last_names"] = list(dict.fromkeys(name.split()[-1] for name in authors))
+    for key in ("authors", "author_last_names"):
+        if isinstance(normalized.get(key), str):
+            normalized[key] = parse_list(normalized[key])
+    categories = parse_list(metadata.get("categories"))
+    if metadata.get("primary_category") and metadata["primary_category"] not in categories:
+        categories.insert(0, metadata["primary_category"])
+    if categories:
+        normalized["categories"] = categories
+    normalized = {key: _clean_value(value) for key, value in normalized.items()}
+    return {key: value for key, value in normalized.items() if value is not None} or None
+
+
+def build_where(published_after: Optional[DateLike] = None,
+                published_before: Optional[DateLike] = None,
+                author: Optional[str] = None,
+                source: Optional[str] = None,
+                category: Optional[str] = None) -> Optional[dict]:
+    """
+    Build a Chroma `where` clause from structured filters on normalized metadata.
+    Date bounds are inclusive; partial dates cover the whole period, so
+    published_after="2023" matches from 2023-01-01 and published_before="2023"
+    up to 2023-12-31. An author with several words is matched on the full name,
+    a single word on last names; both case-insensitively.
+    Args:
+        published_after: Earliest publication date.
+        published_before: Latest publication date.
+        author (str): Author name or last name.
+        source (str): Exact source, e.g. "arXiv".
+        category (str): arXiv category, e.g. "cs.CL".
+    Returns:
+        Optional[dict]: The where clause, or None when no filter is set.
+    """
+    clauses = []
+    if published_after is not None:
+        bound = parse_date(published_after)
+        if bound is None:
+            raise ValueError(f"Cannot parse published_after date: {published_after}")
+        clauses.append({"published_date": {"$gte": bound}})
+    if published_before is not None:
+        bound = parse_date(published_before, end_of_period=True)
+        if bound is None:
+            raise ValueError(f"Cannot parse published_before date: {published_before}")
+        clauses.append({"published_date": {"$lte": bound}})
+    if author and author.strip():
+        name = " ".join(author.lower().replace(",", " ").split())
+        field = "authors" if " " in name else "author_last_names"
+        clauses.append({field: {"$contains": name}})
+    if source:
+        clauses.append({"source": {"$eq": source}})
+    if category:
+        clauses.append({"categories": {"$contains": category}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -0,0 +1,29 @@
+from typing import Optional
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from notebookbot.clients.client_registry import ClientRegistry
+
+
+class OpenAIEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    OpenAI embeddings over the shared, pooled "openai" HTTP client.
+    Chroma's OpenAIEmbeddingFunction builds a private client (and connection pool) per
+    instance; this one shares keep-alive connections with every other OpenAI caller
+    in the process and reports them in the client registry metrics.
+    """
+    def __init__(self,
+                 api_key: str,
+                 model_name: str = "text-embedding-ada-002",
+                 registry: Optional[ClientRegistry] = None):
+        import openai
+
+        self.model_name = model_name
+        registry = registry or ClientRegistry()
+        self._client = openai.OpenAI(api_key=api_key, http_client=registry.client("openai"))
+
+    def __call__(self, input: Documents) -> Embeddings:
+        response = self._client.embeddings.create(model=self.model_name, input=list(input))
+        data = sorted(response.data, key=lambda item: item.index)
+        return [np.asarray(item.embedding, dtype=np.float32) for item in data]
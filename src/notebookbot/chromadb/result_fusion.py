@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional
+
+RESULT_KEYS = ("ids", "documents", "metadatas", "distances", "scores")
+RRF_K = 60
+
+
+def empty_result() -> dict:
+    """A single-query result with no hits, in Chroma's result shape."""
+    return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+
+def split_query_results(results: dict) -> List[dict]:
+    """Split a multi-query Chroma result into one single-query result per query."""
+    keys = [key for key in RESULT_KEYS if results.get(key) is not None]
+    return [{key: [results[key][i]] for key in keys} for i in range(len(results["ids"]))]
+
+
+def _hits(result: dict):
+    """Yield (id, {key: value}) for each hit of a single-query result, best first."""
+    keys = [key for key in RESULT_KEYS if result.get(key) is not None]
+    for i, doc_id in enumerate(result["ids"][0]):
+        yield doc_id, {key: result[key][0][i] for key in keys}
+
+
+def _document_key(doc_id: str, hit: dict, by_parent: bool) -> str:
+    """The id a hit is matched on: its parent document's id for chunks when by_parent"""
+    if not by_parent:
+        return doc_id
+    return (hit.get("metadatas") or {}).get("parent_id", doc_id)
+
+
+def dedupe_across_queries(results: List[dict], by_parent: bool = True) -> List[dict]:
+    """
+    Keep each document only in the query where it ranked highest.
+    Ties go to the earlier query. The input results are not modified.
+    Args:
+        results (List[dict]): Single-query results, one per query.
+        by_parent (bool): Treat chunks of the same parent document as one document,
+            so a document found through different chunks is still kept only once.
+    Returns:
+        List[dict]: Results of the same shape without cross-query duplicates.
+    """
+    best: Dict[str, tuple] = {}
+    for q, result in enumerate(results):
+        for rank, (doc_id, hit) in enumerate(_hits(result)):
+            key = _document_key(doc_id, hit, by_parent)
+            if key not in best or rank < best[key][0]:
+                best[key] = (rank, q, doc_id)
+    deduped = []
+    for q, result in enumerate(results):
+        keys = [key for key in RESULT_KEYS if result.get(key) is not None]
+        kept = {key: [[]] for key in keys}
+        for doc_id, hit in _hits(result):
+            if best[_document_key(doc_id, hit, by_parent)][1:] == (q, doc_id):
+                for key in keys:
+                    kept[key][0].append(hit[key])
+        deduped.append(kept)
+    return deduped
+
+
+def reciprocal_rank_fusion(results: List[dict], n_results: Optional[int] = None, k: int = RRF_K,
+                           by_parent: bool = True) -> dict:
+    """
+    Fuse several ranked result lists with reciprocal rank fusion.
+    Each document scores sum(1 / (k + rank)) over the lists it appears in (rank from 1).
+    Args:
+        results (List[dict]): Single-query results to fuse.
+        n_results (int): Maximum number of fused hits to return.
+        k (int): RRF damping constant; 60 is the usual default.
+        by_parent (bool): Score chunks of the same parent document as one document,
+            represented by its best-ranked chunk; otherwise every chunk is ranked separately.
+    Returns:
+        dict: A single-query result with ids, documents, metadatas and scores, best first.
+    """
+    scores: Dict[str, float] = {}
+    best: Dict[str, tuple] = {}
+    for result in results:
+        for rank, (doc_id, hit) in enumerate(_hits(result), start=1):
+            key = _document_key(doc_id, hit, by_parent)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            if key not in best or rank < best[key][0]:
+                best[key] = (rank, doc_id, hit)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:n_results]
+    return {
+        "ids": [[best[key][1] for key in ranked]],
+        "documents": [[best[key][2].get("documents") for key in ranked]],
+        "metadatas": [[best[key][2].get("metadatas") for key in ranked]],
+        "scores": [[scores[key] for key in ranked]],
+    }
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from notebookbot.chromadb.batch_ingestion import IngestionStats
+from notebookbot.data_help.atomic_writer import chmod_like_open
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of a document's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SyncStats:
+    """Outcome of a ChromaDBManager.sync_documents run."""
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    ingestion: IngestionStats = field(default_factory=IngestionStats)
+
+
+class SyncManifest:
+    """
+    A persistent record of what has been embedded into the collection.
+    Maps each document id to the hash of its text, the scope it was synced
+    under (e.g. "arxiv" or "txt"), the chunking parameters used and the
+    collection ids (chunk ids) stored for it.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: Dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        return self.entries.get(doc_id)
+
+    def is_current(self, doc_id: str, text_hash: str, chunking: Optional[list] = None) -> bool:
+        """Return True if the document was synced with exactly this text and chunking."""
+        entry = self.entries.get(doc_id)
+        return entry is not None and entry["hash"] == text_hash and entry.get("chunking") == chunking
+
+    def update(self, doc_id: str, text_hash: str, scope: str, ids: List[str], chunking: Optional[list] = None):
+        self.entries[doc_id] = {"hash": text_hash, "scope": scope, "ids": ids, "chunking": chunking}
+
+    def remove(self, doc_id: str) -> Optional[dict]:
+        return self.entries.pop(doc_id, None)
+
+    def ids_in_scope(self, scope: str) -> List[str]:
+        return [doc_id for doc_id, entry in self.entries.items() if entry["scope"] == scope]
+
+    def clear(self):
+        self.entries = {}
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves it half-written."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            chmod_like_open(fd)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
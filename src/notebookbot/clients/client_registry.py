@@ -0,0 +1,270 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import httpx
+
+
+@dataclass(frozen=True)
+class BackendConfig:
+    """Connection pool and timeout settings of one HTTP backend."""
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 60.0
+
+
+# Embedding batches run on DEFAULT_MAX_WORKERS threads and tool calls may run in
+# parallel; arXiv allows one request every 3 s, so a couple of connections suffice
+DEFAULT_BACKENDS = {
+    "openai": BackendConfig(max_connections=16, max_keepalive_connections=8, read_timeout=60.0),
+    "anthropic": BackendConfig(max_connections=8, max_keepalive_connections=4, read_timeout=600.0),
+    "arxiv": BackendConfig(max_connections=4, max_keepalive_connections=2, read_timeout=120.0),
+}
+
+
+@dataclass
+class BackendMetrics:
+    """Request, connection and latency counters of one backend."""
+    requests: int = 0
+    new_connections: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def reused_connections(self) -> int:
+        return max(0, self.requests - self.new_connections)
+
+    @property
+    def reuse_rate(self) -> float:
+        return self.reused_connections / self.requests if self.requests else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.requests if self.requests else 0.0
+
+    def record(self, latency: float, new_connection: bool, error: bool):
+        with self._lock:
+            self.requests += 1
+            self.new_connections += new_connection
+            self.errors += error
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_rate": self.reuse_rate,
+            "errors": self.errors,
+            "mean_latency_ms": self.mean_latency * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+
+class _MeteredTransport(httpx.BaseTransport):
+    """Records latency (until response headers) and whether a new TCP connection was opened"""
+    def __init__(self, transport: httpx.BaseTransport, metrics: BackendMetrics):
+        self._transport = transport
+        self._metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        connected = []
+        outer_trace = request.extensions.get("trace")
+
+        def trace(name, info):
+            if name == "connection.connect_tcp.started":
+                connected.append(True)
+            if outer_trace is not None:
+                outer_trace(name, info)
+
+        request.extensions["trace"] = trace
+        start = time.perf_counter()
+        try:
+            response = self._transport.handle_request(request)
+        except Exception:
+            self._metrics.record(time.perf_counter() - start, bool(connected), True)
+            raise
+        self._metrics.record(time.perf_counter() - start, bool(connected), response.status_code >= 500)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+class _AsyncMeteredTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of _MeteredTransport"""
+    def __init__(self, transport: httpx.AsyncBaseTransport, metrics: BackendMetrics):
+        self._transport = transport
+        self._metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        connected = []
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(name, info):
+            if name == "connection.connect_tcp.started":
+                connected.append(True)
+            if outer_trace is not None:
+                await outer_trace(name, info)
+
+        request.extensions["trace"] = trace
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            self._metrics.record(time.perf_counter() - start, bool(connected), True)
+            raise
+        self._metrics.record(time.perf_counter() - start, bool(connected), response.status_code >= 500)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of keep-alive HTTP clients, one pool per backend.
+    Tools, managers and models share these clients, so connections (and TLS sessions)
+    are reused instead of re-established for every call. Each backend has its own pool
+    size and timeouts (see DEFAULT_BACKENDS) and its own BackendMetrics.
+    Async clients are bound to an event loop and are therefore kept per loop.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, backends: Optional[Dict[str, BackendConfig]] = None):
+        if not getattr(self, '_initialized', False):
+            self.backends = dict(DEFAULT_BACKENDS)
+            self._lock = threading.Lock()
+            self._clients: Dict[str, httpx.Client] = {}
+            self._async_clients = weakref.WeakKeyDictionary()
+            self._metrics: Dict[str, BackendMetrics] = {}
+            self._initialized = True
+        if backends:
+            self.backends.update(backends)
+
+    def _config(self, backend: str) -> BackendConfig:
+        return self.backends.get(backend) or BackendConfig()
+
+    def _client_kwargs(self, backend: str) -> dict:
+        config = self._config(backend)
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        timeout = httpx.Timeout(config.read_timeout, connect=config.connect_timeout)
+        return {"limits": limits, "timeout": timeout}
+
+    def metrics(self, backend: str) -> BackendMetrics:
+        with self._lock:
+            return self._metrics.setdefault(backend, BackendMetrics())
+
+    def client(self, backend: str) -> httpx.Client:
+        """The shared, thread-safe httpx.Client of a backend, created on first use"""
+        with self._lock:
+            client = self._clients.get(backend)
+            if client is None or client.is_closed:
+                kwargs = self._client_kwargs(backend)
+                metrics = self._metrics.setdefault(backend, BackendMetrics())
+                transport = _MeteredTransport(httpx.HTTPTransport(limits=kwargs["limits"]), metrics)
+                client = httpx.Client(transport=transport, timeout=kwargs["timeout"], follow_redirects=True)
+                self._clients[backend] = client
+                logging.info(f"Created pooled HTTP client for {backend}")
+            return client
+
+    def async_client(self, backend: str) -> httpx.AsyncClient:
+        """The shared httpx.AsyncClient of a backend for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            client = clients.get(backend)
+            if client is None or client.is_closed:
+                kwargs = self._client_kwargs(backend)
+                metrics = self._metrics.setdefault(backend, BackendMetrics())
+                transport = _AsyncMeteredTransport(httpx.AsyncHTTPTransport(limits=kwargs["limits"]), metrics)
+                client = httpx.AsyncClient(transport=transport, timeout=kwargs["timeout"], follow_redirects=True)
+                clients[backend] = client
+            return client
+
+    def stats(self) -> Dict[str, dict]:
+        """Connection reuse and latency metrics per backend"""
+        with self._lock:
+            return {backend: metrics.as_dict() for backend, metrics in self._metrics.items()}
+
+    def close(self):
+        """Close the synchronous clients (async clients close with their event loop)"""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def _pooled_chat_anthropic():
+    """ChatAnthropic subclass on registry clients, defined on first use to keep imports light"""
+    import anthropic
+    from langchain_anthropic import ChatAnthropic
+    from pydantic import PrivateAttr
+
+    class PooledChatAnthropic(ChatAnthropic):
+        """ChatAnthropic whose sync and async calls go through a ClientRegistry's "anthropic" pools."""
+        _registry: Any = PrivateAttr(default=None)
+        _sync_client: Any = PrivateAttr(default=None)
+        _async_clients: Any = PrivateAttr(default_factory=weakref.WeakKeyDictionary)
+
+        @property
+        def _pooled_client_params(self) -> dict:
+            # Timeouts are those of the registry's backend config
+            return {key: value for key, value in self._client_params.items() if key != "timeout"}
+
+        @property
+        def _client(self) -> anthropic.Client:
+            http_client = self._registry.client("anthropic")
+            if self._sync_client is None or self._sync_client._client is not http_client:
+                self._sync_client = anthropic.Client(**self._pooled_client_params, http_client=http_client)
+            return self._sync_client
+
+        @property
+        def _async_client(self) -> anthropic.AsyncClient:
+            # One client per event loop, on the registry's async pool of that loop
+            loop = asyncio.get_running_loop()
+            http_client = self._registry.async_client("anthropic")
+            client = self._async_clients.get(loop)
+            if client is None or client._client is not http_client:
+                client = anthropic.AsyncClient(**self._pooled_client_params, http_client=http_client)
+                self._async_clients[loop] = client
+            return client
+
+    return PooledChatAnthropic
+
+
+def chat_anthropic(api_key: str, registry: Optional[ClientRegistry] = None, **kwargs):
+    """
+    Create a ChatAnthropic model whose calls go through the registry's pooled "anthropic"
+    clients, with their limits, timeouts and metrics: invoke uses the shared sync client,
+    ainvoke and astream_events (as in the agent graph) the async client of the running
+    event loop.
+    Args:
+        api_key (str): The Anthropic API key.
+        registry (ClientRegistry): The registry to use (default: the shared one).
+        **kwargs: Passed through to ChatAnthropic, e.g. model and temperature.
+    """
+    model = _pooled_chat_anthropic()(api_key=api_key, **kwargs)
+    model._registry = registry or ClientRegistry()
+    return model
@@ -0,0 +1,115 @@
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple, TypeVar
+
+DEFAULT_MAX_WORKERS = 4
+
+T = TypeVar("T")
+
+
+@dataclass
+class WriteStats:
+    """Counters collected while writing a batch of files."""
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+
+def chmod_like_open(fd: int, mode: Optional[int] = None):
+    """
+    Give a file made by mkstemp (always 0600) the mode open() would have given it under
+    the current umask, or mode if set.
+    """
+    if mode is None:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    if hasattr(os, "fchmod"):  # Not on Windows before Python 3.13
+        os.fchmod(fd, mode)
+
+
+def write_atomic(path: Path, data: bytes, fsync: bool = True, mode: Optional[int] = None) -> int:
+    """
+    Write data to path so readers see either the old file or the complete new one.
+    The data goes to a temporary file in the same directory, is fsynced, and is renamed
+    over path. The directory entry itself is only durable after fsync_directory.
+    Args:
+        mode (int): Permissions of the file (default: those of open() under the umask).
+    Returns:
+        int: The number of bytes written.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        chmod_like_open(fd, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(data)
+
+
+def fsync_directory(directory: Path):
+    """Flush a directory's metadata (new and renamed entries) to disk"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on Windows; renames there are durable once fsynced files are
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_files_atomic(items: Iterable[T],
+                       serialize: Callable[[T], Tuple[Path, bytes]],
+                       max_workers: int = DEFAULT_MAX_WORKERS,
+                       fsync: bool = True) -> WriteStats:
+    """
+    Serialize and atomically write a batch of files on a worker pool.
+    Each item is turned into a (path, bytes) pair and written with write_atomic; once the
+    whole batch is written every touched directory is fsynced once, instead of per file.
+    Args:
+        items (Iterable[T]): The objects to write.
+        serialize: Maps an item to its target path and file content.
+        max_workers (int): Number of serialization/writer threads.
+        fsync (bool): fsync files and directories; disable only for scratch data.
+    Returns:
+        WriteStats: Files and bytes written, and bytes per second.
+    """
+    stats = WriteStats()
+    start = time.perf_counter()
+    directories = set()
+
+    def write(item):
+        path, data = serialize(item)
+        return path, write_atomic(path, data, fsync=fsync)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path, written in executor.map(write, items):
+            directories.add(path.parent)
+            stats.files += 1
+            stats.bytes += written
+    if fsync:
+        for directory in directories:
+            fsync_directory(directory)
+    stats.seconds = time.perf_counter() - start
+    logging.info(
+        f"Wrote {stats.files} files ({stats.bytes} bytes) in {stats.seconds:.2f}s: "
+        f"{stats.bytes_per_sec / 1e6:.2f} MB/sec"
+    )
+    return stats
@@ -0,0 +1,25 @@
+import re
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w.\-]")
+
+
+def arxiv_document_id(arxiv_id: str, version: int) -> str:
+    """
+    Deterministic document id of an arXiv paper version, e.g. "arxiv:2101.00001v2".
+    The same paper fetched twice gets the same id, so it is stored and embedded once.
+    """
+    return f"arxiv:{arxiv_id}v{version}"
+
+
+def chunk_id(parent_id: str, chunk_index: int) -> str:
+    """Id of the chunk_index-th chunk of a document, e.g. "arxiv:2101.00001v2#3"."""
+    return f"{parent_id}#{chunk_index}"
+
+
+def document_filename(doc_id: str, extension: str) -> str:
+    """
+    File name for a document in the JSON/TXT stores, derived from its id.
+    Characters that are not portable in file names are replaced, so
+    "arxiv:hep-th/9901001v1" becomes "arxiv_hep-th_9901001v1.json".
+    """
+    return f"{_UNSAFE_FILENAME_CHARS.sub('_', doc_id)}{extension}"
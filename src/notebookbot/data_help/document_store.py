@@ -0,0 +1,301 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from langchain.docstore.document import Document
+
+from notebookbot.data_help.atomic_writer import chmod_like_open
+from notebookbot.data_help.save_documents_to_txt import save_documents_to_txt
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+DEFAULT_STORE_PATH = "../data/raw/documents.jsonl"
+
+
+def _encode(record: dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _record_hash(line: bytes) -> str:
+    return hashlib.sha256(line).hexdigest()[:32]
+
+
+class DocumentStore:
+    """
+    An append-only JSONL store of documents with an offset index.
+    Each line holds one record {"id", "page_content", "metadata"}; a newer record for the
+    same id replaces the older one and {"id", "deleted": true} removes it. The index maps
+    each id to the (offset, length, hash) of its latest record, so get() is a single seek
+    and read. The index is saved next to the store and only the tail written after it
+    is rescanned on open. Superseded records are reclaimed by compact().
+    Writes hold an exclusive lock on a lock file next to the store, so several
+    processes (e.g. notebookbot_run and notebookbot_serve) can share it; records
+    appended by another process are indexed before the next read or write.
+    """
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".index.json")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock = threading.Lock()
+        self._index: Dict[str, list] = {}
+        self._size = 0
+        self._inode = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        with self._lock, self._file_lock():
+            self._load_index()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock across processes; must not be nested within one process"""
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load_index(self):
+        """Load the saved index and scan the records written after it (under the file lock)"""
+        stat = self.path.stat()
+        file_size = stat.st_size
+        self._index, self._size, self._inode = {}, 0, stat.st_ino
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            # A saved index is only valid for the same file (compaction replaces it)
+            if saved["inode"] == stat.st_ino and saved["size"] <= file_size:
+                self._index, self._size = saved["entries"], saved["size"]
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        if self._size < file_size:
+            self._scan(self._size)
+
+    def _sync_index(self):
+        """Index what other processes appended or compacted since (under the file lock)"""
+        stat = self.path.stat()
+        if stat.st_ino != self._inode or stat.st_size < self._size:
+            self._load_index()
+        elif stat.st_size > self._size:
+            self._scan(self._size)
+
+    def _refresh(self):
+        """Before a read: re-index if the file changed size or was replaced (under self._lock)"""
+        stat = self.path.stat()
+        if stat.st_ino != self._inode or stat.st_size != self._size:
+            with self._file_lock():
+                self._sync_index()
+
+    def _scan(self, offset: int):
+        """Index records from offset to the end of the file, truncating a torn last record"""
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    logging.warning(f"Truncating incomplete record at offset {offset} in {self.path}")
+                    break
+                self._apply(record, offset, line)
+                offset += len(line)
+        if offset < self.path.stat().st_size:
+            os.truncate(self.path, offset)
+        self._size = offset
+
+    def _apply(self, record: dict, offset: int, line: bytes):
+        if record.get("deleted"):
+            self._index.pop(record["id"], None)
+        else:
+            self._index[record["id"]] = [offset, len(line), _record_hash(line)]
+
+    def _append(self, records: List[dict], lines: List[bytes]):
+        """
+        Append encoded records with a single write and fsync, then index them.
+        Called under the file lock; offsets are taken from the end of the file, not
+        from the index, so they stay right whoever appended last.
+        """
+        with open(self.path, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        for record, line in zip(records, lines):
+            self._apply(record, offset, line)
+            offset += len(line)
+        self._size = offset
+        self.save_index()
+
+    def put_many(self, documents: Iterable[Document]) -> int:
+        """
+        Store documents by their metadata id in one batched append.
+        Documents identical to their stored version are not written again.
+        Returns:
+            int: The number of records written.
+        """
+        records = {}
+        for doc in documents:
+            doc_id = doc.metadata.get("id")
+            if not doc_id:
+                raise ValueError("Document must have an 'id' field in its metadata to be stored.")
+            records[doc_id] = {"id": doc_id, "page_content": doc.page_content, "metadata": doc.metadata}
+        with self._lock, self._file_lock():
+            self._sync_index()
+            changed, lines = [], []
+            for doc_id, record in records.items():
+                line = _encode(record)
+                entry = self._index.get(doc_id)
+                if entry is None or entry[2] != _record_hash(line):
+                    changed.append(record)
+                    lines.append(line)
+            if changed:
+                self._append(changed, lines)
+        logging.info(f"Stored {len(changed)} of {len(records)} documents in {self.path}")
+        return len(changed)
+
+    def delete(self, doc_ids: Iterable[str]) -> int:
+        """Remove documents by id; returns the number that existed"""
+        with self._lock, self._file_lock():
+            self._sync_index()
+            records = [{"id": doc_id, "deleted": True} for doc_id in set(doc_ids) if doc_id in self._index]
+            if records:
+                self._append(records, [_encode(record) for record in records])
+        return len(records)
+
+    @staticmethod
+    def _read(f, entry: list) -> Document:
+        f.seek(entry[0])
+        record = json.loads(f.read(entry[1]))
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def get(self, doc_id: str) -> Optional[Document]:
+        """Read a single document by id with one seek, or None if it is not stored"""
+        with self._lock:
+            self._refresh()
+            entry = self._index.get(doc_id)
+            if entry is None:
+                return None
+            with open(self.path, 'rb') as f:
+                return self._read(f, entry)
+
+    def get_many(self, doc_ids: Iterable[str]) -> List[Document]:
+        """Read the stored documents among doc_ids, in the given order"""
+        with self._lock:
+            self._refresh()
+            f = open(self.path, 'rb')
+        with f:
+            return [self._read(f, self._index[doc_id]) for doc_id in doc_ids if doc_id in self._index]
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return doc_id in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return sorted(self._index, key=lambda doc_id: self._index[doc_id][0])
+
+    def iter_documents(self) -> Iterator[Document]:
+        """
+        Stream all stored documents in file order, reading one record at a time.
+        Iterates over a snapshot: records are never modified in place, and the open
+        file keeps the pre-compaction data readable if compact() runs meanwhile.
+        """
+        with self._lock:
+            self._refresh()
+            entries = sorted(self._index.values())
+            f = open(self.path, 'rb')
+        with f:
+            for entry in entries:
+                yield self._read(f, entry)
+
+    def save_index(self):
+        """Write the offset index atomically"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_path.parent, prefix=f".{self.index_path.name}.")
+        try:
+            chmod_like_open(fd)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"inode": self.path.stat().st_ino, "size": self._size, "entries": self._index}, f)
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def compact(self) -> int:
+        """
+        Rewrite the store with only the latest record of each live document.
+        Returns:
+            int: The number of bytes reclaimed.
+        """
+        with self._lock, self._file_lock():
+            self._sync_index()
+            old_size = self._size
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+            index = {}
+            offset = 0
+            try:
+                chmod_like_open(fd)
+                with os.fdopen(fd, 'wb') as out, open(self.path, 'rb') as f:
+                    for doc_id, (start, length, record_hash) in sorted(self._index.items(), key=lambda item: item[1][0]):
+                        f.seek(start)
+                        out.write(f.read(length))
+                        index[doc_id] = [offset, length, record_hash]
+                        offset += length
+                    out.flush()
+                    os.fsync(out.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._index, self._size, self._inode = index, offset, self.path.stat().st_ino
+            self.save_index()
+        logging.info(f"Compacted {self.path}: {old_size} -> {offset} bytes")
+        return old_size - offset
+
+    def export_txt(self, directory: str = "../data/raw/txt", doc_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Write stored documents as .txt files (the format of save_documents_to_txt).
+        The TXT files are a view for reading; the store remains the source of truth.
+        Args:
+            directory (str): Directory to write to.
+            doc_ids: Only export these documents (default: all).
+        Returns:
+            int: The number of exported documents.
+        """
+        documents = self.get_many(doc_ids) if doc_ids is not None else self.iter_documents()
+        return save_documents_to_txt(documents, directory).files
+
+
+_stores: Dict[str, DocumentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_document_store(path: str = DEFAULT_STORE_PATH) -> DocumentStore:
+    """
+    The process-wide DocumentStore of a path, so the tools of a process share one
+    offset index instead of each re-indexing what the others appended.
+    """
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = DocumentStore(path)
+        return store
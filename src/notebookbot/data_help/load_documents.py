@@ -0,0 +1,126 @@
+import json
+import logging
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+from langchain.docstore.document import Document
+
+DEFAULT_PATTERNS = ("**/*.txt", "**/*.json")
+DEFAULT_MAX_WORKERS = 4
+
+# Header written by save_documents_to_txt: "Metadata:\n<key>: <value>\n...\n\nContent:\n<text>"
+TXT_METADATA_MARKER = "Metadata:\n"
+TXT_CONTENT_MARKER = "\n\nContent:\n"
+_TXT_FIELD = re.compile(r"^(\w+): ?(.*)$")
+
+
+def parse_txt_document(content: str) -> tuple:
+    """
+    Split a .txt file written by save_documents_to_txt into (metadata, text).
+    Files without the metadata header are returned as ({}, content).
+    """
+    if not content.startswith(TXT_METADATA_MARKER) or TXT_CONTENT_MARKER not in content:
+        return {}, content
+    header, text = content[len(TXT_METADATA_MARKER):].split(TXT_CONTENT_MARKER, 1)
+    return parse_txt_header(header), text
+
+
+def parse_txt_header(header: str) -> dict:
+    """
+    Parse the "key: value" lines of a .txt metadata header.
+    Values are read back as strings; lines that are not "key: value" continue the previous value.
+    """
+    metadata = {}
+    key = None
+    for line in header.split("\n"):
+        match = _TXT_FIELD.match(line)
+        if match:
+            key = match.group(1)
+            metadata[key] = match.group(2)
+        elif key is not None:
+            metadata[key] += "\n" + line
+    return metadata
+
+
+def load_document(file_path: Path) -> Optional[Document]:
+    """
+    Load a single .txt or .json file as a Document.
+    .json files are expected in the format written by save_documents_to_json; those
+    without an id in their metadata are identified by their file name;
+    .txt files written by save_documents_to_txt keep the id and metadata from their
+    header, so they match the collection ids; other .txt files are loaded whole and
+    identified by their file name.
+    Returns None (and logs the error) if the file cannot be read.
+    """
+    try:
+        if file_path.suffix == ".json":
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            metadata = dict(data.get("metadata") or {})
+            # Documents saved without an id are identified by their file name, like .txt files
+            metadata.setdefault("id", data.get("id") or f"json_{file_path.stem}")
+            doc = Document(page_content=data["page_content"], metadata=metadata)
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            metadata, text = parse_txt_document(content)
+            doc = Document(
+                page_content=text,
+                metadata={
+                    "source": str(file_path),
+                    "filename": file_path.name,
+                    "id": f"txt_{file_path.stem}",
+                    **metadata
+                }
+            )
+        logging.info(f"Successfully loaded: {file_path.name}")
+        return doc
+    except Exception as e:
+        logging.error(f"Error loading {file_path}: {e}")
+        return None
+
+
+def iter_files(directory: Path, patterns: Sequence[str]) -> Iterator[Path]:
+    seen = set()
+    for pattern in patterns:
+        for file_path in directory.glob(pattern):
+            if file_path.is_file() and file_path not in seen:
+                seen.add(file_path)
+                yield file_path
+
+
+def _load_in_parallel(files: Iterable[Path], max_workers: int, max_pending: int) -> Iterator[Document]:
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for file_path in files:
+            pending.add(executor.submit(load_document, file_path))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (doc for doc in (future.result() for future in done) if doc is not None)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from (doc for doc in (future.result() for future in done) if doc is not None)
+
+
+def iter_documents(directory: str,
+                   patterns: Sequence[str] = DEFAULT_PATTERNS,
+                   max_workers: int = DEFAULT_MAX_WORKERS,
+                   max_pending: Optional[int] = None) -> Iterator[Document]:
+    """
+    Stream documents from a directory, reading files on a thread pool.
+    Documents are yielded in completion order as soon as they are read, and at most
+    max_pending files are in flight, so memory stays bounded whatever the corpus size.
+    Args:
+        directory (str): Directory to read from.
+        patterns (Sequence[str]): Glob patterns, e.g. "*.txt" or "**/*.json" for recursive.
+        max_workers (int): Number of reader threads.
+        max_pending (int): Maximum files read ahead of the consumer (default 2 * max_workers).
+    Returns:
+        Iterator[Document]: A lazy iterator over the loaded documents.
+    """
+    path = Path(directory)
+    if not path.exists():
+        raise ValueError(f"Directory not found: {directory}")
+    return _load_in_parallel(iter_files(path, patterns), max_workers, max_pending or 2 * max_workers)
@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import mmap
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Union
+
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.document_chunker import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_TOKENS, iter_chunk_spans
+from notebookbot.data_help.document_ids import chunk_id
+from notebookbot.data_help.load_documents import (
+    TXT_CONTENT_MARKER,
+    TXT_METADATA_MARKER,
+    iter_files,
+    load_document,
+    parse_txt_header,
+)
+
+DEFAULT_MAPPED_PATTERNS = ("**/*.txt",)
+# Metadata headers are small; the content marker is only searched for near the start
+MAX_HEADER_BYTES = 1 << 20
+
+_METADATA_MARKER = TXT_METADATA_MARKER.encode("utf-8")
+_CONTENT_MARKER = TXT_CONTENT_MARKER.encode("utf-8")
+
+
+class MappedText:
+    """
+    A lazily decoded view on a UTF-8 region of a memory-mapped file.
+    Nothing is read or copied until the text is hashed, chunked or decoded, and then
+    only the pages involved are faulted in.
+    """
+    __slots__ = ("_buffer", "start", "end")
+
+    def __init__(self, buffer, start: int = 0, end: Optional[int] = None):
+        self._buffer = buffer
+        self.start = start
+        self.end = len(buffer) if end is None else end
+
+    def __len__(self) -> int:
+        """Length in bytes"""
+        return self.end - self.start
+
+    def view(self) -> memoryview:
+        """A zero-copy memoryview of the region; release it (or use `with`) when done"""
+        return memoryview(self._buffer)[self.start:self.end]
+
+    def decode(self, start: int = 0, end: Optional[int] = None) -> str:
+        """Decode the bytes [start, end) of the region, relative to its start"""
+        with self.view() as view:
+            return str(view[start:end], "utf-8", "replace")
+
+    def __str__(self) -> str:
+        return self.decode()
+
+    def sha256(self) -> str:
+        """SHA-256 hex digest of the bytes, equal to content_hash of the decoded text"""
+        with self.view() as view:
+            return hashlib.sha256(view).hexdigest()
+
+
+class MappedDocument:
+    """
+    A corpus document whose content stays in a memory-mapped file.
+    Unchanged documents can be recognized by content_hash without decoding anything,
+    and iter_chunks decodes one chunk at a time.
+    """
+    def __init__(self, path: Path, metadata: dict, text: MappedText, mapping: Optional[mmap.mmap] = None):
+        self.path = path
+        self.metadata = metadata
+        self.text = text
+        self._mapping = mapping
+
+    @property
+    def page_content(self) -> str:
+        """The whole decoded text; prefer iter_chunks for large documents"""
+        return self.text.decode()
+
+    def content_hash(self) -> str:
+        return self.text.sha256()
+
+    def to_document(self) -> Document:
+        return Document(page_content=self.page_content, metadata=dict(self.metadata))
+
+    def iter_chunks(self,
+                    chunk_size: int = DEFAULT_CHUNK_TOKENS,
+                    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP) -> Iterator[Document]:
+        """
+        Chunk the document like chunk_documents, decoding only one chunk at a time.
+        chunk_offset is a byte offset into the content.
+        """
+        parent_id = self.metadata.get("id")
+        if not parent_id:
+            raise ValueError("Document must have an 'id' field in its metadata to be chunked.")
+        with self.text.view() as view:
+            for index, (start, end) in enumerate(iter_chunk_spans(view, chunk_size, chunk_overlap)):
+                metadata = dict(self.metadata)
+                metadata.update(id=chunk_id(parent_id, index), parent_id=parent_id, chunk_index=index, chunk_offset=start)
+                yield Document(page_content=str(view[start:end], "utf-8", "replace"), metadata=metadata)
+
+    def close(self):
+        if self._mapping is not None:
+            try:
+                self._mapping.close()
+            except BufferError:
+                # A view is still in use; the mapping is released when it is garbage collected
+                pass
+            self._mapping = None
+
+
+def map_document(file_path: Path) -> Optional[MappedDocument]:
+    """
+    Memory-map a .txt file as a MappedDocument.
+    Files written by save_documents_to_txt keep the id and metadata from their header
+    (only the header is decoded); other files are identified by their file name.
+    Returns None (and logs the error) if the file cannot be mapped.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if f.seek(0, 2) else None
+        buffer = mapping if mapping is not None else b""
+        metadata = {"source": str(file_path), "filename": file_path.name, "id": f"txt_{file_path.stem}"}
+        start = 0
+        if buffer[:len(_METADATA_MARKER)] == _METADATA_MARKER:
+            marker = buffer.find(_CONTENT_MARKER, 0, MAX_HEADER_BYTES)
+            if marker >= 0:
+                header = buffer[len(_METADATA_MARKER):marker].decode("utf-8", "replace")
+                metadata.update(parse_txt_header(header))
+                start = marker + len(_CONTENT_MARKER)
+        return MappedDocument(file_path, metadata, MappedText(buffer, start), mapping)
+    except Exception as e:
+        logging.error(f"Error mapping {file_path}: {e}")
+        return None
+
+
+def iter_mapped_documents(directory: str,
+                          patterns: Sequence[str] = DEFAULT_MAPPED_PATTERNS) -> Iterator[Union[MappedDocument, Document]]:
+    """
+    Stream documents from a directory as memory-mapped views instead of decoded copies.
+    .txt files are mapped; other files (e.g. .json, whose content must be parsed) are
+    loaded as regular Documents. Each mapping is closed once the consumer moves on to
+    the next document, so only one file is mapped at a time.
+    Args:
+        directory (str): Directory to read from.
+        patterns (Sequence[str]): Glob patterns, e.g. "*.txt" or "**/*.txt" for recursive.
+    Returns:
+        Iterator: A lazy iterator over MappedDocuments and Documents.
+    """
+    path = Path(directory)
+    if not path.exists():
+        raise ValueError(f"Directory not found: {directory}")
+
+    def generate():
+        for file_path in iter_files(path, patterns):
+            if file_path.suffix != ".txt":
+                doc = load_document(file_path)
+                if doc is not None:
+                    yield doc
+                continue
+            doc = map_document(file_path)
+            if doc is None:
+                continue
+            try:
+                yield doc
+            finally:
+                doc.close()
+
+    return generate()
@@ -1,20 +1,35 @@
 import json
 import os
-from typing import List
+from pathlib import Path
+from typing import List, Tuple
 from langchain.docstore.document import Document
+from notebookbot.data_help.atomic_writer import DEFAULT_MAX_WORKERS, WriteStats, write_files_atomic
+from notebookbot.data_help.document_ids import document_filename
 
-def save_documents_to_json(documents: List[Document], directory: str = "../data/raw/json"):
+def _document_id(doc: Document) -> str:
+    doc_id = doc.metadata.get("id", doc.metadata.get("source", doc.metadata.get("file_path")))
+    if not doc_id:
+        raise ValueError("Document must have an 'id', 'source', or 'file_path' field in its metadata.")
+    return doc_id
+
+def document_to_json(doc: Document) -> bytes:
+    """Serialize a document in the JSON file format"""
+    return json.dumps(doc.model_dump(), ensure_ascii=False, indent=2).encode("utf-8")
+
+def save_documents_to_json(documents: List[Document],
+                           directory: str = "../data/raw/json",
+                           max_workers: int = DEFAULT_MAX_WORKERS) -> WriteStats:
     """
     Save a list of LangChain documents as individual JSON files in the specified directory.
+    Files are named after the document id, so re-saving a document overwrites its file.
+    Each file is written atomically (temp file, fsync, rename) on a worker pool, so a crash
+    never leaves a half-written file behind.
+    Returns:
+        WriteStats: Files and bytes written, and bytes per second.
     """
     os.makedirs(directory, exist_ok=True)
 
-    for doc in documents:
-        doc_id = doc.metadata.get("id", doc.metadata.get("source", doc.metadata.get("file_path")))
-        doc_title = doc.metadata.get("Title", doc.metadata.get("source", doc.metadata.get("file_path")))
-        if not doc_id:
-            raise ValueError("Document must have an 'id', 'source', or 'file_path' field in its metadata.")
+    def serialize(doc: Document) -> Tuple[Path, bytes]:
+        return Path(directory) / document_filename(_document_id(doc), ".json"), document_to_json(doc)
 
-        file_path = os.path.join(directory, f"{doc_title}.json")
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(doc.model_dump(), f, ensure_ascii=False, indent=2)
+    return write_files_atomic(documents, serialize, max_workers=max_workers)
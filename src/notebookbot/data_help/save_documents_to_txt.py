@@ -1,26 +1,33 @@
 import os
-from typing import List
+from pathlib import Path
+from typing import List, Tuple
 from langchain.docstore.document import Document
+from notebookbot.data_help.atomic_writer import DEFAULT_MAX_WORKERS, WriteStats, write_files_atomic
+from notebookbot.data_help.document_ids import document_filename
+from notebookbot.data_help.save_documents_to_json import _document_id
 
-def save_documents_to_txt(documents: List[Document], directory: str = "../data/raw/txt"):
+def document_to_txt(doc: Document) -> bytes:
+    """Serialize a document in the TXT file format: a metadata header followed by the content"""
+    lines = ["Metadata:\n"]
+    lines.extend(f"{key}: {value}\n" for key, value in doc.metadata.items())
+    lines.append("\nContent:\n")
+    lines.append(doc.page_content)
+    return "".join(lines).encode("utf-8")
+
+def save_documents_to_txt(documents: List[Document],
+                          directory: str = "../data/raw/txt",
+                          max_workers: int = DEFAULT_MAX_WORKERS) -> WriteStats:
     """
     Save a list of LangChain documents as individual text files in the specified directory.
-    Metadata is included at the top of each file.
+    Metadata is included at the top of each file, and files are named after the document id.
+    Each file is written atomically (temp file, fsync, rename) on a worker pool, so a crash
+    never leaves a half-written file for load_txt_documents to pick up.
+    Returns:
+        WriteStats: Files and bytes written, and bytes per second.
     """
     os.makedirs(directory, exist_ok=True)
 
-    for doc in documents:
-        doc_id = doc.metadata.get("id", doc.metadata.get("source", doc.metadata.get("file_path")))
-        doc_title = doc.metadata.get("Title", doc.metadata.get("source", doc.metadata.get("file_path")))
-        if not doc_id:
-            raise ValueError("Document must have an 'id', 'source', or 'file_path' field in its metadata.")
+    def serialize(doc: Document) -> Tuple[Path, bytes]:
+        return Path(directory) / document_filename(_document_id(doc), ".txt"), document_to_txt(doc)
 
-        file_path = os.path.join(directory, f"{doc_title}.txt")
-        with open(file_path, "w", encoding="utf-8") as f:
-            # Write metadata
-            f.write("Metadata:\n")
-            for key, value in doc.metadata.items():
-                f.write(f"{key}: {value}\n")
-            f.write("\nContent:\n")
-            # Write content
-            f.write(doc.page_content)
+    return write_files_atomic(documents, serialize, max_workers=max_workers)
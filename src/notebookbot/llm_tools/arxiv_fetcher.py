@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import httpx
+from langchain.docstore.document import Document
+
+from notebookbot.clients.client_registry import ClientRegistry
+from notebookbot.data_help.document_ids import arxiv_document_id
+from notebookbot.data_help.document_store import DEFAULT_STORE_PATH, open_document_store
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+# arXiv asks clients of the export API to make no more than one request every three
+# seconds; searches are spaced accordingly. PDFs come from arxiv.org and are only
+# limited to DEFAULT_MAX_CONCURRENCY parallel downloads with slightly staggered starts
+DEFAULT_MIN_INTERVAL = 3.0
+DEFAULT_PDF_MIN_INTERVAL = 0.2
+DEFAULT_MAX_CONCURRENCY = 4
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_ARXIV = "{http://arxiv.org/schemas/atom}"
+_ARXIV_ID = re.compile(r"^(?:\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?$")
+_VERSIONED_ID = re.compile(r"^(?P<id>.+?)(?:v(?P<version>\d+))?$")
+
+
+def split_arxiv_id(entry_id: str) -> tuple:
+    """
+    Split an arXiv id or abs URL into the bare id and the version.
+    "http://arxiv.org/abs/2101.00001v2" -> ("2101.00001", 2); the version is 1 when absent.
+    """
+    entry_id = entry_id.rsplit("/abs/", 1)[-1]
+    match = _VERSIONED_ID.match(entry_id)
+    return match.group("id"), int(match.group("version") or 1)
+
+
+def is_arxiv_id_query(query: str) -> bool:
+    """Return True if the query is one or more arXiv ids rather than search terms"""
+    terms = query.split()
+    return bool(terms) and all(_ARXIV_ID.match(term) for term in terms)
+
+
+def _text(element, path: str) -> Optional[str]:
+    found = element.find(path)
+    return " ".join(found.text.split()) if found is not None and found.text else None
+
+
+def parse_arxiv_feed(feed: str) -> List[dict]:
+    """
+    Parse an arXiv API Atom feed.
+    Returns:
+        List[dict]: One entry per paper with arxiv_id, version, pdf_url and a metadata
+        dict in the format ArxivAPIWrapper produces (Published, Title, Authors, Summary, ...)
+        plus the stable document id and source.
+    """
+    entries = []
+    for entry in ET.fromstring(feed).iter(f"{_ATOM}entry"):
+        entry_id = _text(entry, f"{_ATOM}id")
+        if not entry_id:
+            # The API reports query errors as an entry without an id
+            continue
+        arxiv_id, version = split_arxiv_id(entry_id)
+        pdf_url = None
+        for link in entry.iter(f"{_ATOM}link"):
+            if link.get("title") == "pdf" or link.get("type") == "application/pdf":
+                pdf_url = link.get("href")
+        primary = entry.find(f"{_ARXIV}primary_category")
+        metadata = {
+            "id": arxiv_document_id(arxiv_id, version),
+            "source": "arXiv",
+            "Published": (_text(entry, f"{_ATOM}updated") or "")[:10],
+            "Title": _text(entry, f"{_ATOM}title"),
+            "Authors": ", ".join(_text(author, f"{_ATOM}name") or "" for author in entry.iter(f"{_ATOM}author")),
+            "Summary": _text(entry, f"{_ATOM}summary"),
+            "entry_id": entry_id,
+            "published_first_time": (_text(entry, f"{_ATOM}published") or "")[:10],
+            "comment": _text(entry, f"{_ARXIV}comment"),
+            "journal_ref": _text(entry, f"{_ARXIV}journal_ref"),
+            "doi": _text(entry, f"{_ARXIV}doi"),
+            "primary_category": primary.get("term") if primary is not None else None,
+            "categories": [category.get("term") for category in entry.iter(f"{_ATOM}category")],
+        }
+        entries.append({
+            "arxiv_id": arxiv_id,
+            "version": version,
+            "pdf_url": pdf_url or f"https://arxiv.org/pdf/{arxiv_id}v{version}",
+            "metadata": {key: value for key, value in metadata.items() if value not in (None, "")},
+        })
+    return entries
+
+
+def pdf_to_text(pdf_bytes: bytes) -> str:
+    """Extract the text of a PDF with PyMuPDF"""
+    import fitz
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
+        return "".join(page.get_text() for page in pdf)
+
+
+class _RateLimiter:
+    """Space out request starts by at least min_interval seconds, across threads and event loops"""
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def reserve(self) -> float:
+        """Reserve the next start slot and return how many seconds to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+            return start - now
+
+    async def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_limiters: Dict[tuple, _RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _shared_limiter(url: str, min_interval: float) -> _RateLimiter:
+    """
+    One limiter per host and interval, shared by all fetchers: concurrent searches (e.g.
+    parallel tool calls) together still respect arXiv's request rate.
+    """
+    key = (urlsplit(url).netloc, min_interval)
+    with _limiters_lock:
+        return _limiters.setdefault(key, _RateLimiter(min_interval))
+
+
+class ArxivFetcher:
+    """
+    Searches arXiv and downloads and parses the papers concurrently.
+    API searches are spaced by min_interval seconds (across all fetchers of the
+    process). PDF downloads are not bound by that interval: at most max_concurrency run
+    at once, their starts spaced by the much shorter pdf_min_interval, and PDF parsing
+    runs in worker threads. Parsed papers are kept in the DocumentStore under their
+    versioned arxiv: id, so a paper is downloaded and parsed once.
+    Requests go through the shared, pooled "arxiv" client of the ClientRegistry, so
+    connections are kept alive across searches.
+    """
+    def __init__(self,
+                 store_path: str = DEFAULT_STORE_PATH,
+                 api_url: str = ARXIV_API_URL,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 min_interval: float = DEFAULT_MIN_INTERVAL,
+                 doc_content_chars_max: Optional[int] = None,
+                 client: Optional[httpx.Client] = None,
+                 pdf_min_interval: float = DEFAULT_PDF_MIN_INTERVAL):
+        self.store = open_document_store(store_path)
+        self.api_url = api_url
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.pdf_min_interval = pdf_min_interval
+        self.doc_content_chars_max = doc_content_chars_max
+        self.client = client or ClientRegistry().client("arxiv")
+
+    async def _get(self, limiter: _RateLimiter, url: str, **kwargs) -> httpx.Response:
+        await limiter.wait()
+        # The pooled client is synchronous so it can be shared across event loops and threads
+        response = await asyncio.to_thread(self.client.get, url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def _search(self, limiter, query: str, max_results: int, categories: Sequence[str],
+                      sort_by: str, sort_order: str) -> List[dict]:
+        if is_arxiv_id_query(query):
+            params = {"id_list": ",".join(query.split()), "max_results": max_results}
+        else:
+            search_query = query
+            if categories:
+                search_query = f"({search_query}) AND ({' OR '.join(f'cat:{c}' for c in categories)})"
+            params = {"search_query": search_query, "max_results": max_results,
+                      "sortBy": sort_by, "sortOrder": sort_order}
+        response = await self._get(limiter, self.api_url, params=params)
+        return parse_arxiv_feed(response.text)
+
+    async def _fetch_paper(self, semaphore, entry: dict) -> Optional[Document]:
+        cached = self.store.get(arxiv_document_id(entry["arxiv_id"], entry["version"]))
+        if cached is not None:
+            logging.info(f"arXiv paper already stored: {entry['arxiv_id']}v{entry['version']}")
+            return Document(page_content=cached.page_content, metadata={**cached.metadata, **entry["metadata"]})
+        try:
+            async with semaphore:
+                limiter = _shared_limiter(entry["pdf_url"], self.pdf_min_interval)
+                response = await self._get(limiter, entry["pdf_url"])
+            text = await asyncio.to_thread(pdf_to_text, response.content)
+        except Exception as e:
+            logging.error(f"Error fetching arXiv paper {entry['arxiv_id']}v{entry['version']}: {e}")
+            return None
+        return Document(page_content=text, metadata=entry["metadata"])
+
+    async def aload(self,
+                    query: str,
+                    max_results: int = 10,
+                    categories: Sequence[str] = (),
+                    sort_by: str = "relevance",
+                    sort_order: str = "descending") -> List[Document]:
+        """
+        Search arXiv and return the papers as Documents with their full text.
+        New papers are added to the DocumentStore in one batched append; papers that
+        fail to download or parse are logged and skipped.
+        Args:
+            query (str): Search terms, a field query such as "au:vaswani", or arXiv ids.
+            max_results (int): Maximum number of papers.
+            categories (Sequence[str]): Restrict the search to these arXiv categories.
+            sort_by (str): "relevance", "lastUpdatedDate" or "submittedDate".
+            sort_order (str): "ascending" or "descending".
+        Returns:
+            List[Document]: The papers, in search order.
+        """
+        start = time.perf_counter()
+        limiter = _shared_limiter(self.api_url, self.min_interval)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        entries = await self._search(limiter, query, max_results, categories, sort_by, sort_order)
+        papers = await asyncio.gather(*(
+            self._fetch_paper(semaphore, entry) for entry in entries
+        ))
+        documents = [doc for doc in papers if doc is not None]
+        # Stored papers are identical to their record and are not written again
+        self.store.put_many(documents)
+        if self.doc_content_chars_max is not None:
+            documents = [
+                Document(page_content=doc.page_content[:self.doc_content_chars_max], metadata=doc.metadata)
+                for doc in documents
+            ]
+        logging.info(f"Fetched {len(documents)} of {len(entries)} arXiv papers in {time.perf_counter() - start:.2f}s")
+        return documents
+
+    def load(self, query: str, **kwargs) -> List[Document]:
+        """Synchronous aload; safe to call from inside a running event loop"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aload(query, **kwargs))
+        result = {}
+
+        def run():
+            try:
+                result["documents"] = asyncio.run(self.aload(query, **kwargs))
+            except BaseException as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        if "error" in result:
+            raise result["error"]
+        return result["documents"]
@@ -1,12 +1,9 @@
 from typing import Literal
-import uuid
 
-from langchain_community.document_loaders import ArxivLoader
-from langchain_community.utilities import ArxivAPIWrapper
 from langchain_core.tools import tool
-from notebookbot.data_help.save_documents_to_json import save_documents_to_json
-from notebookbot.data_help.save_documents_to_txt import save_documents_to_txt
-from notebookbot.chromadb.chromadb_manager import ChromaDBManager
+
+# Characters of each paper returned to the model; the full text is stored and embedded
+RETURNED_CONTENT_CHARS = 4000
 
 @tool
 def arxiv_search(query: str,
@@ -30,20 +27,21 @@ def arxiv_search(query: str,
                         sort_order: Literal["ascending", "descending"] = "descending"
                         ) -> list:
             """
-            arxiv = ArxivAPIWrapper(query=query, 
-                                    max_results=max_results, 
-                                    load_max_refs=load_max_refs,
-                                    categories=categories,
-                                    sort_order=sort_order,
-                                    sort_by=sort_by)
-            docs = arxiv.load(query)
-            for i, doc in enumerate(docs):
-                doc.metadata["id"] = str(uuid.uuid4())
-                doc.metadata["source"] = "arXiv"
-            save_documents_to_json(docs)
-            save_documents_to_txt(docs)
+            # Imported on first use: chromadb, httpx and PyMuPDF are not needed to start the chat
+            from langchain.docstore.document import Document
+            from notebookbot.chromadb.chromadb_manager import ChromaDBManager
+            from notebookbot.llm_tools.arxiv_fetcher import ArxivFetcher
+
+            # Papers are downloaded and parsed concurrently and added to the document store;
+            # already stored versions are read from it. TXT copies are exported on demand
+            docs = ArxivFetcher().load(query,
+                                       max_results=min(max_results, load_max_refs),
+                                       categories=categories,
+                                       sort_by=sort_by,
+                                       sort_order=sort_order)
             chromadb_manager = ChromaDBManager()
-            chromadb_manager.reset_collection()
-            chromadb_manager.add_documents(docs)
-            chromadb_manager.load_and_embed_txt_documents()
-            return docs
\ No newline at end of file
+            # Papers have stable arxiv:<id>v<version> ids, so a paper that is already stored
+            # (by an earlier search or as a TXT/JSON file) is skipped instead of embedded again
+            chromadb_manager.sync_documents(docs, scope="arxiv", delete_stale=False)
+            return [Document(page_content=doc.page_content[:RETURNED_CONTENT_CHARS], metadata=doc.metadata)
+                    for doc in docs]
@@ -1,32 +1,12 @@
 from langchain_core.tools import tool
-from notebookbot.chromadb.chromadb_manager import ChromaDBManager
-from typing import Literal, Optional
+from notebookbot.chromadb.metadata_filters import build_where
+from typing import List, Literal, Optional
 
-@tool
-def query_documents(
-    query: str, 
-    n_results: int = 5,
-    return_fields: Optional[Literal["title", "authors", "summary", "metadata", "content", "all"]] = "all"
-) -> str:
-    """
-    Search through previously saved documents using semantic search.
-    Args:
-        query: The search query
-        n_results: Number of results to return (default: 5)
-        return_fields: What information to return from the documents. Options:
-            - "title": Return only the titles
-            - "authors": Return titles and authors
-            - "summary": Return titles and summaries
-            - "metadata": Return all metadata (published date, authors, title, source)
-            - "content": Return title and full content
-            - "all": Return all available information (default)
-    """
-    db_manager = ChromaDBManager()
-    results = db_manager.query_documents(query, n_results)
-    
-    # Format results based on requested fields
+def _format_results(results: dict, return_fields: str) -> List[str]:
+    """Format the hits of a single-query result according to return_fields"""
     formatted_results = []
     for doc, metadata in zip(results['documents'][0], results['metadatas'][0]):
+        metadata = metadata or {}
         if return_fields == "title":
             formatted_results.append(
                 f"Title: {metadata.get('Title', 'Unknown')}"
@@ -62,5 +42,64 @@ def query_documents(
                 f"Summary: {metadata.get('Summary', 'No summary available')}\n"
                 f"Content: {doc[:500]}..."  # First 500 chars of content
             )
-    
-    return "\n\n".join(formatted_results) 
\ No newline at end of file
+    return formatted_results
+
+@tool
+def query_documents(
+    query: str,
+    n_results: int = 5,
+    return_fields: Optional[Literal["title", "authors", "summary", "metadata", "content", "all"]] = "all",
+    queries: Optional[List[str]] = None,
+    fuse: bool = False,
+    mode: Literal["hybrid", "vector", "lexical"] = "hybrid",
+    published_after: Optional[str] = None,
+    published_before: Optional[str] = None,
+    author: Optional[str] = None,
+    source: Optional[str] = None,
+    category: Optional[str] = None
+) -> str:
+    """
+    Search through previously saved documents using semantic and keyword search.
+    Args:
+        query: The search query
+        n_results: Number of results to return (default: 5)
+        return_fields: What information to return from the documents. Options:
+            - "title": Return only the titles
+            - "authors": Return titles and authors
+            - "summary": Return titles and summaries
+            - "metadata": Return all metadata (published date, authors, title, source)
+            - "content": Return title and full content
+            - "all": Return all available information (default)
+        queries: Additional queries to run in the same batch as `query`. Results are
+            returned per query, and each document is listed only once.
+        fuse: With `queries`, merge all queries into a single ranked list instead.
+        mode: Retrieval mode. Options:
+            - "hybrid": Combine keyword and semantic matches (default)
+            - "vector": Semantic matches only
+            - "lexical": Exact keyword matches only; fastest, best for arXiv ids,
+              author names and specific terms
+        published_after: Only documents published on or after this date ("YYYY", "YYYY-MM" or "YYYY-MM-DD")
+        published_before: Only documents published on or before this date ("YYYY", "YYYY-MM" or "YYYY-MM-DD")
+        author: Only documents by this author (full name, or last name only)
+        source: Only documents from this source, e.g. "arXiv"
+        category: Only documents in this arXiv category, e.g. "cs.CL"
+    """
+    # Imported on first use, so loading the tool does not load chromadb
+    from notebookbot.chromadb.chromadb_manager import ChromaDBManager
+
+    db_manager = ChromaDBManager()
+    where = build_where(published_after, published_before, author, source, category)
+    if not queries:
+        results = db_manager.query_documents(query, n_results, mode=mode, where=where)
+        return "\n\n".join(_format_results(results, return_fields))
+
+    all_queries = [query] + list(queries)
+    if fuse:
+        results = db_manager.query_many(all_queries, n_results, fuse=True, mode=mode, where=where)
+        return "\n\n".join(_format_results(results, return_fields))
+
+    sections = []
+    for batch_query, results in zip(all_queries, db_manager.query_many(all_queries, n_results, dedupe=True, mode=mode, where=where)):
+        formatted = _format_results(results, return_fields) or ["No new results."]
+        sections.append(f"Results for '{batch_query}':\n\n" + "\n\n".join(formatted))
+    return "\n\n".join(sections)
@@ -6,105 +6,144 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.insert(0, project_root)
 
 # Standard library imports
-from typing import Annotated, Literal, TypedDict
-
-# Third-party imports
-from dotenv import load_dotenv
-from langchain_anthropic import ChatAnthropic
-from langchain_community.tools import BraveSearch
-from langchain_core.messages import AIMessage, HumanMessage
-from langchain_core.tools import tool
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import END, MessagesState, START, StateGraph
-from langgraph.prebuilt import ToolNode
-
-# Local application imports
-from notebookbot.authentication.authentication_manager import AuthenticationManager
-from notebookbot.authentication.authentication_setup import AuthenticationSetup
-from notebookbot.data_help.save_documents_to_json import save_documents_to_json
-from notebookbot.llm_tools.arxiv_search import arxiv_search
-from notebookbot.llm_tools.query_documents import query_documents
-def main():
+import argparse
+import asyncio
+import importlib
+import logging
+import threading
+from typing import Sequence
+
+# langchain, langgraph, chromadb and the model clients take seconds to import, so they
+# are imported in main() (and by the tools on first use) rather than at module load:
+# importing this module, e.g. in a notebook kernel, stays cheap.
+PRELOAD_MODULES = (
+    "notebookbot.agent.agent_graph",
+    "notebookbot.agent.sqlite_checkpointer",
+    "notebookbot.agent.history_compaction",
+    "langchain_anthropic",
+    "notebookbot.chromadb.chromadb_manager",
+    "notebookbot.llm_tools.arxiv_fetcher",
+)
+
+
+def preload(modules: Sequence[str] = PRELOAD_MODULES) -> threading.Thread:
+    """Import modules on a background thread, e.g. while the user types the password"""
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                # The import is retried, and the error raised, where the module is used
+                logging.debug(f"Preloading {name} failed: {e}")
+
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
+
+
+DEFAULT_THREAD_ID = "default"
+# Same as the defaults of notebookbot.agent.sqlite_checkpointer/history_compaction,
+# which are too heavy to import just for --help
+DEFAULT_HISTORY_DB = "./notebookbot_history.db"
+DEFAULT_MAX_PROMPT_TOKENS = 8000
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Chat with NotebookBot")
+    parser.add_argument("--no-stream", dest="stream", action="store_false",
+                        help="Print each answer once the turn is done")
+    parser.add_argument("--thread", default=DEFAULT_THREAD_ID,
+                        help="The conversation to continue or start")
+    parser.add_argument("--history-db", default=DEFAULT_HISTORY_DB,
+                        help="SQLite file of the conversation histories")
+    parser.add_argument("--max-prompt-tokens", type=int, default=DEFAULT_MAX_PROMPT_TOKENS,
+                        help="Budget for the history sent to the model")
+    return parser.parse_args(argv)
+
+
+def main(stream: bool = True, thread_id: str = DEFAULT_THREAD_ID,
+         history_db: str = DEFAULT_HISTORY_DB, max_prompt_tokens: int = DEFAULT_MAX_PROMPT_TOKENS):
+    # The heavy imports run while authenticate() waits for the password; the imports
+    # below then mostly find the modules already loaded
+    preload()
+    from notebookbot.authentication.authentication_setup import AuthenticationSetup
+
     # Get API keys
     auth = AuthenticationSetup()
     if not auth.authenticate():
         return
-        
+
+    from notebookbot.agent.sqlite_checkpointer import SqliteCheckpointer
+
     try:
         api_keys = auth.get_api_keys()
-        
-        # Setup LangChain
-        tools = [arxiv_search, query_documents]
-        tool_node = ToolNode(tools)
-
-        model = ChatAnthropic(
-            api_key=api_keys.anthropic,
-            model="claude-3-5-sonnet-20240620",
-            temperature=0
-        ).bind_tools(tools)
-
-        # Define the function that determines whether to continue or not
-        def should_continue(state: MessagesState) -> Literal["tools", END]:
-            messages = state['messages']
-            last_message = messages[-1]
-            if last_message.tool_calls:
-                return "tools"
-            return END
-
-        # Define the function that calls the model
-        def call_model(state: MessagesState):
-            messages = state['messages']
-            response = model.invoke(messages)
-            return {"messages": [response]}
-
-        # Define a new graph
-        workflow = StateGraph(MessagesState)
-
-        # Define the two nodes we will cycle between
-        workflow.add_node("agent", call_model)
-        workflow.add_node("tools", tool_node)
-
-        # Set the entrypoint as `agent`
-        # This means that this node is the first one called
-        workflow.add_edge(START, "agent")
-
-        # We now add a conditional edge
-        workflow.add_conditional_edges(
-            # First, we define the start node. We use `agent`.
-            # This means these are the edges taken after the `agent` node is called.
-            "agent",
-            # Next, we pass in the function that will determine which node is called next.
-            should_continue,
-        )
-
-        # We now add a normal edge from `tools` to `agent`.
-        # This means that after `tools` is called, `agent` node is called next.
-        workflow.add_edge("tools", 'agent')
-
-        # Initialize memory to persist state between graph runs
-        checkpointer = MemorySaver()
-
-        # Finally, we compile it!
-        # This compiles it into a LangChain Runnable,
-        # meaning you can use it as you would any other runnable.
-        # Note that we're (optionally) passing the memory when compiling the graph
-        app = workflow.compile(checkpointer=checkpointer)
-
-        print("\nChat interface ready! Type 'quit' to exit.")
-        while True:
-            user_input = input("\nYou: ")
-            if user_input.lower() in ['quit', 'exit']:
-                break
-
-            response = app.invoke(
-                {"messages": [HumanMessage(content=user_input)]},
-                config={"configurable": {"thread_id": 42}}
-            )
-            print("\nAssistant:", response["messages"][-1].content)
+
+        # Conversations persist on disk per thread id
+        with SqliteCheckpointer(history_db) as checkpointer:
+            app = build_chat_app(api_keys, checkpointer, max_prompt_tokens)
+            asyncio.run(chat_loop(app, thread_id=thread_id, stream=stream))
 
     except Exception as e:
         print(f"Error: {e}")
         return
 
+
+def build_chat_app(api_keys, checkpointer, max_prompt_tokens: int = DEFAULT_MAX_PROMPT_TOKENS):
+    """
+    Compile the chat graph: Claude with the arXiv and document tools.
+    Args:
+        api_keys: The authenticated API keys (see AuthenticationSetup.get_api_keys).
+        checkpointer: Persists the conversations.
+        max_prompt_tokens (int): Budget for the history sent to the model.
+    Returns:
+        The compiled graph.
+    """
+    from notebookbot.agent.agent_graph import build_agent_graph
+    from notebookbot.agent.history_compaction import HistoryCompactor
+    from notebookbot.clients.client_registry import chat_anthropic
+    from notebookbot.llm_tools.arxiv_search import arxiv_search
+    from notebookbot.llm_tools.query_documents import query_documents
+
+    # Setup LangChain
+    tools = [arxiv_search, query_documents]
+
+    # Model calls share the pooled, keep-alive "anthropic" HTTP client
+    model = chat_anthropic(
+        api_keys.anthropic,
+        model="claude-3-5-sonnet-20240620",
+        temperature=0
+    ).bind_tools(tools)
+
+    # Old tool outputs are compacted so the prompt stays within budget as a
+    # conversation grows
+    return build_agent_graph(model, tools, checkpointer=checkpointer,
+                             compactor=HistoryCompactor(max_tokens=max_prompt_tokens))
+
+
+async def chat_loop(app, thread_id, stream: bool = True):
+    """
+    Read user messages and answer them until the user quits.
+    With stream, model tokens and tool progress are printed as they arrive;
+    otherwise the answer is printed once the whole turn is done.
+    """
+    from notebookbot.agent.agent_graph import message_text, run_turn, stream_turn
+
+    print("\nChat interface ready! Type 'quit' to exit.")
+    while True:
+        # input() runs on a thread so the event loop (and its HTTP clients) stay responsive
+        user_input = await asyncio.to_thread(input, "\nYou: ")
+        if user_input.lower() in ['quit', 'exit']:
+            break
+
+        if stream:
+            print("\nAssistant: ", end="", flush=True)
+            await stream_turn(app, user_input, thread_id)
+            print()
+        else:
+            response = await run_turn(app, user_input, thread_id)
+            print("\nAssistant:", message_text(response))
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(stream=args.stream, thread_id=args.thread, history_db=args.history_db,
+         max_prompt_tokens=args.max_prompt_tokens)
@@ -0,0 +1,89 @@
+import os
+import sys
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+# Standard library imports
+import argparse
+
+from notebookbot.scripts.notebookbot_run import DEFAULT_HISTORY_DB, DEFAULT_MAX_PROMPT_TOKENS, build_chat_app, preload
+
+# Same as the defaults of notebookbot.agent.session_server
+DEFAULT_MAX_CONCURRENT_TURNS = 16
+DEFAULT_MAX_QUEUED_PER_SESSION = 2
+DEFAULT_MAX_SESSIONS = 1000
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve NotebookBot to many users with a web chat")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7860)
+    parser.add_argument("--history-db", default=DEFAULT_HISTORY_DB,
+                        help="SQLite file of the conversation histories")
+    parser.add_argument("--max-prompt-tokens", type=int, default=DEFAULT_MAX_PROMPT_TOKENS,
+                        help="Budget for the history sent to the model")
+    parser.add_argument("--max-concurrent-turns", type=int, default=DEFAULT_MAX_CONCURRENT_TURNS,
+                        help="Turns running at once over all sessions")
+    parser.add_argument("--max-queued-per-session", type=int, default=DEFAULT_MAX_QUEUED_PER_SESSION,
+                        help="Messages a session may have waiting")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS,
+                        help="Open sessions at once")
+    return parser.parse_args(argv)
+
+
+def gradio_app(server):
+    """
+    The web chat of a SessionServer: every browser session gets its own server session
+    (and conversation), and answers stream in as they are generated.
+    Args:
+        server (SessionServer): Serves the turns.
+    Returns:
+        gradio.ChatInterface: The app, to launch().
+    """
+    import gradio as gr
+
+    from notebookbot.agent.session_server import ServerBusy
+
+    async def respond(message: str, history, request: gr.Request):
+        text = ""
+        try:
+            async for chunk in server.stream(request.session_hash, message):
+                text += chunk
+                yield text
+        except ServerBusy as e:
+            raise gr.Error(str(e))
+
+    return gr.ChatInterface(respond, title="NotebookBot")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    preload()
+    from notebookbot.authentication.authentication_setup import AuthenticationSetup
+
+    # Get API keys
+    auth = AuthenticationSetup()
+    if not auth.authenticate():
+        return
+
+    from notebookbot.agent.session_server import SessionServer
+    from notebookbot.agent.sqlite_checkpointer import SqliteCheckpointer
+
+    # One graph, model client, tool pool and ChromaDBManager for all sessions
+    with SqliteCheckpointer(args.history_db) as checkpointer:
+        app = build_chat_app(auth.get_api_keys(), checkpointer, args.max_prompt_tokens)
+        server = SessionServer(app,
+                               max_concurrent_turns=args.max_concurrent_turns,
+                               max_queued_per_session=args.max_queued_per_session,
+                               max_sessions=args.max_sessions)
+        demo = gradio_app(server)
+        # Admission control is done by the SessionServer, so gradio's own queue
+        # does not limit concurrency
+        demo.queue(default_concurrency_limit=None)
+        demo.launch(server_name=args.host, server_port=args.port)
+
+
+if __name__ == "__main__":
+    main()
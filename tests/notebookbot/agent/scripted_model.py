@@ -0,0 +1,92 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    A chat model that replays scripted responses, for tests, load tests and benchmarks.
+    `script` is either a list of AIMessages, returned in order (the last one repeats),
+    or a function from the conversation to the next AIMessage. Responses may contain
+    tool_calls. `latency` simulates the time to the first token and `token_delay` the
+    time between streamed tokens; async calls sleep without blocking the event loop.
+    """
+    script: Any
+    latency: float = 0.0
+    token_delay: float = 0.0
+
+    _calls: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def bind_tools(self, tools, **kwargs) -> "ScriptedChatModel":
+        # The script decides which tools are called
+        return self
+
+    def _next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        with self._lock:
+            index = self._calls
+            self._calls += 1
+        if callable(self.script):
+            return self.script(messages)
+        return self.script[min(index, len(self.script) - 1)]
+
+    @staticmethod
+    def _chunks(message: AIMessage) -> List[AIMessageChunk]:
+        """The message as word chunks followed by one chunk carrying its tool calls"""
+        content = message.content if isinstance(message.content, str) else ""
+        words = content.split(" ")
+        chunks = [AIMessageChunk(content=word if i == 0 else " " + word) for i, word in enumerate(words) if content]
+        if message.tool_calls:
+            chunks.append(AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ]))
+        return chunks or [AIMessageChunk(content="")]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._next_message(messages)
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._next_message(messages)
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        message = self._next_message(messages)
+        time.sleep(self.latency)
+        for chunk in self._chunks(message):
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+            time.sleep(self.token_delay)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._next_message(messages)
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(message):
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+            await asyncio.sleep(self.token_delay)
+
+
+def tool_call(name: str, args: Optional[dict] = None, call_id: Optional[str] = None) -> dict:
+    """A tool call for a scripted AIMessage"""
+    return {"name": name, "args": args or {}, "id": call_id or f"call_{name}", "type": "tool_call"}
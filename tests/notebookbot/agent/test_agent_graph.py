@@ -0,0 +1,61 @@
+import asyncio
+import io
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+
+from notebookbot.agent.agent_graph import TerminalPrinter, build_agent_graph, run_turn, stream_turn
+
+from tests.notebookbot.agent.scripted_model import ScriptedChatModel, tool_call
+
+TOOL_SECONDS = 0.3
+tool_runs = []
+
+
+@tool
+def slow_lookup(topic: str) -> str:
+    """Look up a topic slowly."""
+    start = time.perf_counter()
+    time.sleep(TOOL_SECONDS)
+    tool_runs.append((start, time.perf_counter()))
+    return f"notes on {topic}"
+
+
+def two_tool_script():
+    return [
+        AIMessage(content="", tool_calls=[
+            tool_call("slow_lookup", {"topic": "bm25"}, "call_1"),
+            tool_call("slow_lookup", {"topic": "rrf"}, "call_2"),
+        ]),
+        AIMessage(content="Both topics are covered."),
+    ]
+
+
+def test_stream_turn_prints_tokens_and_tool_progress():
+    app = build_agent_graph(ScriptedChatModel(script=two_tool_script()), [slow_lookup], checkpointer=MemorySaver())
+    out = io.StringIO()
+    tool_runs.clear()
+
+    final = asyncio.run(stream_turn(app, "compare", thread_id="t1", printer=TerminalPrinter(out)))
+
+    assert final.content == "Both topics are covered."
+    output = out.getvalue()
+    assert output.count("[slow_lookup] running") == 2
+    assert output.count("[slow_lookup] done") == 2
+    assert output.endswith("Both topics are covered.")
+    # Independent tool calls of one turn run concurrently
+    (first_start, first_end), (second_start, second_end) = tool_runs
+    assert max(first_start, second_start) < min(first_end, second_end)
+
+
+def test_run_turn_continues_thread():
+    model = ScriptedChatModel(script=lambda messages: AIMessage(content=f"{len(messages)} messages"))
+    app = build_agent_graph(model, [slow_lookup], checkpointer=MemorySaver())
+
+    async def conversation():
+        await run_turn(app, "first", thread_id=7)
+        return await run_turn(app, "second", thread_id=7)
+
+    assert asyncio.run(conversation()).content == "3 messages"
@@ -0,0 +1,103 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+
+from notebookbot.agent.agent_graph import build_agent_graph, run_turn, thread_config
+from notebookbot.agent.history_compaction import HistoryCompactor, estimate_tokens
+from notebookbot.agent.sqlite_checkpointer import SqliteCheckpointer
+
+from tests.notebookbot.agent.scripted_model import ScriptedChatModel, tool_call
+
+
+@tool
+def query_documents(query: str) -> str:
+    """Return long document excerpts."""
+    return f"excerpt about {query}: " + "x" * 2000
+
+
+def lookup_then_answer(messages):
+    # Look the question up once, then answer with the size of the prompt
+    if isinstance(messages[-1], HumanMessage):
+        return AIMessage(content="", tool_calls=[tool_call("query_documents", {"query": messages[-1].content},
+                                                           f"call_{len(messages)}")])
+    return AIMessage(content=f"{estimate_tokens(messages)} tokens")
+
+
+def test_history_survives_restart_per_thread(tmp_path):
+    db = str(tmp_path / "history.db")
+    model = ScriptedChatModel(script=lambda messages: AIMessage(content=f"{len(messages)} messages"))
+
+    async def first_session():
+        with SqliteCheckpointer(db) as checkpointer:
+            app = build_agent_graph(model, [query_documents], checkpointer=checkpointer)
+            await run_turn(app, "hello", thread_id="a")
+            await run_turn(app, "hello", thread_id="b")
+            await run_turn(app, "again", thread_id="a")
+
+    async def second_session():
+        with SqliteCheckpointer(db) as checkpointer:
+            app = build_agent_graph(model, [query_documents], checkpointer=checkpointer)
+            return await run_turn(app, "after restart", thread_id="a"), checkpointer.thread_ids()
+
+    asyncio.run(first_session())
+    answer, threads = asyncio.run(second_session())
+    assert answer.content == "5 messages"
+    assert threads == ["a", "b"]
+
+
+def test_checkpoints_are_bounded_per_thread(tmp_path):
+    model = ScriptedChatModel(script=lambda messages: AIMessage(content="ok"))
+    with SqliteCheckpointer(str(tmp_path / "history.db"), max_checkpoints=3) as checkpointer:
+        app = build_agent_graph(model, [query_documents], checkpointer=checkpointer)
+        for i in range(5):
+            asyncio.run(run_turn(app, f"message {i}", thread_id="t"))
+        assert len(list(checkpointer.list(thread_config("t")))) == 3
+        # The latest checkpoint still holds the whole conversation
+        assert len(app.get_state(thread_config("t")).values["messages"]) == 10
+        checkpointer.delete_thread("t")
+        assert checkpointer.get_tuple(thread_config("t")) is None
+
+
+def test_compactor_truncates_old_tool_output_and_keeps_current_turn():
+    old_turn = [
+        HumanMessage(content="first"),
+        AIMessage(content="", tool_calls=[tool_call("query_documents", {"query": "first"}, "c1")]),
+        ToolMessage(content="y" * 4000, tool_call_id="c1"),
+        AIMessage(content="done"),
+    ]
+    current_turn = [
+        HumanMessage(content="second"),
+        AIMessage(content="", tool_calls=[tool_call("query_documents", {"query": "second"}, "c2")]),
+        ToolMessage(content="z" * 4000, tool_call_id="c2"),
+    ]
+    compacted = HistoryCompactor(max_tokens=1200, tool_excerpt_chars=100)(old_turn + current_turn)
+
+    assert len(compacted[2].content) < 200
+    assert "omitted" in compacted[2].content
+    assert compacted[4:] == current_turn
+    assert estimate_tokens(compacted) <= 1200
+
+
+def test_compactor_summarizes_dropped_turns():
+    messages = []
+    for i in range(4):
+        messages += [HumanMessage(content=f"question {i} " + "q" * 400), AIMessage(content="a" * 400)]
+    compacted = HistoryCompactor(max_tokens=250)(messages)
+
+    assert compacted[0].content.startswith("Earlier in this conversation the user asked: question 0")
+    assert compacted[-2:] == messages[-2:]
+    assert estimate_tokens(compacted) < estimate_tokens(messages)
+
+
+def test_prompt_stays_within_budget_as_conversation_grows(tmp_path):
+    with SqliteCheckpointer(str(tmp_path / "history.db")) as checkpointer:
+        app = build_agent_graph(ScriptedChatModel(script=lookup_then_answer), [query_documents],
+                                checkpointer=checkpointer, compactor=HistoryCompactor(max_tokens=1500))
+
+        async def conversation():
+            return [await run_turn(app, f"topic {i}", thread_id="long") for i in range(6)]
+
+        answers = asyncio.run(conversation())
+    prompt_tokens = [int(answer.content.split()[0]) for answer in answers]
+    assert max(prompt_tokens) <= 1500
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from notebookbot.agent.agent_graph import build_agent_graph
+from notebookbot.agent.session_server import ServerBusy, SessionServer, percentile
+
+from tests.notebookbot.agent.scripted_model import ScriptedChatModel
+
+
+def echo_model(latency: float = 0.0) -> ScriptedChatModel:
+    # Answers with the user's message and the number of user messages in the thread
+    def answer(messages):
+        questions = [message for message in messages if isinstance(message, HumanMessage)]
+        return AIMessage(content=f"{questions[-1].content} #{len(questions)}")
+    return ScriptedChatModel(script=answer, latency=latency)
+
+
+def make_server(latency: float = 0.0, **kwargs) -> SessionServer:
+    return SessionServer(build_agent_graph(echo_model(latency), [], checkpointer=MemorySaver()), **kwargs)
+
+
+def test_sessions_have_separate_threads_and_ordered_turns():
+    server = make_server(latency=0.05)
+
+    async def run():
+        # Both messages of a session are queued at once and answered in order
+        futures = [server.submit(session, f"{session}-{i}") for i in range(2) for session in ("a", "b")]
+        return [message.content for message in await asyncio.gather(*futures)]
+
+    assert asyncio.run(run()) == ["a-0 #1", "b-0 #1", "a-1 #2", "b-1 #2"]
+    assert server.stats()["completed_turns"] == 4
+
+
+def test_stream_yields_answer_tokens():
+    server = make_server()
+
+    async def run():
+        return "".join([chunk async for chunk in server.stream("s", "hello there")])
+
+    assert asyncio.run(run()) == "hello there #1"
+
+
+def test_full_session_queue_and_session_limit_are_rejected():
+    server = make_server(latency=0.2, max_queued_per_session=1, max_sessions=1)
+
+    async def run():
+        first = server.submit("a", "first")
+        await asyncio.sleep(0.05)  # the first turn is running, its queue slot is free again
+        second = server.submit("a", "second")
+        with pytest.raises(ServerBusy):
+            server.submit("a", "third")
+        with pytest.raises(ServerBusy):
+            server.submit("b", "other session")
+        return await asyncio.gather(first, second)
+
+    assert [message.content for message in asyncio.run(run())] == ["first #1", "second #2"]
+    assert server.stats()["rejected_requests"] == 2
+
+
+def test_concurrent_turns_are_capped():
+    server = make_server(latency=0.1, max_concurrent_turns=2)
+    peak = []
+
+    async def run():
+        futures = [server.submit(f"s{i}", "hi") for i in range(6)]
+        while not all(future.done() for future in futures):
+            peak.append(server.stats()["running_turns"])
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert max(peak) == 2
+
+
+def test_percentile():
+    assert percentile([], 99) == 0.0
+    assert percentile(list(range(1, 101)), 50) == 50
+    assert percentile(list(range(1, 101)), 99) == 99
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+from langchain_core.tools import tool
+
+from notebookbot.agent.resource_locks import ReadWriteLock
+from notebookbot.agent.tool_executor import ToolExecutor
+
+from tests.notebookbot.agent.scripted_model import tool_call
+
+runs = []
+
+
+@tool
+def fetch(query: str) -> str:
+    """Fetch something slowly."""
+    start = time.perf_counter()
+    time.sleep(0.2)
+    runs.append((query, start, time.perf_counter()))
+    return f"result for {query}"
+
+
+@tool
+def broken(query: str) -> str:
+    """Always fails."""
+    raise RuntimeError("backend down")
+
+
+def overlapping(intervals) -> bool:
+    return max(start for start, _ in intervals) < min(end for _, end in intervals)
+
+
+def test_calls_run_in_parallel_and_duplicates_once():
+    runs.clear()
+    calls = [tool_call("fetch", {"query": "a"}, "1"), tool_call("fetch", {"query": "b"}, "2"),
+             tool_call("fetch", {"query": "a"}, "3")]
+
+    messages = asyncio.run(ToolExecutor([fetch]).arun(calls))
+
+    assert [m.tool_call_id for m in messages] == ["1", "2", "3"]
+    assert [m.content for m in messages] == ["result for a", "result for b", "result for a"]
+    assert sorted(query for query, _, _ in runs) == ["a", "b"]
+    assert overlapping([(start, end) for _, start, end in runs])
+
+
+def test_exclusive_resources_serialize_calls():
+    runs.clear()
+    executor = ToolExecutor([fetch], exclusive_resources={"fetch": ["collection"]})
+
+    executor.run([tool_call("fetch", {"query": "a"}, "1"), tool_call("fetch", {"query": "b"}, "2")])
+
+    assert not overlapping([(start, end) for _, start, end in runs])
+
+
+def test_errors_become_tool_messages():
+    executor = ToolExecutor([broken])
+
+    failed, unknown = executor.run([tool_call("broken", {"query": "a"}, "1"), tool_call("missing", {}, "2")])
+
+    assert failed.status == "error" and "backend down" in failed.content
+    assert unknown.status == "error" and unknown.tool_call_id == "2"
+
+
+def test_writer_waits_for_readers():
+    lock = ReadWriteLock()
+    events = []
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    with lock.read():
+        thread = threading.Thread(target=writer)
+        thread.start()
+        time.sleep(0.05)
+        events.append("read done")
+    thread.join()
+
+    assert events == ["read done", "write"]
@@ -0,0 +1,93 @@
+import getpass
+import os
+
+import pytest
+
+from notebookbot.authentication.api_key_encryption_manager import APIKeyEncryptionManager
+from notebookbot.authentication.authentication_setup import AuthenticationSetup
+from notebookbot.authentication.key_agent import (
+    KEY_AGENT_ENV,
+    PASSWORD_ENV,
+    PASSWORD_FD_ENV,
+    KeyAgent,
+    KeyAgentClient,
+    headless_password,
+)
+from notebookbot.authentication.session_keyring import SessionKeyring
+
+PASSWORD = "correct-horse-battery-staple!"
+KEYS = {"OPENAI_API_KEY": "sk-openai", "ANTHROPIC_API_KEY": "sk-anthropic"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_session(monkeypatch):
+    for name in (KEY_AGENT_ENV, PASSWORD_ENV, PASSWORD_FD_ENV):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(AuthenticationSetup, "_instance", None)
+    monkeypatch.setattr(AuthenticationSetup, "_api_keys", None)
+    monkeypatch.setattr(AuthenticationSetup, "_is_authenticated", False)
+    monkeypatch.setattr(SessionKeyring, "_instance", None)
+
+    def no_prompt(*args, **kwargs):
+        raise AssertionError("prompted in headless mode")
+
+    monkeypatch.setattr(getpass, "getpass", no_prompt)
+    monkeypatch.setattr("builtins.input", no_prompt)
+
+
+@pytest.fixture
+def env_file(tmp_path):
+    path = tmp_path / ".env"
+    manager = APIKeyEncryptionManager(PASSWORD, str(path))
+    for name, value in KEYS.items():
+        manager.encrypt_and_store_key(name, value)
+    SessionKeyring().lock()
+    return path
+
+
+@pytest.fixture
+def agent(tmp_path):
+    agent = KeyAgent(str(tmp_path / "agent.sock"), KEYS.get, allowed_keys=["OPENAI_API_KEY", "ANTHROPIC_API_KEY"]).start()
+    yield agent
+    agent.close()
+
+
+def test_agent_serves_keys(agent):
+    client = KeyAgentClient(agent.socket_path)
+
+    assert client.get_keys(["OPENAI_API_KEY", "ANTHROPIC_API_KEY"]) == KEYS
+    assert client.get_key("OTHER_KEY") is None
+    assert oct(os.stat(agent.socket_path).st_mode & 0o777) == oct(0o600)
+
+
+def test_password_from_file_descriptor(monkeypatch):
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, f"{PASSWORD}\n".encode())
+    os.close(write_fd)
+    monkeypatch.setenv(PASSWORD_FD_ENV, str(read_fd))
+
+    assert headless_password() == PASSWORD
+    assert PASSWORD_FD_ENV not in os.environ
+
+
+def test_workers_authenticate_through_agent(agent, tmp_path, monkeypatch):
+    monkeypatch.setenv(KEY_AGENT_ENV, agent.socket_path)
+    setup = AuthenticationSetup(str(tmp_path / "worker.env"))
+
+    assert setup.authenticate()
+    assert setup.get_api_keys().anthropic == "sk-anthropic"
+    assert not (tmp_path / "worker.env").exists()
+
+
+def test_headless_password_from_environment(env_file, monkeypatch):
+    monkeypatch.setenv(PASSWORD_ENV, PASSWORD)
+    setup = AuthenticationSetup(str(env_file))
+
+    assert setup.authenticate()
+    assert setup.get_api_keys().openai == "sk-openai"
+
+
+def test_headless_mode_fails_without_prompting(env_file, monkeypatch):
+    monkeypatch.setenv(PASSWORD_ENV, "short")
+
+    assert not AuthenticationSetup(str(env_file)).authenticate()
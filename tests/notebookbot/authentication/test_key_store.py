@@ -0,0 +1,87 @@
+import json
+import multiprocessing
+
+import pytest
+
+from notebookbot.authentication.api_key_encryption_manager import APIKeyEncryptionManager
+from notebookbot.authentication.key_store import KeyStore, key_store_path
+from notebookbot.authentication.session_keyring import SessionKeyring
+
+PASSWORD = "correct-horse-battery-staple!"
+
+
+@pytest.fixture(autouse=True)
+def fresh_keyring(monkeypatch):
+    monkeypatch.setattr(SessionKeyring, "_instance", None)
+
+
+def test_migrates_latest_keys_from_env_file(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text(
+        "OTHER_SETTING=1\n"
+        "SALT=c2FsdHNhbHRzYWx0c2FsdA\n"
+        "OPENAI_API_KEY_ENCRYPTED=old\n"
+        "OPENAI_API_KEY_ENCRYPTED=new\n"
+    )
+
+    store = KeyStore(key_store_path(str(env_file)), legacy_env_path=str(env_file))
+
+    assert store.salt == b"saltsaltsaltsalt"
+    assert store.names() == {"OPENAI_API_KEY"}
+    assert store.get("OPENAI_API_KEY") == "new"
+
+
+def test_updates_replace_keys_in_place(tmp_path):
+    store = KeyStore(str(tmp_path / "keys.json"))
+    store.set("OPENAI_API_KEY", "v1")
+
+    for version in range(2, 20):
+        store.set("OPENAI_API_KEY", f"v{version:02d}")
+
+    assert store.get("OPENAI_API_KEY") == "v19"
+    # One entry, rewritten in place; the file does not accumulate versions
+    assert json.loads(store.path.read_text())["keys"].keys() == {"OPENAI_API_KEY"}
+
+
+def test_readers_see_writes_of_other_instances(tmp_path):
+    reader = KeyStore(str(tmp_path / "keys.json"))
+    writer = KeyStore(str(tmp_path / "keys.json"))
+
+    writer.set("ANTHROPIC_API_KEY", "token")
+
+    assert reader.get("ANTHROPIC_API_KEY") == "token"
+    assert reader.salt == writer.salt
+
+
+def _write_keys(path, worker, count):
+    store = KeyStore(path)
+    for index in range(count):
+        store.set(f"KEY_{worker}_{index}", "token")
+
+
+def test_concurrent_writers_do_not_lose_updates(tmp_path):
+    path = str(tmp_path / "keys.json")
+    KeyStore(path)
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write_keys, args=(path, worker, 10)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+        assert process.exitcode == 0
+
+    assert len(KeyStore(path).names()) == 40
+
+
+def test_change_password_reencrypts_all_keys(tmp_path):
+    env_file = str(tmp_path / ".env")
+    manager = APIKeyEncryptionManager(PASSWORD, env_file)
+    manager.encrypt_and_store_key("OPENAI_API_KEY", "sk-openai")
+    old_salt = manager.salt
+
+    assert manager.change_password("another-long-password!") == 1
+
+    SessionKeyring().lock()
+    reopened = APIKeyEncryptionManager("another-long-password!", env_file)
+    assert reopened.salt != old_salt
+    assert reopened.decrypt_key("OPENAI_API_KEY") == "sk-openai"
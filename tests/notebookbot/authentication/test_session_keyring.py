@@ -0,0 +1,100 @@
+import pytest
+
+from notebookbot.authentication import session_keyring
+from notebookbot.authentication.api_key_encryption_manager import APIKeyEncryptionManager
+from notebookbot.authentication.session_keyring import SessionKeyring
+
+PASSWORD = "correct-horse-battery-staple!"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def keyring(monkeypatch, clock):
+    monkeypatch.setattr(SessionKeyring, "_instance", None)
+    return SessionKeyring(ttl=60.0, clock=clock)
+
+
+@pytest.fixture
+def derivations(monkeypatch):
+    calls = []
+    derive_key = session_keyring.derive_key
+
+    def counting_derive_key(password, salt):
+        calls.append(password)
+        return derive_key(password, salt)
+
+    monkeypatch.setattr(session_keyring, "derive_key", counting_derive_key)
+    return calls
+
+
+@pytest.fixture
+def env_file(tmp_path, keyring):
+    path = tmp_path / ".env"
+    APIKeyEncryptionManager(PASSWORD, str(path)).encrypt_and_store_key("OPENAI_API_KEY", "sk-test")
+    keyring.lock()
+    return path
+
+
+def test_key_is_derived_once_per_session(env_file, keyring, derivations):
+    first = APIKeyEncryptionManager(PASSWORD, str(env_file))
+    second = APIKeyEncryptionManager(PASSWORD, str(env_file))
+
+    assert len(derivations) == 1
+    assert first.decrypt_key("OPENAI_API_KEY") == second.decrypt_key("OPENAI_API_KEY") == "sk-test"
+
+
+def test_cached_keys_skip_env_file_and_decryption(env_file, keyring, monkeypatch):
+    manager = APIKeyEncryptionManager(PASSWORD, str(env_file))
+    assert manager.decrypt_key("OPENAI_API_KEY") == "sk-test"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("key store read again")
+
+    monkeypatch.setattr(manager.store, "get", fail)
+    monkeypatch.setattr(manager.keyring, "fernet", fail)
+
+    assert manager.decrypt_key("OPENAI_API_KEY") == "sk-test"
+
+
+def test_cached_keys_expire_after_ttl(env_file, keyring, clock, derivations):
+    manager = APIKeyEncryptionManager(PASSWORD, str(env_file))
+    manager.decrypt_key("OPENAI_API_KEY")
+    assert keyring.get(manager.scope, "OPENAI_API_KEY") == "sk-test"
+
+    clock.now += 61
+    assert keyring.get(manager.scope, "OPENAI_API_KEY") is None
+    # Decrypted again with the cached derived key
+    assert manager.decrypt_key("OPENAI_API_KEY") == "sk-test"
+    assert len(derivations) == 1
+
+
+def test_lock_forgets_derived_key_and_values(env_file, keyring, derivations):
+    manager = APIKeyEncryptionManager(PASSWORD, str(env_file))
+    manager.decrypt_key("OPENAI_API_KEY")
+
+    keyring.lock()
+    with pytest.raises(PermissionError):
+        manager.decrypt_key("OPENAI_API_KEY")
+
+    assert APIKeyEncryptionManager(PASSWORD, str(env_file)).decrypt_key("OPENAI_API_KEY") == "sk-test"
+    assert len(derivations) == 2
+
+
+def test_other_password_replaces_session(env_file, keyring):
+    APIKeyEncryptionManager(PASSWORD, str(env_file)).decrypt_key("OPENAI_API_KEY")
+
+    wrong = APIKeyEncryptionManager("wrong-password-1234!", str(env_file))
+
+    assert wrong.decrypt_key("OPENAI_API_KEY") is None
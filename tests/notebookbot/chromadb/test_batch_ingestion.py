@@ -0,0 +1,114 @@
+import pytest
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.batch_ingestion import (
+    batch_documents,
+    embed_with_backoff,
+    estimate_tokens,
+    ingest_documents,
+)
+
+
+class FakeCollection:
+    def __init__(self, existing=()):
+        self.calls = []
+        self.existing = set(existing)
+
+    def get(self, ids, include):
+        return {"ids": [i for i in ids if i in self.existing]}
+
+    def add(self, **kwargs):
+        self.calls.append(("add", kwargs))
+
+    def upsert(self, **kwargs):
+        self.calls.append(("upsert", kwargs))
+
+
+class FakeEmbeddingFunction:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def make_docs(n, size=8):
+    return [Document(page_content="x" * size, metadata={"id": f"doc-{i}"}) for i in range(n)]
+
+
+def test_batch_documents_respects_count():
+    batches = list(batch_documents(make_docs(10), batch_size=4, max_batch_tokens=10_000))
+    assert [len(b) for b in batches] == [4, 4, 2]
+
+
+def test_batch_documents_respects_token_budget():
+    docs = make_docs(5, size=40)  # 10 tokens each
+    batches = list(batch_documents(docs, batch_size=100, max_batch_tokens=25))
+    assert [len(b) for b in batches] == [2, 2, 1]
+
+
+def test_oversized_document_gets_its_own_batch():
+    docs = [Document(page_content="x" * 400), Document(page_content="y")]
+    batches = list(batch_documents(docs, batch_size=10, max_batch_tokens=50))
+    assert [len(b) for b in batches] == [1, 1]
+    assert estimate_tokens(docs[0].page_content) == 100
+
+
+def test_ingest_writes_one_call_per_batch():
+    collection = FakeCollection()
+    embed = FakeEmbeddingFunction()
+    stats = ingest_documents(collection, embed, iter(make_docs(10)), batch_size=3, max_workers=2)
+
+    assert stats.documents == 10
+    assert stats.batches == 4
+    assert len(embed.calls) == 4
+    assert len(collection.calls) == 4
+    written_ids = sorted(i for _, call in collection.calls for i in call["ids"])
+    assert written_ids == sorted(f"doc-{i}" for i in range(10))
+    assert all(op == "add" for op, _ in collection.calls)
+    assert stats.docs_per_sec > 0 and stats.tokens_per_sec > 0
+
+
+def test_ingest_counts_new_documents():
+    collection = FakeCollection(existing={"doc-1", "doc-3"})
+    stats = ingest_documents(collection, FakeEmbeddingFunction(), make_docs(5), batch_size=2, upsert=True)
+    assert (stats.documents, stats.new_documents) == (5, 3)
+
+
+def test_ingest_upsert_and_fallback_ids():
+    collection = FakeCollection()
+    docs = [Document(page_content="a"), Document(page_content="b")]
+    ingest_documents(collection, FakeEmbeddingFunction(), docs, upsert=True)
+    op, call = collection.calls[0]
+    assert op == "upsert"
+    assert call["ids"] == ["doc_0", "doc_1"]
+    assert call["metadatas"] == [None, None]
+
+
+def test_embed_with_backoff_retries_rate_limits():
+    attempts = []
+    delays = []
+
+    def flaky(texts):
+        attempts.append(texts)
+        if len(attempts) < 3:
+            raise RateLimitError("slow down")
+        return [[1.0] for _ in texts]
+
+    embeddings, retries = embed_with_backoff(flaky, ["a"], sleep=delays.append)
+    assert embeddings == [[1.0]]
+    assert retries == 2
+    assert len(delays) == 2 and delays[1] > delays[0]
+
+
+def test_embed_with_backoff_raises_other_errors():
+    def broken(texts):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        embed_with_backoff(broken, ["a"], sleep=lambda s: None)
@@ -0,0 +1,65 @@
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.bm25_index import BM25Index, tokenize
+
+
+def test_tokenize_keeps_identifiers():
+    assert tokenize("See arXiv 2101.00001v2 and text-embedding-ada-002!") == [
+        "see", "arxiv", "2101.00001v2", "and", "text-embedding-ada-002"
+    ]
+
+
+def test_search_ranks_rare_terms_higher(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    index.upsert([
+        ("a", "transformers attention attention"),
+        ("b", "attention is all you need"),
+        ("c", "graph neural networks"),
+    ])
+    assert [doc_id for doc_id, _ in index.search("attention", 5)] == ["a", "b"]
+    assert index.search("graph attention", 1)[0][0] == "c"
+    assert index.search("unknown", 5) == []
+
+
+def test_upsert_delete_and_persistence(tmp_path):
+    path = str(tmp_path / "bm25.sqlite3")
+    index = BM25Index(path)
+    index.upsert([("a", "alpha beta"), ("b", "beta gamma")])
+    index.upsert([("a", "delta")])
+    index.delete(["b"])
+
+    reloaded = BM25Index(path)
+    assert len(reloaded) == 1
+    assert reloaded.search("delta", 5)[0][0] == "a"
+    assert reloaded.search("beta", 5) == []
+
+
+def test_lexical_mode_skips_embedding(manager, embedding_function):
+    manager.add_documents([
+        Document(page_content="Paper 2101.00001 by Ada Lovelace", metadata={"id": "p1"}),
+        Document(page_content="An unrelated paper about graphs", metadata={"id": "p2"}),
+    ])
+    embedding_function.calls.clear()
+
+    results = manager.query_documents("2101.00001", mode="lexical")
+
+    assert results["ids"] == [["p1"]]
+    assert results["documents"] == [["Paper 2101.00001 by Ada Lovelace"]]
+    assert embedding_function.calls == []
+
+
+def test_hybrid_mode_fuses_rankings(manager):
+    manager.add_documents([
+        Document(page_content="Paper 2101.00001 by Ada Lovelace", metadata={"id": "p1"}),
+        Document(page_content="An unrelated paper about graphs", metadata={"id": "p2"}),
+    ])
+    results = manager.query_documents("Lovelace", n_results=2, mode="hybrid")
+    assert results["ids"][0][0] == "p1"
+    assert sorted(results["ids"][0]) == ["p1", "p2"]
+
+
+def test_lexical_index_rebuilt_for_existing_collection(manager):
+    manager.add_documents([Document(page_content="quantum annealing", metadata={"id": "q"})])
+    manager.bm25_index.clear()
+
+    assert manager.query_documents("annealing", mode="lexical")["ids"] == [["q"]]
@@ -0,0 +1,98 @@
+from langchain.docstore.document import Document
+
+
+def docs(*ids):
+    return [Document(page_content=f"text of {doc_id}", metadata={"id": doc_id}) for doc_id in ids]
+
+
+def test_document_count_is_tracked_without_round_trips(manager):
+    count_calls = []
+    count = manager.collection.count
+    manager.collection.count = lambda: count_calls.append(1) or count()
+
+    assert manager.document_count() == 0
+    manager.add_documents(docs("a", "b"))
+    manager.add_documents(docs("b", "c"), upsert=True)
+    manager.delete_documents(["a", "missing"])
+    for query in ("one", "two", "three"):
+        manager.query_documents(query)
+
+    assert manager.document_count() == 2
+    assert len(count_calls) == 1
+    assert manager.document_count(refresh=True) == count() == 2
+
+    manager.reset_collection()
+    assert manager.document_count() == 0
+
+
+def test_query_on_empty_collection_skips_search(manager):
+    manager.collection.query = None  # would fail if called
+    assert manager.query_documents("anything")["ids"] == [[]]
+
+
+def test_count_refresh_interval_rereads_storage(manager):
+    manager.document_count()
+    manager.add_documents(docs("a"))
+    manager.collection.add(ids=["external"], documents=["x"], embeddings=[[0.0] * 16])
+    assert manager.document_count() == 1
+
+    manager.count_refresh_interval = 0
+    assert manager.document_count() == 2
+
+
+def test_query_many_uses_one_embedding_request_and_one_search(manager, embedding_function):
+    manager.add_documents(docs("a", "b", "c"))
+    embedding_function.calls.clear()
+    searches = []
+    query = manager.collection.query
+    manager.collection.query = lambda **kwargs: searches.append(kwargs) or query(**kwargs)
+
+    results = manager.query_many(["first", "second", "third"], n_results=2)
+
+    assert len(results) == 3
+    assert all(len(result["ids"][0]) == 2 for result in results)
+    assert embedding_function.calls == [["first", "second", "third"]]
+    assert len(searches) == 1
+
+    manager.query_many(["first", "fourth"], n_results=2)
+    assert embedding_function.calls[-1] == ["fourth"]
+    assert len(searches[-1]["query_embeddings"]) == 1
+
+
+def test_query_many_dedupe_and_fuse(manager):
+    manager.add_documents(docs("a", "b", "c"))
+
+    deduped = manager.query_many(["q1", "q2"], n_results=3, dedupe=True)
+    ids = [doc_id for result in deduped for doc_id in result["ids"][0]]
+    assert sorted(ids) == ["a", "b", "c"]
+
+    fused = manager.query_many(["q1", "q2"], n_results=2, fuse=True)
+    assert len(fused["ids"][0]) == 2 and "scores" in fused
+
+
+def test_query_many_dedupe_and_fuse_match_chunks_of_the_same_document(manager):
+    # "alpha" is only in the first chunk of X and "beta" only in its last chunk
+    long_doc = Document(page_content="alpha aa bb cc dd ee ff gg hh beta", metadata={"id": "X"})
+    other = Document(page_content="alpha beta gamma", metadata={"id": "Y"})
+    manager.sync_documents([long_doc, other], chunk_size=2, chunk_overlap=0)
+
+    fused = manager.query_many(["alpha", "beta"], n_results=5, fuse=True, mode="lexical")
+    parents = [metadata["parent_id"] for metadata in fused["metadatas"][0]]
+    assert sorted(parents) == ["X", "Y"]
+
+    deduped = manager.query_many(["alpha", "beta"], n_results=5, dedupe=True, mode="lexical")
+    parents = [metadata["parent_id"] for result in deduped for metadata in result["metadatas"][0]]
+    assert sorted(parents) == ["X", "Y"]
+
+
+def test_given_embedding_function_needs_no_authentication(tmp_path, monkeypatch, embedding_function):
+    from notebookbot.chromadb import chromadb_manager
+    from notebookbot.chromadb.chromadb_manager import ChromaDBManager
+
+    monkeypatch.setattr(ChromaDBManager, "_instance", None)
+    monkeypatch.setattr(chromadb_manager, "AuthenticationSetup", None)  # would fail if called
+    manager = ChromaDBManager(db_path=str(tmp_path / "chroma_db"), embedding_function=embedding_function)
+    manager.add_documents(docs("a"))
+
+    assert manager.query_documents("text of a", n_results=1)["ids"] == [["a"]]
+    assert embedding_function.embedded_texts[0] == "text of a"
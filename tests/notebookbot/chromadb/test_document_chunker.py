@@ -0,0 +1,52 @@
+import pytest
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.document_chunker import (
+    chunk_documents,
+    collapse_chunk_results,
+    iter_chunk_spans,
+)
+
+
+def test_chunks_respect_size_and_overlap():
+    text = " ".join(f"w{i:02d}" for i in range(20))  # 20 words of 1 token each
+    chunks = [text[start:end].split() for start, end in iter_chunk_spans(text, chunk_size=8, chunk_overlap=2)]
+
+    assert all(len(chunk) <= 8 for chunk in chunks)
+    assert chunks[0][-2:] == chunks[1][:2]
+    assert chunks[-1][-1] == "w19"
+    covered = [word for chunk in chunks for word in chunk]
+    assert set(covered) == set(text.split())
+
+
+def test_long_word_is_split():
+    spans = list(iter_chunk_spans("x" * 100, chunk_size=5, chunk_overlap=0))
+    assert [end - start for start, end in spans] == [20] * 5
+
+
+def test_overlap_must_be_smaller_than_chunk():
+    with pytest.raises(ValueError):
+        list(iter_chunk_spans("a b c", chunk_size=4, chunk_overlap=4))
+
+
+def test_chunk_documents_ids_and_metadata():
+    parent = Document(page_content="ab cd ef gh", metadata={"id": "p1", "Title": "T"})
+    chunks = list(chunk_documents([parent], chunk_size=2, chunk_overlap=0))
+
+    assert [c.metadata["id"] for c in chunks] == ["p1#0", "p1#1"]
+    assert [c.page_content for c in chunks] == ["ab cd ", "ef gh"]
+    assert all(c.metadata["parent_id"] == "p1" and c.metadata["Title"] == "T" for c in chunks)
+    assert [c.metadata["chunk_index"] for c in chunks] == [0, 1]
+
+
+def test_collapse_keeps_best_chunk_per_parent():
+    results = {
+        "ids": [["a#0", "a#10", "b#0", "c#0"]],
+        "documents": [["a0", "a1", "b0", "c0"]],
+        "metadatas": [[{"parent_id": "a"}, {"parent_id": "a"}, {"parent_id": "b"}, {"parent_id": "c"}]],
+        "distances": [[0.1, 0.2, 0.3, 0.4]],
+    }
+    collapsed = collapse_chunk_results(results, n_results=2)
+
+    assert collapsed["ids"] == [["a#0", "b#0"]]
+    assert collapsed["distances"] == [[0.1, 0.3]]
@@ -0,0 +1,85 @@
+import numpy as np
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.embedding_cache import CachedEmbeddingFunction, EmbeddingCache, cache_key
+
+
+def test_cache_key_normalizes_whitespace():
+    assert cache_key("hello   world\n") == cache_key("hello world")
+    assert cache_key("hello world") != cache_key("hello there")
+
+
+def test_cached_function_skips_network_on_hit(tmp_path, embedding_function):
+    cached = CachedEmbeddingFunction(embedding_function, EmbeddingCache(str(tmp_path)))
+
+    first = cached(["alpha", "beta", "alpha"])
+    second = cached(["beta", "alpha"])
+
+    assert embedding_function.embedded_texts == ["alpha", "beta"]
+    assert np.allclose(first[1], second[0])
+    assert cached.cache.stats()["hits"] == 2
+    assert cached.cache.stats()["misses"] == 3
+
+
+def test_cache_persists_across_instances(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many([cache_key("alpha")], [np.array([1.0, 2.0, 3.0])])
+    cache.flush()
+
+    reloaded = EmbeddingCache(str(tmp_path))
+    assert len(reloaded) == 1
+    assert np.allclose(reloaded.get_many([cache_key("alpha")])[0], [1.0, 2.0, 3.0])
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=2)
+    cache.put_many([b"a" * 16, b"b" * 16], [np.ones(4), np.zeros(4)])
+    cache.get_many([b"a" * 16])
+    cache.put_many([b"c" * 16], [np.full(4, 2.0)])
+
+    assert cache.get_many([b"b" * 16]) == [None]
+    assert cache.get_many([b"a" * 16])[0] is not None
+    assert cache.stats()["evictions"] == 1
+
+    cache.flush()
+    reloaded = EmbeddingCache(str(tmp_path), max_entries=2)
+    reloaded.put_many([b"d" * 16], [np.ones(4)])
+    assert reloaded.get_many([b"c" * 16]) == [None]
+
+
+def test_rows_reused_by_another_process_are_misses(tmp_path):
+    # Two instances on one cache_dir stand for two processes with their own index
+    first = EmbeddingCache(str(tmp_path), max_entries=1)
+    first.put_many([b"a" * 16], [np.ones(4)])
+    second = EmbeddingCache(str(tmp_path), max_entries=1)
+    first.put_many([b"b" * 16], [np.zeros(4)])  # evicts "a", reusing its row
+
+    assert second.get_many([b"a" * 16]) == [None]
+    assert second.stats()["misses"] == 1
+    second.put_many([b"a" * 16], [np.ones(4)])
+    assert first.get_many([b"b" * 16]) == [None]
+    assert np.allclose(EmbeddingCache(str(tmp_path)).get_many([b"a" * 16])[0], np.ones(4))
+
+
+def test_growth_by_another_process_is_kept(tmp_path):
+    first, second = EmbeddingCache(str(tmp_path)), EmbeddingCache(str(tmp_path))
+    first.put_many([i.to_bytes(16, "big") for i in range(1, 1501)], [np.full(2, float(i)) for i in range(1, 1501)])
+    second.put_many([b"x" * 16], [np.full(2, -1.0)])
+    first.flush()
+    second.flush()
+
+    reloaded = EmbeddingCache(str(tmp_path))
+    assert len(reloaded) == 1501
+    assert np.allclose(reloaded.get_many([(1500).to_bytes(16, "big")])[0], [1500.0, 1500.0])
+    assert np.allclose(reloaded.get_many([b"x" * 16])[0], [-1.0, -1.0])
+
+
+def test_manager_reuses_embeddings_after_reset(manager, embedding_function):
+    docs = [Document(page_content="alpha", metadata={"id": "a"})]
+    manager.add_documents(docs)
+    manager.reset_collection()
+    manager.add_documents(docs)
+
+    assert embedding_function.embedded_texts == ["alpha"]
+    assert manager.collection.count() == 1
+    assert manager.embedding_cache_stats()["hits"] == 1
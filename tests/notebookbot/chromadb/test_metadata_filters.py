@@ -0,0 +1,95 @@
+from datetime import date
+
+import pytest
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.metadata_filters import build_where, normalize_metadata, parse_date, parse_list
+from notebookbot.data_help.save_documents_to_txt import save_documents_to_txt
+
+
+def test_parse_date():
+    assert parse_date("2023-05-01") == 20230501
+    assert parse_date(date(2021, 1, 2)) == 20210102
+    assert parse_date("2023") == 20230101
+    assert parse_date("2023-02", end_of_period=True) == 20230231
+    assert parse_date("unknown") is None
+
+
+def test_normalize_metadata_adds_filter_fields():
+    metadata = normalize_metadata({
+        "Published": "2023-05-01",
+        "Authors": "Ashish Vaswani, Noam Shazeer",
+        "primary_category": "cs.CL",
+        "categories": ["cs.CL", "cs.LG"],
+        "links": [],
+        "comment": None,
+    })
+    assert metadata["Published"] == "2023-05-01"
+    assert metadata["published_date"] == 20230501
+    assert metadata["authors"] == ["ashish vaswani", "noam shazeer"]
+    assert metadata["author_last_names"] == ["vaswani", "shazeer"]
+    assert metadata["categories"] == ["cs.CL", "cs.LG"]
+    assert "links" not in metadata and "comment" not in metadata
+
+
+def test_list_fields_read_back_from_txt_headers():
+    assert parse_list("['cs.CL', 'cs.LG']") == ["cs.CL", "cs.LG"]
+    assert parse_list("cs.CL, cs.LG") == ["cs.CL", "cs.LG"]
+    assert parse_list(("cs.CL",)) == ["cs.CL"]
+    metadata = normalize_metadata({"categories": "['cs.LG']", "primary_category": "cs.CL",
+                                   "authors": "['jane doe']", "published_date": "20240103"})
+    assert metadata["categories"] == ["cs.CL", "cs.LG"]
+    assert metadata["authors"] == ["jane doe"]
+    assert metadata["published_date"] == 20240103
+
+
+def test_build_where():
+    assert build_where() is None
+    assert build_where(source="arXiv") == {"source": {"$eq": "arXiv"}}
+    assert build_where(published_after="2023", author="Vaswani") == {"$and": [
+        {"published_date": {"$gte": 20230101}},
+        {"author_last_names": {"$contains": "vaswani"}},
+    ]}
+    assert build_where(author="Ashish  Vaswani") == {"authors": {"$contains": "ashish vaswani"}}
+    with pytest.raises(ValueError):
+        build_where(published_before="soon")
+
+
+def add_papers(manager):
+    manager.add_documents([
+        Document(page_content="attention transformers", metadata={
+            "id": "old", "Published": "2017-06-12", "Authors": "Ashish Vaswani, Noam Shazeer", "source": "arXiv"
+        }),
+        Document(page_content="attention transformers revisited", metadata={
+            "id": "new", "Published": "2024-01-03", "Authors": "Jane Doe", "source": "arXiv"
+        }),
+        Document(page_content="attention notes", metadata={"id": "txt", "source": "notes.txt"}),
+    ])
+
+
+@pytest.mark.parametrize("mode", ["vector", "lexical", "hybrid"])
+def test_filtered_queries(manager, mode):
+    add_papers(manager)
+    results = manager.query_documents("attention", 5, mode=mode, where=build_where(published_after="2023"))
+    assert results["ids"] == [["new"]]
+    results = manager.query_documents("attention", 5, mode=mode, where=build_where(author="vaswani"))
+    assert results["ids"] == [["old"]]
+    results = manager.query_documents("attention", 5, mode=mode, where=build_where(source="notes.txt"))
+    assert results["ids"] == [["txt"]]
+    assert len(manager.query_documents("attention", 5, mode=mode)["ids"][0]) == 3
+
+
+@pytest.mark.parametrize("mode", ["vector", "lexical"])
+def test_category_filter_after_txt_round_trip(manager, tmp_path, mode):
+    save_documents_to_txt([
+        Document(page_content="attention transformers", metadata={
+            "id": "arxiv:1706.03762v7", "primary_category": "cs.CL", "categories": ["cs.CL", "cs.LG"]}),
+        Document(page_content="attention in vision", metadata={
+            "id": "arxiv:2010.11929v2", "primary_category": "cs.CV", "categories": ["cs.CV"]}),
+    ], str(tmp_path / "txt"))
+    manager.load_and_embed_txt_documents(str(tmp_path / "txt"))
+
+    stored = manager.collection.get(ids=["arxiv:1706.03762v7#0"])["metadatas"][0]
+    assert stored["categories"] == ["cs.CL", "cs.LG"]
+    results = manager.query_documents("attention", 5, mode=mode, where=build_where(category="cs.LG"))
+    assert results["ids"] == [["arxiv:1706.03762v7#0"]]
@@ -0,0 +1,76 @@
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.query_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=4, ttl=10, clock=clock)
+    cache.set("q", "result")
+    assert cache.get("q") == "result"
+
+    clock.now = 11
+    assert cache.get("q") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def spy_on_queries(manager):
+    calls = []
+    query = manager.collection.query
+
+    def counting_query(**kwargs):
+        calls.append(kwargs)
+        return query(**kwargs)
+
+    manager.collection.query = counting_query
+    return calls
+
+
+def test_repeated_query_is_served_from_cache(manager):
+    manager.add_documents([Document(page_content="alpha", metadata={"id": "a"})])
+    calls = spy_on_queries(manager)
+
+    first = manager.query_documents("alpha  ", n_results=1)
+    second = manager.query_documents("alpha", n_results=1)
+
+    assert first is second
+    assert len(calls) == 1
+
+
+def test_writes_invalidate_cached_results(manager):
+    manager.add_documents([Document(page_content="alpha", metadata={"id": "a"})])
+    assert manager.query_documents("alpha")["ids"] == [["a"]]
+
+    manager.add_documents([Document(page_content="beta", metadata={"id": "b"})])
+    assert sorted(manager.query_documents("alpha")["ids"][0]) == ["a", "b"]
+
+    manager.delete_documents(["a"])
+    assert manager.query_documents("alpha")["ids"] == [["b"]]
+
+
+def test_query_embedding_reused_across_n_results(manager, embedding_function):
+    manager.add_documents([Document(page_content="alpha", metadata={"id": "a"})])
+
+    manager.query_documents("what is alpha", n_results=1)
+    manager.query_documents("what is alpha", n_results=3)
+
+    assert embedding_function.embedded_texts.count("what is alpha") == 1
+    assert manager.query_embedding_cache.stats()["hits"] == 1
@@ -0,0 +1,55 @@
+from notebookbot.chromadb.result_fusion import (
+    dedupe_across_queries,
+    reciprocal_rank_fusion,
+    split_query_results,
+)
+
+
+def result(*ids):
+    return {
+        "ids": [list(ids)],
+        "documents": [[f"doc {i}" for i in ids]],
+        "metadatas": [[{"id": i} for i in ids]],
+        "distances": [[0.1 * n for n in range(len(ids))]],
+    }
+
+
+def test_split_query_results():
+    multi = {"ids": [["a"], ["b", "c"]], "documents": [["A"], ["B", "C"]], "metadatas": None}
+    first, second = split_query_results(multi)
+    assert first == {"ids": [["a"]], "documents": [["A"]]}
+    assert second["ids"] == [["b", "c"]]
+
+
+def test_dedupe_keeps_best_ranked_occurrence():
+    deduped = dedupe_across_queries([result("a", "b", "c"), result("b", "d"), result("e", "a")])
+    assert [r["ids"][0] for r in deduped] == [["a", "c"], ["b", "d"], ["e"]]
+    assert deduped[1]["documents"] == [["doc b", "doc d"]]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([result("a", "b", "c"), result("b", "c", "a"), result("b", "x")], n_results=3)
+    assert fused["ids"] == [["b", "a", "c"]]
+    assert fused["documents"][0][0] == "doc b"
+    scores = fused["scores"][0]
+    assert scores == sorted(scores, reverse=True)
+
+
+def chunks(*ids):
+    # Chunk hits "<parent>#<n>" with their parent_id, as stored by sync_documents
+    hits = result(*ids)
+    hits["metadatas"] = [[{"id": i, "parent_id": i.split("#")[0]} for i in ids]]
+    return hits
+
+
+def test_fusion_and_dedupe_match_chunks_by_parent():
+    fused = reciprocal_rank_fusion([chunks("x#0", "y#0"), chunks("x#14", "z#0")])
+    assert fused["ids"] == [["x#0", "y#0", "z#0"]]
+    # x scores for both of its chunks
+    assert fused["scores"][0][0] == 1 / 61 + 1 / 61
+
+    deduped = dedupe_across_queries([chunks("y#0", "x#0"), chunks("x#14", "z#0")])
+    assert [r["ids"][0] for r in deduped] == [["y#0"], ["x#14", "z#0"]]
+
+    unmerged = reciprocal_rank_fusion([chunks("x#0"), chunks("x#14")], by_parent=False)
+    assert unmerged["ids"] == [["x#0", "x#14"]]
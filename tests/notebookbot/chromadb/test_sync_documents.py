@@ -0,0 +1,121 @@
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.sync_manifest import SyncManifest, content_hash
+
+
+def doc(doc_id, text):
+    return Document(page_content=text, metadata={"id": doc_id})
+
+
+def test_manifest_round_trip(tmp_path):
+    manifest = SyncManifest(str(tmp_path / "manifest.json"))
+    manifest.update("a", content_hash("hello"), "txt", ["a"])
+    manifest.save()
+
+    reloaded = SyncManifest(str(tmp_path / "manifest.json"))
+    assert reloaded.is_current("a", content_hash("hello"))
+    assert not reloaded.is_current("a", content_hash("changed"))
+    assert reloaded.ids_in_scope("txt") == ["a"]
+    assert reloaded.ids_in_scope("arxiv") == []
+
+
+def test_sync_skips_unchanged_documents(manager, embedding_function):
+    stats = manager.sync_documents([doc("a", "alpha"), doc("b", "beta")], scope="txt")
+    assert (stats.added, stats.unchanged) == (2, 0)
+
+    embedding_function.calls.clear()
+    stats = manager.sync_documents([doc("a", "alpha"), doc("b", "beta, revised")], scope="txt")
+
+    assert (stats.added, stats.updated, stats.unchanged) == (0, 1, 1)
+    assert embedding_function.embedded_texts == ["beta, revised"]
+    assert manager.collection.get(ids=["b#0"])["documents"] == ["beta, revised"]
+
+
+def test_sync_deletes_stale_documents_in_scope_only(manager):
+    manager.sync_documents([doc("paper", "arxiv paper")], scope="arxiv", delete_stale=False)
+    manager.sync_documents([doc("a", "alpha"), doc("b", "beta")], scope="txt")
+
+    stats = manager.sync_documents([doc("a", "alpha")], scope="txt")
+
+    assert stats.deleted == 1
+    assert sorted(manager.collection.get()["ids"]) == ["a#0", "paper#0"]
+    assert manager.manifest.get("b") is None
+
+
+def test_reset_collection_clears_manifest(manager):
+    manager.sync_documents([doc("a", "alpha")], scope="txt")
+    manager.reset_collection()
+
+    assert manager.manifest.get("a") is None
+    stats = manager.sync_documents([doc("a", "alpha")], scope="txt")
+    assert stats.added == 1
+
+
+def test_sync_replaces_obsolete_chunks(manager):
+    manager.sync_documents([doc("a", "aa bb cc dd ee ff")], scope="txt", chunk_size=2, chunk_overlap=0)
+    assert sorted(manager.collection.get()["ids"]) == ["a#0", "a#1", "a#2"]
+
+    manager.sync_documents([doc("a", "aa bb")], scope="txt", chunk_size=2, chunk_overlap=0)
+    assert manager.collection.get()["ids"] == ["a#0"]
+    assert manager.manifest.get("a")["ids"] == ["a#0"]
+
+
+def paper_text(topic, words=3000):
+    return " ".join(f"{topic} result {i} holds for every model we trained." for i in range(words // 8))
+
+
+def test_remove_duplicate_documents_keeps_stable_ids(manager):
+    paper = paper_text("attention")
+    # Older versions of arxiv_search stored the paper as one entry with a random id,
+    # its text cut to 4000 characters by ArxivAPIWrapper, and without the entry id
+    manager.collection.add(
+        ids=["0b9e-uuid"],
+        documents=[paper[:4000]],
+        metadatas=[{"Title": "Attention Is\n  All You Need", "Published": "2023-01-02", "source": "arXiv"}],
+    )
+    # ... and again as a .txt file, with other line breaks
+    manager.collection.add(ids=["txt_attention"], documents=[paper[:4000].replace(". ", ".\n")],
+                           metadatas=[{"source": "attention.txt"}])
+    manager.sync_documents([
+        Document(page_content=paper, metadata={
+            "id": "arxiv:2301.00001v1", "entry_id": "http://arxiv.org/abs/2301.00001v1",
+            "Title": "Attention Is All You Need", "Published": "2023-01-02", "source": "arXiv"}),
+        Document(page_content=paper_text("retrieval"), metadata={
+            "id": "arxiv:2301.00002v1", "entry_id": "http://arxiv.org/abs/2301.00002v1",
+            "Title": "Retrieval Is All You Need", "Published": "2023-01-02", "source": "arXiv"}),
+        doc("note", "attention"),
+        doc("short", "attention result"),
+    ], scope="arxiv", delete_stale=False)
+    chunk_ids = manager.manifest.get("arxiv:2301.00001v1")["ids"] + manager.manifest.get("arxiv:2301.00002v1")["ids"]
+    assert len(chunk_ids) > 2
+
+    assert manager.remove_duplicate_documents() == 2
+    assert sorted(manager.collection.get()["ids"]) == sorted(chunk_ids + ["note#0", "short#0"])
+    assert manager.document_count() == len(chunk_ids) + 2
+
+
+def test_remove_duplicate_documents_drops_manifest_entries(manager):
+    manager.sync_documents([doc("0b9e-uuid", "same paper text")], scope="arxiv", delete_stale=False)
+    manager.sync_documents([doc("arxiv:2301.00001v1", "same paper text"), doc("other", "other text")],
+                           scope="arxiv", delete_stale=False)
+
+    assert manager.remove_duplicate_documents() == 1
+    assert sorted(manager.collection.get()["ids"]) == ["arxiv:2301.00001v1#0", "other#0"]
+    assert manager.manifest.get("0b9e-uuid") is None
+
+
+def test_concurrent_syncs_and_queries(manager):
+    from concurrent.futures import ThreadPoolExecutor
+
+    batches = [[doc(f"p{worker}_{i}", f"paper {worker} section {i}") for i in range(5)] for worker in range(4)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        syncs = [pool.submit(manager.sync_documents, batch, scope="arxiv", delete_stale=False) for batch in batches]
+        queries = [pool.submit(manager.query_documents, "paper section", 3, mode="hybrid") for _ in range(8)]
+        assert sum(future.result().added for future in syncs) == 20
+        for future in queries:
+            future.result()
+
+    assert manager.document_count(refresh=True) == 20
+    assert len(manager.manifest.ids_in_scope("arxiv")) == 20
+    assert len(manager.bm25_index) == 20
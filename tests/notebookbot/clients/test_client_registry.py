@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from notebookbot.clients.client_registry import BackendConfig, ClientRegistry, chat_anthropic
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status = 500 if self.path == "/error" else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class MessagesHandler(BaseHTTPRequestHandler):
+    """Answers every Messages API request with the same short reply"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "msg_1", "type": "message", "role": "assistant", "model": "claude-test",
+            "content": [{"type": "text", "text": "Hello"}], "stop_reason": "end_turn", "stop_sequence": None,
+            "usage": {"input_tokens": 3, "output_tokens": 1},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def anthropic_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MessagesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(ClientRegistry, "_instance", None)
+    registry = ClientRegistry({"test": BackendConfig(max_connections=2)})
+    yield registry
+    registry.close()
+
+
+def test_clients_are_shared_and_connections_reused(registry, server_url):
+    assert ClientRegistry() is registry
+    assert registry.client("test") is ClientRegistry().client("test")
+    for _ in range(3):
+        registry.client("test").get(f"{server_url}/")
+    registry.client("test").get(f"{server_url}/error")
+
+    stats = registry.stats()["test"]
+    assert stats["requests"] == 4
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 3
+    assert stats["errors"] == 1
+    assert stats["mean_latency_ms"] > 0
+
+
+def test_async_clients_are_kept_per_event_loop(registry, server_url):
+    async def fetch():
+        client = registry.async_client("test")
+        await client.get(f"{server_url}/")
+        await client.get(f"{server_url}/")
+        return client
+
+    first = asyncio.run(fetch())
+    second = asyncio.run(fetch())
+    assert first is not second
+    assert registry.metrics("test").requests == 4
+    assert registry.metrics("test").new_connections == 2
+
+
+def test_chat_anthropic_graph_turns_use_the_pooled_clients(registry, anthropic_url):
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from notebookbot.agent.agent_graph import build_agent_graph, run_turn
+
+    model = chat_anthropic("sk-test", registry=registry, model="claude-test", base_url=anthropic_url)
+    app = build_agent_graph(model, [], checkpointer=MemorySaver())
+
+    async def turns():
+        await run_turn(app, "hi", thread_id="t")
+        await run_turn(app, "again", thread_id="t")
+
+    # The graph calls the model with ainvoke, on the async client of each event loop
+    asyncio.run(turns())
+    asyncio.run(turns())
+    assert registry.metrics("anthropic").requests == 4
+    assert registry.metrics("anthropic").new_connections == 2
+
+    assert model.invoke("hi").content == "Hello"
+    assert registry.metrics("anthropic").requests == 5
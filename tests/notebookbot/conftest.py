@@ -0,0 +1,41 @@
+import hashlib
+from unittest.mock import Mock
+
+import pytest
+from chromadb.api.types import Documents, EmbeddingFunction
+
+from notebookbot.chromadb import chromadb_manager
+from notebookbot.chromadb.chromadb_manager import ChromaDBManager
+
+
+class HashEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Deterministic offline embedding function that counts the texts it embeds."""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [[b / 255 for b in hashlib.sha256(text.encode()).digest()[:16]] for text in input]
+
+    @property
+    def embedded_texts(self):
+        return [text for call in self.calls for text in call]
+
+
+@pytest.fixture
+def embedding_function():
+    return HashEmbeddingFunction()
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch, embedding_function):
+    """A ChromaDBManager on a temporary path with authentication and OpenAI stubbed out."""
+    monkeypatch.setattr(ChromaDBManager, "_instance", None)
+    monkeypatch.setattr(ChromaDBManager, "_auth", Mock())
+    monkeypatch.setattr(ChromaDBManager, "_api_keys", Mock(openai="sk-test"))
+    monkeypatch.setattr(
+        chromadb_manager,
+        "OpenAIEmbeddingFunction",
+        lambda **kwargs: embedding_function
+    )
+    return ChromaDBManager(db_path=str(tmp_path / "chroma_db"))
@@ -0,0 +1,53 @@
+import os
+import stat
+from pathlib import Path
+
+import pytest
+from langchain.docstore.document import Document
+
+from notebookbot.data_help import atomic_writer
+from notebookbot.data_help.atomic_writer import write_atomic, write_files_atomic
+from notebookbot.data_help.save_documents_to_json import save_documents_to_json
+
+
+def test_write_files_atomic_reports_bytes(tmp_path):
+    stats = write_files_atomic(range(5), lambda i: (tmp_path / f"{i}.txt", b"x" * i), max_workers=2)
+    assert (stats.files, stats.bytes) == (5, 10)
+    assert stats.bytes_per_sec > 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"{i}.txt" for i in range(5)]
+
+
+def test_failed_write_keeps_old_file_and_leaves_no_temp_files(tmp_path, monkeypatch):
+    target = tmp_path / "a.txt"
+    target.write_bytes(b"old")
+
+    def failing_fsync(fd):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(atomic_writer.os, "fsync", failing_fsync)
+        with pytest.raises(OSError):
+            write_files_atomic(["new"], lambda item: (target, item.encode()))
+    assert target.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["a.txt"]
+
+    write_files_atomic(["new"], lambda item: (target, item.encode()))
+    assert target.read_bytes() == b"new"
+
+
+def test_written_files_get_the_mode_of_open(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        write_files_atomic(["a"], lambda item: (tmp_path / "a.txt", item.encode()))
+        write_atomic(tmp_path / "secret.json", b"{}", mode=0o600)
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE((tmp_path / "a.txt").stat().st_mode) == 0o644
+    assert stat.S_IMODE((tmp_path / "secret.json").stat().st_mode) == 0o600
+
+
+def test_save_documents_to_json(tmp_path):
+    docs = [Document(page_content="alpha", metadata={"id": "arxiv:2301.00001v1"})]
+    stats = save_documents_to_json(docs, str(tmp_path))
+    assert stats.files == 1
+    assert Path(tmp_path / "arxiv_2301.00001v1.json").stat().st_size == stats.bytes
@@ -0,0 +1,91 @@
+import multiprocessing
+
+from langchain.docstore.document import Document
+
+from notebookbot.data_help.document_store import DocumentStore
+
+
+def paper(doc_id, text):
+    return Document(page_content=text, metadata={"id": doc_id, "Title": f"Title of {doc_id}"})
+
+
+def test_put_get_and_skip_unchanged(tmp_path):
+    store = DocumentStore(str(tmp_path / "docs.jsonl"))
+    assert store.put_many([paper("a", "alpha"), paper("b", "beta")]) == 2
+    assert store.put_many([paper("a", "alpha"), paper("b", "beta, revised")]) == 1
+
+    assert store.get("b").page_content == "beta, revised"
+    assert store.get("missing") is None
+    assert [doc.metadata["id"] for doc in store.iter_documents()] == ["a", "b"]
+
+
+def test_reopen_delete_and_compact(tmp_path):
+    path = tmp_path / "docs.jsonl"
+    store = DocumentStore(str(path))
+    store.put_many([paper("a", "alpha"), paper("b", "beta")])
+    store.put_many([paper("a", "alpha, revised")])
+    store.delete(["b", "missing"])
+
+    # Records appended after the index was saved are picked up by scanning the tail
+    with open(path, "ab") as f:
+        f.write(b'{"id": "c", "page_content": "gamma", "metadata": {"id": "c"}}\n{"id": "d", "page')
+    reopened = DocumentStore(str(path))
+    assert sorted(reopened.ids()) == ["a", "c"]
+    assert reopened.get("a").page_content == "alpha, revised"
+
+    assert reopened.compact() > 0
+    assert [doc.page_content for doc in DocumentStore(str(path)).iter_documents()] == ["alpha, revised", "gamma"]
+
+
+def test_stores_of_several_processes_share_the_file(tmp_path):
+    # Two instances on one path stand for two processes: neither knows the other's offsets
+    path = str(tmp_path / "docs.jsonl")
+    first, second = DocumentStore(path), DocumentStore(path)
+    first.put_many([paper("a", "alpha")])
+    second.put_many([paper("b", "beta")])
+    first.put_many([paper("c", "gamma")])
+
+    assert second.get("a").page_content == "alpha"
+    assert second.get("c").page_content == "gamma"
+    assert first.get("b").page_content == "beta"
+    assert [doc.page_content for doc in DocumentStore(path).iter_documents()] == ["alpha", "beta", "gamma"]
+
+    first.delete(["a"])
+    second.compact()
+    assert "a" not in second
+    assert first.get("c").page_content == "gamma"
+    assert first.ids() == ["b", "c"]
+
+
+def _put_papers(path, worker):
+    store = DocumentStore(path)
+    for i in range(20):
+        store.put_many([paper(f"p{worker}_{i}", f"paper {worker} part {i}")])
+
+
+def test_concurrent_appends_from_processes(tmp_path):
+    path = str(tmp_path / "docs.jsonl")
+    processes = [multiprocessing.Process(target=_put_papers, args=(path, worker)) for worker in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    store = DocumentStore(path)
+    assert len(store) == 60
+    assert all(store.get(f"p{worker}_{i}").page_content == f"paper {worker} part {i}"
+               for worker in range(3) for i in range(20))
+
+
+def test_export_txt_and_rebuild_index(manager, tmp_path):
+    store = DocumentStore(str(tmp_path / "docs.jsonl"))
+    store.put_many([paper("arxiv:2301.00001v1", "alpha"), paper("arxiv:2301.00002v1", "beta")])
+
+    assert store.export_txt(str(tmp_path / "txt"), ["arxiv:2301.00002v1"]) == 1
+    assert [p.name for p in (tmp_path / "txt").iterdir()] == ["arxiv_2301.00002v1.txt"]
+
+    stats = manager.rebuild_from_store(store)
+    assert stats.added == 2
+    assert manager.rebuild_from_store(store).unchanged == 2
+    assert manager.rebuild_from_store(store, incremental=False).added == 2
+    assert manager.document_count() == 2
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from langchain.docstore.document import Document
+
+from notebookbot.data_help.load_documents import iter_documents
+from notebookbot.data_help.save_documents_to_txt import save_documents_to_txt
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "a.txt").write_text("alpha", encoding="utf-8")
+    (tmp_path / "nested" / "b.txt").write_text("beta", encoding="utf-8")
+    (tmp_path / "nested" / "c.json").write_text(json.dumps({
+        "id": None,
+        "metadata": {"id": "paper-1", "Title": "Gamma"},
+        "page_content": "gamma",
+        "type": "Document",
+    }), encoding="utf-8")
+    (tmp_path / "nested" / "d.json").write_text(json.dumps({
+        "metadata": {"source": "notes", "file_path": "d.pdf"},
+        "page_content": "delta",
+    }), encoding="utf-8")
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+    return tmp_path
+
+
+def test_iter_documents_recursive_multi_format(corpus):
+    docs = {doc.metadata["id"]: doc for doc in iter_documents(str(corpus), max_workers=2)}
+
+    assert set(docs) == {"txt_a", "txt_b", "paper-1", "json_d"}
+    assert docs["paper-1"].page_content == "gamma"
+    assert docs["paper-1"].metadata["Title"] == "Gamma"
+    assert docs["txt_b"].metadata["filename"] == "b.txt"
+    assert docs["json_d"].metadata["source"] == "notes"
+
+
+def test_iter_documents_non_recursive_pattern(corpus):
+    docs = list(iter_documents(str(corpus), patterns=("*.txt",)))
+    assert [doc.page_content for doc in docs] == ["alpha"]
+
+
+def test_iter_documents_missing_directory(tmp_path):
+    with pytest.raises(ValueError):
+        iter_documents(str(tmp_path / "missing"))
+
+
+def test_load_and_embed_documents_streams_into_collection(manager, corpus):
+    assert manager.load_and_embed_documents(str(corpus), batch_size=1)
+    assert sorted(manager.collection.get()["ids"]) == ["json_d#0", "paper-1#0", "txt_a#0", "txt_b#0"]
+
+
+def test_saved_txt_documents_keep_their_ids(tmp_path):
+    paper = Document(page_content="Line one\nline two",
+                     metadata={"id": "arxiv:hep-th/9901001v1", "Title": "A: title", "source": "arXiv"})
+    save_documents_to_txt([paper], str(tmp_path))
+    assert [p.name for p in tmp_path.iterdir()] == ["arxiv_hep-th_9901001v1.txt"]
+
+    loaded, = iter_documents(str(tmp_path), patterns=("*.txt",))
+    assert loaded.page_content == paper.page_content
+    assert loaded.metadata["id"] == "arxiv:hep-th/9901001v1"
+    assert loaded.metadata["Title"] == "A: title"
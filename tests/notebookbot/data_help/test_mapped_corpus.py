@@ -0,0 +1,57 @@
+from langchain.docstore.document import Document
+
+from notebookbot.chromadb.document_chunker import chunk_documents, iter_chunk_spans
+from notebookbot.chromadb.sync_manifest import content_hash
+from notebookbot.data_help.mapped_corpus import MappedText, iter_mapped_documents
+from notebookbot.data_help.save_documents_to_txt import save_documents_to_txt
+
+TEXT = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+
+
+def test_mapped_documents_chunk_like_decoded_documents(tmp_path):
+    paper = Document(page_content=TEXT, metadata={"id": "arxiv:2301.00001v1", "Title": "Greek"})
+    save_documents_to_txt([paper], str(tmp_path))
+    (tmp_path / "notes.txt").write_text("plain notes", encoding="utf-8")
+    (tmp_path / "empty.txt").write_bytes(b"")
+
+    # Mappings are closed when iteration moves on, so inspect each document in the loop
+    seen = {}
+    for doc in iter_mapped_documents(str(tmp_path)):
+        seen[doc.metadata["id"]] = (doc.metadata, doc.content_hash(), doc.page_content)
+    assert set(seen) == {"arxiv:2301.00001v1", "txt_notes", "txt_empty"}
+
+    metadata, text_hash, text = seen["arxiv:2301.00001v1"]
+    assert metadata["Title"] == "Greek"
+    assert text_hash == content_hash(TEXT) and text == TEXT
+    assert seen["txt_notes"][2] == "plain notes"
+    assert seen["txt_empty"][1] == content_hash("")
+
+
+def test_iter_chunks_matches_chunk_documents(tmp_path):
+    paper = Document(page_content=TEXT, metadata={"id": "p"})
+    save_documents_to_txt([paper], str(tmp_path))
+    for mapped in iter_mapped_documents(str(tmp_path)):
+        chunks = list(mapped.iter_chunks(chunk_size=4, chunk_overlap=1))
+    expected = list(chunk_documents([paper], chunk_size=4, chunk_overlap=1))
+    assert [c.page_content for c in chunks] == [c.page_content for c in expected]
+    assert [c.metadata["id"] for c in chunks] == [c.metadata["id"] for c in expected]
+
+
+def test_byte_chunks_never_split_characters():
+    data = ("é" * 40).encode("utf-8")
+    spans = list(iter_chunk_spans(memoryview(data), chunk_size=4, chunk_overlap=0))
+    text = MappedText(data)
+    assert "".join(text.decode(start, end) for start, end in spans) == "é" * 40
+    assert all(len(data[start:end]) <= 16 for start, end in spans)
+
+
+def test_unchanged_mapped_files_are_not_decoded(manager, tmp_path, monkeypatch):
+    save_documents_to_txt([Document(page_content=TEXT, metadata={"id": "p"})], str(tmp_path))
+    assert manager.load_and_embed_txt_documents(str(tmp_path))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("decoded an unchanged document")
+
+    monkeypatch.setattr(MappedText, "decode", fail)
+    stats = manager.sync_documents(iter_mapped_documents(str(tmp_path)), scope="txt")
+    assert stats.unchanged == 1
@@ -0,0 +1,126 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import fitz
+import pytest
+from langchain.docstore.document import Document
+
+from notebookbot.llm_tools.arxiv_fetcher import ArxivFetcher, is_arxiv_id_query, split_arxiv_id
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom">
+{entries}
+</feed>"""
+
+ENTRY = """<entry>
+  <id>http://arxiv.org/abs/{arxiv_id}</id>
+  <updated>2023-05-0{n}T10:00:00Z</updated>
+  <published>2023-04-01T10:00:00Z</published>
+  <title>Paper
+    {n}</title>
+  <summary>Summary {n}</summary>
+  <author><name>Ada Lovelace</name></author>
+  <author><name>Alan Turing</name></author>
+  <arxiv:primary_category term="cs.CL"/>
+  <category term="cs.CL"/>
+  <category term="cs.LG"/>
+  <link href="{base}/pdf/{arxiv_id}" title="pdf" type="application/pdf"/>
+</entry>"""
+
+
+def make_pdf(text):
+    pdf = fitz.open()
+    pdf.new_page().insert_text((72, 72), text)
+    data = pdf.tobytes()
+    pdf.close()
+    return data
+
+
+@pytest.fixture
+def arxiv_server():
+    requests = []
+    papers = {"2301.00001v1": make_pdf("first paper body"), "2301.00002v3": make_pdf("second paper body")}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = urlparse(self.path).path
+            requests.append(path)
+            if path == "/api/query":
+                base = f"http://127.0.0.1:{self.server.server_port}"
+                entries = "".join(ENTRY.format(arxiv_id=arxiv_id, n=n, base=base)
+                                  for n, arxiv_id in enumerate(list(papers) + ["2301.00003v1"], start=1))
+                body, content_type = FEED.format(entries=entries).encode(), "application/atom+xml"
+            elif path.startswith("/pdf/") and path[5:] in papers:
+                body, content_type = papers[path[5:]], "application/pdf"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_split_arxiv_id():
+    assert split_arxiv_id("http://arxiv.org/abs/2101.00001v2") == ("2101.00001", 2)
+    assert split_arxiv_id("hep-th/9901001") == ("hep-th/9901001", 1)
+    assert is_arxiv_id_query("2101.00001v2 2101.00002")
+    assert not is_arxiv_id_query("attention is all you need")
+
+
+def test_fetches_papers_skips_failures_and_serves_repeats_from_cache(arxiv_server, tmp_path):
+    base, requests = arxiv_server
+    fetcher = ArxivFetcher(store_path=str(tmp_path / "documents.jsonl"), api_url=f"{base}/api/query", min_interval=0)
+
+    docs = fetcher.load("attention", max_results=2)
+    assert [doc.metadata["Title"] for doc in docs] == ["Paper 1", "Paper 2"]
+    assert [doc.metadata["id"] for doc in docs] == ["arxiv:2301.00001v1", "arxiv:2301.00002v3"]
+    assert "first paper body" in docs[0].page_content
+    assert docs[1].metadata["Published"] == "2023-05-02"
+    assert docs[1].metadata["Authors"] == "Ada Lovelace, Alan Turing"
+    assert docs[1].metadata["categories"] == ["cs.CL", "cs.LG"]
+    # 2301.00003v1 has no PDF on the server and is skipped
+    assert sorted(requests) == ["/api/query", "/pdf/2301.00001v1", "/pdf/2301.00002v3", "/pdf/2301.00003v1"]
+
+    # Fetched papers are kept in the document store, not in files of their own
+    assert fetcher.store.get("arxiv:2301.00001v1") == docs[0]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "documents.jsonl", "documents.jsonl.index.json", "documents.jsonl.lock"]
+
+    requests.clear()
+    assert fetcher.load("attention", max_results=2) == docs
+    assert requests == ["/api/query", "/pdf/2301.00003v1"]
+
+
+def test_cached_papers_are_not_downloaded(arxiv_server, tmp_path):
+    base, requests = arxiv_server
+    fetcher = ArxivFetcher(store_path=str(tmp_path / "documents.jsonl"), api_url=f"{base}/api/query", min_interval=0)
+    fetcher.store.put_many([Document(page_content="cached", metadata={"id": "arxiv:2301.00001v1", "Title": "Cached"})])
+    docs = fetcher.load("attention")
+    assert docs[0].page_content == "cached"
+    assert "/pdf/2301.00001v1" not in requests
+
+
+def test_pdf_downloads_are_not_spaced_by_the_api_interval(arxiv_server, tmp_path):
+    base, requests = arxiv_server
+    # The default 3 s interval applies to the search only; before, each of the three
+    # PDFs waited for its own 3 s slot
+    fetcher = ArxivFetcher(store_path=str(tmp_path / "documents.jsonl"), api_url=f"{base}/api/query")
+    start = time.monotonic()
+    docs = fetcher.load("attention")
+    assert time.monotonic() - start < fetcher.min_interval
+    assert len(docs) == 2
+    assert len(requests) == 4
@@ -0,0 +1,53 @@
+from langchain.docstore.document import Document
+
+from notebookbot.llm_tools.query_documents import query_documents
+
+
+def add_papers(manager):
+    manager.add_documents([
+        Document(page_content=f"content {i}", metadata={"id": f"p{i}", "Title": f"Paper {i}"})
+        for i in range(3)
+    ])
+
+
+def test_single_query_formats_titles(manager):
+    add_papers(manager)
+    output = query_documents.invoke({"query": "content", "n_results": 2, "return_fields": "title"})
+    assert output.count("Title: Paper") == 2
+
+
+def test_batch_mode_lists_each_document_once(manager):
+    add_papers(manager)
+    output = query_documents.invoke({
+        "query": "content one",
+        "queries": ["content two"],
+        "n_results": 3,
+        "return_fields": "title",
+    })
+    assert "Results for 'content one'" in output
+    assert "Results for 'content two'" in output
+    assert sorted(line for line in output.splitlines() if line.startswith("Title")) == [
+        "Title: Paper 0", "Title: Paper 1", "Title: Paper 2"
+    ]
+
+
+def test_batch_mode_fused(manager):
+    add_papers(manager)
+    output = query_documents.invoke({
+        "query": "content one",
+        "queries": ["content two"],
+        "n_results": 2,
+        "return_fields": "title",
+        "fuse": True,
+    })
+    assert output.count("Title: Paper") == 2
+    assert "Results for" not in output
+
+
+def test_filters_are_applied(manager):
+    manager.add_documents([
+        Document(page_content="content", metadata={"id": "a", "Title": "Old", "Published": "2019-01-01"}),
+        Document(page_content="content", metadata={"id": "b", "Title": "New", "Published": "2024-01-01"}),
+    ])
+    output = query_documents.invoke({"query": "content", "return_fields": "title", "published_after": "2020"})
+    assert output == "Title: New"
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "src"))
+HEAVY_PACKAGES = ("chromadb", "langgraph", "langchain_anthropic", "langchain_community", "anthropic", "openai", "fitz")
+
+
+def loaded_packages(module: str) -> set:
+    """Top-level packages in sys.modules after importing module in a fresh interpreter"""
+    code = f"import sys, {module}; print(' '.join(sorted({{name.split('.')[0] for name in sys.modules}})))"
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    result = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True, env=env, check=True)
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize("module", [
+    "notebookbot.scripts.notebookbot_run",
+    "notebookbot.scripts.notebookbot_serve",
+    "notebookbot.llm_tools.arxiv_search",
+    "notebookbot.llm_tools.query_documents",
+])
+def test_import_does_not_load_heavy_packages(module):
+    assert loaded_packages(module).isdisjoint(HEAVY_PACKAGES)